@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Offline micro-benchmarks of the ingest and query hot paths
+
+Each component is timed on its own over a seeded synthetic corpus, with no
+database and no network. Results are compared to a stored baseline and the
+run fails when any benchmark is slower than the baseline by more than the
+threshold.
+
+Usage:
+    python benchmarks/run_benchmarks.py --save-baseline   # record the baseline on this machine
+    python benchmarks/run_benchmarks.py                   # compare, exit 1 on a regression
+    python benchmarks/run_benchmarks.py -k chunk -k filters --threshold 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from datetime import datetime
+
+# Never reach for the model hub, and keep label matrices out of the user's cache
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("LABEL_EMBEDDING_CACHE_DIR", os.path.join(tempfile.gettempdir(), "search_app_bench_labels"))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import numpy as np
+from bson import ObjectId
+
+from services.classifiers.project_catalog import ProjectCatalog
+from services.classifiers.project_classifier import ProjectClassifier, SAMPLE_PROJECTS
+from services.classifiers.team_classifier import TeamClassifier
+from services.classifiers.topic_classifier import TopicClassifier
+from services.db_handler.config import mongodb_config
+from services.db_handler.mongodb_handler import MongoDBHandler
+from services.indexer.chunker import TextChunker
+from services.models.embedding_model import DEFAULT_BACKEND, DEFAULT_MODEL_NAME, EmbeddingModel
+from services.searcher.query_service import QueryService
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = float(os.getenv("BENCH_REGRESSION_THRESHOLD", "0.25"))
+SEED = 1234
+
+VOCABULARY = (
+    "campaign budget launch pricing discount brand logo roadmap feature release seo keyword backlink "
+    "organic search content blog script sales pitch pipeline quota design visual ux illustration "
+    "marketing ads performance quarter revenue growth team review plan draft final approved update "
+    "customer segment email social creative landing page banner offer rate card policy process memo"
+).split()
+
+
+# ---------- Synthetic data ----------
+
+def synthetic_sentence(rng: random.Random) -> str:
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(6, 24))]
+    return " ".join(words).capitalize() + rng.choice(".!?")
+
+
+def synthetic_document(rng: random.Random, chars: int) -> str:
+    paragraphs, size = [], 0
+    while size < chars:
+        paragraph = " ".join(synthetic_sentence(rng) for _ in range(rng.randint(3, 8)))
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 1
+    return "\n".join(paragraphs)
+
+
+def synthetic_results(rng: random.Random, count: int, score_field: str):
+    return [
+        {
+            "_id": ObjectId(),
+            "text": synthetic_sentence(rng),
+            "topic": rng.choice(["pricing", "campaign", "product_release"]),
+            "team": rng.choice(["Marketing", "SEO", "Design"]),
+            "project": rng.choice(["Q4 Promo Campaign", "Mobile App Launch"]),
+            "source": f"doc-{rng.randrange(1000)}.pdf",
+            "title": "Synthetic result",
+            "created_at": datetime(2024, 1, 1),
+            score_field: rng.random(),
+        }
+        for _ in range(count)
+    ]
+
+
+class OfflineMongoDBHandler(MongoDBHandler):
+    """Handler for the pure query-building helpers; never connects."""
+
+    def __init__(self, config=None):
+        self.config = config or mongodb_config
+        self._client = self._database = self._collection = None
+
+
+class OfflineProjectCatalog(ProjectCatalog):
+    """Project catalog over a fixed list of projects instead of the projects collection."""
+
+    def __init__(self, embedding_model, projects):
+        self.embedding_model = embedding_model
+        self.refresh_interval = float("inf")
+        self._lock = threading.Lock()
+        self._state = ([], [], {}, np.empty((0, 0), dtype=np.float32))
+        self._last_synced_at = None
+        self._last_refresh = time.monotonic()
+        embeddings = self._embed([p["description"] for p in projects])
+        self._apply_changes([dict(p, embedding=e) for p, e in zip(projects, embeddings)])
+
+    def refresh(self, force: bool = False) -> int:
+        return 0
+
+
+# ---------- Benchmarks ----------
+
+def build_benchmarks(model: EmbeddingModel):
+    """Return [(name, callable, items per call)] with all setup done up front."""
+    rng = random.Random(SEED)
+    benchmarks = []
+
+    texts = [synthetic_sentence(rng) + " " + synthetic_sentence(rng) for _ in range(128)]
+    for batch_size in (1, 8, 32, 128):
+        benchmarks.append((
+            f"encode[{model.backend},batch={batch_size}]",
+            lambda batch_size=batch_size: model.encode(texts[:max(batch_size, 32)], batch_size=batch_size),
+            max(batch_size, 32),
+        ))
+    benchmarks.append(("encode[query]", lambda: model.encode(texts[0]), 1))
+
+    document = synthetic_document(rng, 200_000)
+    for mode in ("char", "sentence", "paragraph", "content"):
+        chunker = TextChunker(mode=mode)
+        benchmarks.append((f"chunk[{mode}]", lambda chunker=chunker: chunker.chunk(document), 1))
+
+    embeddings = np.asarray(model.encode(texts), dtype=np.float32)
+    topic_classifier = TopicClassifier(model)
+    team_classifier = TeamClassifier(model)
+    projects = [dict(p) for p in SAMPLE_PROJECTS] + [
+        {"project_id": f"S{i:03d}", "name": f"Synthetic project {i}", "description": synthetic_sentence(rng)}
+        for i in range(45)
+    ]
+    project_classifier = ProjectClassifier(model, catalog=OfflineProjectCatalog(model, projects))
+    keyword_text = texts[0] + " campaign seo keyword"
+    plain_text = "quarterly numbers were reviewed"
+    benchmarks += [
+        ("topic.categorize", lambda: topic_classifier.categorize(texts[0], embedding=embeddings[0]), 1),
+        ("topic.categorize_batch[128]", lambda: topic_classifier.categorize_batch(embeddings), 128),
+        ("team.categorize[keywords]", lambda: team_classifier.categorize(keyword_text, embedding=embeddings[0]), 1),
+        ("team.categorize[semantic]", lambda: team_classifier.categorize(plain_text, embedding=embeddings[1]), 1),
+        ("project.categorize[50]", lambda: project_classifier.categorize(texts[0], embedding=embeddings[0]), 1),
+    ]
+
+    handler = OfflineMongoDBHandler()
+    vector_results = synthetic_results(rng, 100, "score")
+    # Half of the text hits are also vector hits, as in a typical hybrid query
+    text_results = [dict(doc, text_score=rng.random() * 10) for doc in rng.sample(vector_results, 50)]
+    text_results += synthetic_results(rng, 50, "text_score")
+    for strategy in ("rrf", "weighted"):
+        benchmarks.append((
+            f"combine_search_results[{strategy},100+100]",
+            lambda strategy=strategy: handler._combine_search_results(vector_results, text_results, 0.5, strategy),
+            1,
+        ))
+    filters = {
+        "topic": ["pricing", "campaign"],
+        "team": "Marketing",
+        "project": "Q4 Promo Campaign",
+        "date_range": {"start": datetime(2024, 1, 1), "end": datetime(2024, 12, 31)},
+    }
+    benchmarks.append(("build_filters", lambda: handler._build_filters(filters), 1))
+
+    query_service = QueryService(handler, model, search_backend=object())
+    benchmarks.append(("format_results[100]", lambda: query_service._format_results(vector_results), 100))
+    return benchmarks
+
+
+def measure(fn, repeats: int, min_time: float):
+    """Median and best seconds per call, each sample looping for at least min_time."""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    samples = [seconds / number for seconds in timer.repeat(repeats, number)]
+    return {"median": statistics.median(samples), "best": min(samples), "number": number}
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} µs"
+
+
+def environment(model: EmbeddingModel) -> dict:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "model": model.model_name,
+        "backend": model.backend,
+    }
+
+
+def run(args) -> bool:
+    model = EmbeddingModel(args.model, backend=args.backend)
+    benchmarks = [b for b in build_benchmarks(model) if not args.k or any(k in b[0] for k in args.k)]
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if stored.get("environment") != environment(model):
+            print(f"Baseline environment differs: {stored.get('environment')}")
+        baseline = stored.get("results", {})
+
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<42} {'median':>10} {'items/s':>12} {'baseline':>10} {'change':>8}")
+    for name, fn, items in benchmarks:
+        result = measure(fn, args.repeats, args.min_time)
+        results[name] = result
+        line = f"{name:<42} {format_seconds(result['median']):>10} {items / result['median']:>12,.0f}"
+        if name in baseline:
+            change = result["median"] / baseline[name]["median"] - 1
+            line += f" {format_seconds(baseline[name]['median']):>10} {change:>+8.1%}"
+            if change > args.threshold:
+                regressions.append((name, change))
+                line += "  REGRESSION"
+        print(line)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment(model), "threshold": args.threshold, "results": results},
+                      f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+    elif not baseline:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+
+    for name, change in regressions:
+        print(f"{name} is {change:.1%} slower than the baseline (threshold {args.threshold:.0%})")
+    return not regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks of the ingest and query hot paths")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Record this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown of the median before failing, e.g. 0.25 for 25%%")
+    parser.add_argument("-k", action="append", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--repeats", type=int, default=7, help="Timed samples per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.1, help="Seconds per sample")
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME, help="Embedding model (must be cached locally)")
+    parser.add_argument("--backend", default=DEFAULT_BACKEND, help="Embedding backend")
+    sys.exit(0 if run(parser.parse_args()) else 1)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Compare the embedding backends against PyTorch
+
+Reports cosine agreement with the torch embeddings, how often each text keeps
+its nearest neighbour, and encode throughput, so EMBEDDING_BACKEND can be set
+to the fastest backend that keeps retrieval quality. The first run exports
+(and quantizes) the model to EMBEDDING_ONNX_CACHE_DIR.
+
+Usage:
+    python check_embedding_backends.py              # up to 500 stored chunks
+    python check_embedding_backends.py texts.txt    # one text per line
+"""
+import logging
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from services.db_handler.mongodb_handler import MongoDBHandler, close_all_clients
+from services.models.embedding_model import compare_backends
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_SIZE = 500
+
+def load_texts(path=None):
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    try:
+        handler = MongoDBHandler()
+        pipeline = [{"$sample": {"size": SAMPLE_SIZE}}, {"$project": {"_id": 0, "text": 1}}]
+        return [doc["text"] for doc in handler._collection.aggregate(pipeline) if doc.get("text")]
+    finally:
+        close_all_clients()
+
+def check_embedding_backends(path=None):
+    """Print the parity report of every backend."""
+    try:
+        texts = load_texts(path)
+        if len(texts) < 2:
+            logger.error("Need at least two texts to compare backends")
+            return False
+        print(f"{'backend':<10} {'mean cos':>9} {'min cos':>9} {'nn agree':>9} {'texts/s':>9}")
+        for row in compare_backends(texts):
+            if "error" in row:
+                print(f"{row['backend']:<10} {row['error']}")
+                continue
+            print(f"{row['backend']:<10} {row['mean_cosine']:>9.4f} {row['min_cosine']:>9.4f} "
+                  f"{row['neighbour_agreement']:>9.2%} {row['texts_per_second']:>9.1f}")
+        return True
+    except Exception as e:
+        logger.error(f"Backend comparison failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("Comparing embedding backends...")
+    success = check_embedding_backends(sys.argv[1] if len(sys.argv) > 1 else None)
+    if success:
+        print("✅ Backend comparison completed successfully!")
+    else:
+        print("❌ Failed to compare embedding backends")
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Rewrite stored embeddings in another storage format
+
+BSON binary vectors are about a third (float32) or a tenth (int8) of the size
+of the default array of doubles. Set MONGODB_EMBEDDING_FORMAT to the same
+format afterwards so new documents and queries use it too.
+
+Usage:
+    python migrate_embeddings.py            # format from MONGODB_EMBEDDING_FORMAT
+    python migrate_embeddings.py float32    # array | float32 | int8
+"""
+import logging
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from services.db_handler.mongodb_handler import MongoDBHandler, close_all_clients
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_embeddings(target_format=None):
+    """Convert every embedding that is not stored in target_format."""
+    try:
+        handler = MongoDBHandler()
+        stats = handler.migrate_embeddings(target_format)
+        logger.info(f"Migrated {stats['migrated']} of {stats['scanned']} embeddings")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to migrate embeddings: {e}")
+        return False
+    finally:
+        close_all_clients()
+
+if __name__ == "__main__":
+    print("Migrating embeddings...")
+    success = migrate_embeddings(sys.argv[1] if len(sys.argv) > 1 else None)
+    if success:
+        print("✅ Embedding migration completed successfully!")
+    else:
+        print("❌ Failed to migrate embeddings")
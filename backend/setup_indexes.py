@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Create the MongoDB indexes used by the application
+
+The app bootstraps indexes once at startup unless MONGODB_BOOTSTRAP_INDEXES=false;
+run this script to create them explicitly, e.g. as a deploy step.
+"""
+import logging
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from services.db_handler.mongodb_handler import MongoDBHandler, close_all_clients
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def setup_indexes():
+    """Create indexes on the documents collection."""
+    try:
+        handler = MongoDBHandler()
+        return handler.ensure_indexes(force=True)
+    except Exception as e:
+        logger.error(f"Failed to setup indexes: {e}")
+        return False
+    finally:
+        close_all_clients()
+
+if __name__ == "__main__":
+    print("Setting up MongoDB indexes...")
+    success = setup_indexes()
+    if success:
+        print("✅ Index setup completed successfully!")
+    else:
+        print("❌ Failed to setup indexes")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Load projects into the MongoDB project catalog used by ProjectClassifier
+
+Usage:
+    python setup_project_catalog.py                 # seed the sample projects
+    python setup_project_catalog.py projects.json   # load a JSON list of projects
+"""
+import json
+import logging
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from services.classifiers.project_catalog import get_project_catalog
+from services.classifiers.project_classifier import SAMPLE_PROJECTS
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def setup_project_catalog(projects):
+    """Create or update every project, computing its embedding once."""
+    try:
+        catalog = get_project_catalog()
+        for project in projects:
+            catalog.upsert_project(project["project_id"], project["name"], project["description"])
+        synced = catalog.refresh(force=True)
+        logger.info(f"Project catalog holds {len(catalog)} projects ({synced} synced)")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to setup project catalog: {e}")
+        return False
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            projects = json.load(f)
+    else:
+        projects = SAMPLE_PROJECTS
+    print(f"Loading {len(projects)} projects into the catalog...")
+    success = setup_project_catalog(projects)
+    if success:
+        print("✅ Project catalog setup completed successfully!")
+    else:
+        print("❌ Failed to setup project catalog")
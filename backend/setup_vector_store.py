@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Write a memory-mapped snapshot of the local vector index
+
+With SEARCH_BACKEND=local every worker maps the latest snapshot at startup
+and only pulls changes made after it from MongoDB, instead of loading every
+embedding into its own memory. Re-run this script periodically (e.g. from
+cron) so the in-memory part of the index stays small.
+
+Usage:
+    python setup_vector_store.py            # quantization from LOCAL_INDEX_QUANTIZATION
+    python setup_vector_store.py float16    # int8 | float16
+"""
+import logging
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from services.db_handler.mongodb_handler import MongoDBHandler, close_all_clients
+from services.searcher.embedding_store import LOCAL_INDEX_STORE_DIR, EmbeddingStore
+from services.searcher.local_vector_index import LocalVectorIndex
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def setup_vector_store(quantization=None):
+    """Sync the index on top of the current snapshot and write a new one."""
+    try:
+        index = LocalVectorIndex(MongoDBHandler(), algorithm="flat",
+                                 store=EmbeddingStore.open_current(LOCAL_INDEX_STORE_DIR))
+        index.sync()
+        path = index.save_store(LOCAL_INDEX_STORE_DIR, quantization=quantization)
+        EmbeddingStore.remove_stale(LOCAL_INDEX_STORE_DIR)
+        logger.info(f"Vector store snapshot with {len(index)} documents written to {path}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to write vector store: {e}")
+        return False
+    finally:
+        close_all_clients()
+
+if __name__ == "__main__":
+    print("Writing local vector store snapshot...")
+    success = setup_vector_store(sys.argv[1] if len(sys.argv) > 1 else None)
+    if success:
+        print("✅ Vector store written successfully!")
+    else:
+        print("❌ Failed to write vector store")
@@ -1,11 +1,24 @@
 import flask
 from flask import request, jsonify, render_template,send_from_directory, Flask
 from flask_cors import CORS
-from services.file_upload.file_upload_handler import file_source_factory
+from services.file_upload.file_upload_handler import file_source_factory, UploadedFileSource, TempFileSource
 from services.file_upload.file_processer import FileProcesser
-from services.searcher.query_service import QueryService
+from services.cache.search_cursors import CursorExpiredError
+from services.searcher.query_service import (
+    QueryService, format_stream_event, int_param, parse_query_batch, stream_media_type
+)
+from services.models.model_registry import model_registry
+from services.classifiers.project_catalog import get_project_catalog
+from services.cache.query_embedding_cache import query_embedding_cache
+from services.cache.result_cache import result_cache
+from services.jobs.ingest_queue import IngestQueue, QueueFullError
+from services.db_handler.mongodb_handler import MongoDBHandler, get_pool_stats
+from services.db_handler.config import mongodb_config
+from services.metrics import stage_metrics
 import logging
 import os
+import threading
+import time
 logger = logging.getLogger(__name__)
 
 
@@ -20,36 +33,134 @@ CORS(app,
      allow_headers=["Content-Type", "Authorization"],
      supports_credentials=True)
 
+# Load and warm up the shared embedding model in the background so the
+# server can accept connections while /status reports it is not ready yet.
+threading.Thread(target=model_registry.warmup_until_ready, name="model-warmup", daemon=True).start()
+
+def bootstrap_indexes():
+    """Create MongoDB indexes once per process instead of on every handler, retrying until it works."""
+    delay = 5
+    while True:
+        try:
+            if MongoDBHandler().ensure_indexes():
+                return
+        except Exception as e:
+            logger.error(f"MongoDB index bootstrap failed: {e}")
+        logger.info(f"Retrying MongoDB index bootstrap in {delay}s")
+        time.sleep(delay)
+        delay = min(delay * 2, 300)
+
+if mongodb_config.bootstrap_indexes:
+    threading.Thread(target=bootstrap_indexes, name="index-bootstrap", daemon=True).start()
+
+# Uploads are processed by background workers; /api/upload only enqueues them
+ingest_queue = IngestQueue(FileProcesser)
+
 @app.before_request
 def log_request():
-    print("REQUEST:", request.method, request.path)
+    logger.debug(f"REQUEST: {request.method} {request.path}")
+    flask.g.request_started = time.perf_counter()
+    stage_metrics.begin_request()
+
+@app.after_request
+def record_request_timing(response):
+    """Record request latency and report the stages of this request in Server-Timing."""
+    started = flask.g.pop("request_started", None)
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    labels = (request.method, route, str(response.status_code))
+    if response.is_streamed:
+        # The body is produced after this hook, when the headers are already
+        # sent, so streams are timed on close and get no Server-Timing
+        def record_stream_timing():
+            stage_metrics.end_request()
+            if started is not None and stage_metrics.METRICS_ENABLED:
+                stage_metrics.request_duration.observe(labels, time.perf_counter() - started)
+
+        response.call_on_close(record_stream_timing)
+        return response
+    stages = stage_metrics.end_request()
+    if started is None or not stage_metrics.METRICS_ENABLED:
+        return response
+    elapsed = time.perf_counter() - started
+    stage_metrics.request_duration.observe(labels, elapsed)
+    response.headers["Server-Timing"] = stage_metrics.server_timing_header(stages, total=elapsed)
+    return response
 
 # ---------- API Routes (must come before catch-all) ----------
 @app.route('/status', methods=['GET'])
 def status():
     """Endpoint to check the status of the application."""
-    return jsonify({'status': 'running'}), 200
+    model_status = model_registry.get_status()
+    if not model_status["ready"]:
+        return jsonify({'status': 'warming_up', 'model': model_status}), 503
+    return jsonify({'status': 'running', 'model': model_status}), 200
 
 @app.route("/api/upload", methods=["POST"])
 def upload():
+    return queue_file_source("ingest", "file upload")
+
+@app.route("/api/reindex", methods=["POST"])
+def reindex():
+    """Re-index a source that changed: same body as /api/upload, only changed chunks are written."""
+    return queue_file_source("reindex", "re-index")
+
+def queue_file_source(kind, label):
     try:
         source = file_source_factory(request)
-        file_bytes, filename, source_link = source.load()
-        file_processer = FileProcesser()
-        result = file_processer.process(file_bytes, source_link)
-        if not result:
-            raise Exception("File processing failed")
+        filename = None
+        if isinstance(source, UploadedFileSource):
+            # The uploaded stream is only readable while the request is open
+            filename = source.file.filename
+            source = source.spool()
+        try:
+            job = ingest_queue.submit(source, filename=filename, kind=kind)
+        except QueueFullError:
+            if isinstance(source, TempFileSource):
+                source.cleanup()
+            raise
         return jsonify({
-            "status": "file uploaded successfully",
-            "data": result
-        }), 200
+            "status": f"{label} queued",
+            "data": {
+                "job_id": job.job_id,
+                "status_url": f"/api/jobs/{job.job_id}"
+            }
+        }), 202
+
+    except QueueFullError as e:
+        logger.warning(f"{label.capitalize()} rejected: {e}")
+        response = jsonify({
+            "status": "error",
+            "message": str(e)
+        })
+        response.headers["Retry-After"] = "30"
+        return response, 429
 
     except Exception as e:
-        logger.error(f"File upload failed: {e}", exc_info=True)
+        logger.error(f"{label.capitalize()} failed: {e}", exc_info=True)
         return jsonify({
             "status": "error",
             "message": str(e)
         }), 400
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = ingest_queue.get_job(job_id)
+    if not job:
+        return jsonify({
+            "status": "error",
+            "message": f"Job '{job_id}' not found"
+        }), 404
+    return jsonify({
+        "status": "success",
+        "data": job.to_dict()
+    }), 200
+
+@app.route('/api/jobs', methods=['GET'])
+def jobs_stats():
+    return jsonify({
+        "status": "success",
+        "data": ingest_queue.get_stats()
+    }), 200
     
 @app.route('/api/query', methods=['POST'])
 def query():
@@ -58,14 +169,53 @@ def query():
         query_text = query_json.get('q', None)
         filters = query_json.get('filters', {})
         do_hybrid_search = query_json.get('hybrid', True)
-        if not query_text:
+        try:
+            topk = int_param(query_json, 'topk', 5)
+        except ValueError as e:
+            return jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400
+        cursor = query_json.get('cursor', None)
+        if not query_text and not cursor:
             return jsonify({
                 "status": "error",
                 "message": "Query parameter 'q' is required"
             }), 400
         query_service = QueryService()
 
-        results = query_service.query(query_text, query_filters=filters, do_hybrid_search=do_hybrid_search)
+        if cursor or 'page_size' in query_json:
+            try:
+                page = query_service.query_page(query_text, query_filters=filters, do_hybrid_search=do_hybrid_search,
+                                                page_size=int_param(query_json, 'page_size', topk), cursor=cursor)
+            except CursorExpiredError as e:
+                return jsonify({
+                    "status": "error",
+                    "message": str(e)
+                }), 410
+            except ValueError as e:
+                return jsonify({
+                    "status": "error",
+                    "message": str(e)
+                }), 400
+            return jsonify({
+                "status": "success",
+                "data": {
+                    "results": page["results"],
+                    "total": len(page["results"]),
+                    "next_cursor": page["next_cursor"]
+                }
+            }), 200
+
+        media_type = stream_media_type(query_json.get('stream', False), request.headers.get('Accept'))
+        if media_type:
+            events = query_service.query_stream(query_text, query_filters=filters,
+                                                do_hybrid_search=do_hybrid_search, topk=topk)
+            body = (format_stream_event(phase, results, media_type, app.json.dumps) for phase, results in events)
+            return flask.Response(flask.stream_with_context(body), mimetype=media_type,
+                                  headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        results = query_service.query(query_text, query_filters=filters, do_hybrid_search=do_hybrid_search, topk=topk)
 
         return jsonify({
             "status": "success",
@@ -81,6 +231,112 @@ def query():
         }), 500
 
 
+@app.route('/api/query/batch', methods=['POST'])
+def query_batch():
+    """Several queries with one model forward pass; results are returned in input order."""
+    try:
+        queries = parse_query_batch(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    try:
+        query_service = QueryService()
+
+        batch_results = query_service.query_batch(queries)
+
+        return jsonify({
+            "status": "success",
+            "data": {
+                "results": [{"results": results, "total": len(results)} for results in batch_results],
+                "total": len(batch_results)
+            }
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Stage and request latency histograms in the Prometheus text format."""
+    return flask.Response(stage_metrics.render_metrics(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit, miss and eviction counters for sizing the caches."""
+    return jsonify({
+        "status": "success",
+        "data": {
+            "query_embeddings": query_embedding_cache.get_stats(),
+            "results": result_cache.get_stats()
+        }
+    }), 200
+
+@app.route('/api/db/pool', methods=['GET'])
+def db_pool_stats():
+    """Utilization of the shared MongoDB connection pool."""
+    return jsonify({
+        "status": "success",
+        "data": get_pool_stats()
+    }), 200
+
+@app.route('/api/projects', methods=['GET'])
+def list_projects():
+    try:
+        projects = get_project_catalog().list_projects()
+        return jsonify({
+            "status": "success",
+            "data": {"projects": projects, "total": len(projects)}
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/projects', methods=['POST'])
+def upsert_project():
+    try:
+        project_json = request.json or {}
+        missing = [key for key in ("project_id", "name", "description") if not project_json.get(key)]
+        if missing:
+            return jsonify({
+                "status": "error",
+                "message": f"Missing required fields: {', '.join(missing)}"
+            }), 400
+        project = get_project_catalog().upsert_project(
+            project_json["project_id"], project_json["name"], project_json["description"]
+        )
+        return jsonify({
+            "status": "success",
+            "data": project
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/projects/<project_id>', methods=['DELETE'])
+def delete_project(project_id):
+    try:
+        if not get_project_catalog().delete_project(project_id):
+            return jsonify({
+                "status": "error",
+                "message": f"Project '{project_id}' not found"
+            }), 404
+        return jsonify({"status": "success"}), 200
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
 @app.route('/app', methods=['GET'])
 def index():
     return render_template("index.html")
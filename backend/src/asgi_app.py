@@ -0,0 +1,310 @@
+"""
+Async (ASGI) serving mode with the same /api/query and /api/upload contract as app_controller
+
+Searches await MongoDB through Motor and remote uploads are downloaded with
+httpx, so one process serves many concurrent I/O-bound requests on a single
+event loop. Query encoding runs in a dedicated executor; ingestion still
+happens on the background IngestQueue workers.
+
+Ingest jobs live in the memory of the process that accepted the upload, so
+run a single uvicorn worker; with several, /api/jobs polls land on
+processes that do not know the job.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import date
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse as StarletteJSONResponse, Response, StreamingResponse
+from werkzeug.http import http_date
+from starlette.routing import Route
+
+from services.cache.search_cursors import CursorExpiredError
+from services.file_upload.async_file_source import async_file_source_factory
+from services.file_upload.file_processer import FileProcesser
+from services.file_upload.file_upload_handler import TempFileSource
+from services.jobs.ingest_queue import IngestQueue, QueueFullError
+from services.metrics import stage_metrics
+from services.models.model_registry import model_registry
+from services.searcher.async_query_service import AsyncQueryService
+from services.searcher.query_service import (
+    NDJSON_MEDIA_TYPE, SSE_MEDIA_TYPE, QueryService, format_stream_event, int_param, parse_query_batch,
+    stream_media_type
+)
+from services.db_handler.async_mongodb_handler import close_async_clients
+
+logger = logging.getLogger(__name__)
+
+STREAM_MEDIA_TYPES = (NDJSON_MEDIA_TYPE, SSE_MEDIA_TYPE)
+
+ingest_queue = IngestQueue(FileProcesser)
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return http_date(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> str:
+    """Serialize like Flask's jsonify (dates as HTTP dates), so both serving modes return the same bodies."""
+    return json.dumps(content, default=_json_default, separators=(",", ":"), sort_keys=True)
+
+
+class JSONResponse(StarletteJSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content).encode("utf-8")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Warm up off the loop so /status answers while the model loads. A daemon thread
+    # rather than the loop's executor, since it retries until it works and must not hold up shutdown
+    threading.Thread(target=model_registry.warmup_until_ready, name="model-warmup", daemon=True).start()
+    app.state.http_client = httpx.AsyncClient(timeout=httpx.Timeout(30.0, read=300.0))
+    app.state.query_service = None
+    app.state.query_service_lock = asyncio.Lock()
+    try:
+        yield
+    finally:
+        await app.state.http_client.aclose()
+        close_async_clients()
+
+
+async def get_query_service(app) -> AsyncQueryService:
+    """Build the query service once; the sync parts connect, so that happens in a thread."""
+    if app.state.query_service is None:
+        async with app.state.query_service_lock:
+            if app.state.query_service is None:
+                query_service = await asyncio.to_thread(QueryService)
+                app.state.query_service = AsyncQueryService(query_service)
+    return app.state.query_service
+
+
+async def status(request: Request):
+    model_status = model_registry.get_status()
+    if not model_status["ready"]:
+        return JSONResponse({'status': 'warming_up', 'model': model_status}, status_code=503)
+    return JSONResponse({'status': 'running', 'model': model_status}, status_code=200)
+
+
+async def query(request: Request):
+    try:
+        query_json = await request.json()
+        query_text = query_json.get('q', None)
+        filters = query_json.get('filters', {})
+        do_hybrid_search = query_json.get('hybrid', True)
+        try:
+            topk = int_param(query_json, 'topk', 5)
+        except ValueError as e:
+            return JSONResponse({
+                "status": "error",
+                "message": str(e)
+            }, status_code=400)
+        cursor = query_json.get('cursor', None)
+        if not query_text and not cursor:
+            return JSONResponse({
+                "status": "error",
+                "message": "Query parameter 'q' is required"
+            }, status_code=400)
+        query_service = await get_query_service(request.app)
+
+        if cursor or 'page_size' in query_json:
+            try:
+                page = await query_service.query_page(query_text, query_filters=filters,
+                                                      do_hybrid_search=do_hybrid_search,
+                                                      page_size=int_param(query_json, 'page_size', topk), cursor=cursor)
+            except CursorExpiredError as e:
+                return JSONResponse({
+                    "status": "error",
+                    "message": str(e)
+                }, status_code=410)
+            except ValueError as e:
+                return JSONResponse({
+                    "status": "error",
+                    "message": str(e)
+                }, status_code=400)
+            return JSONResponse({
+                "status": "success",
+                "data": {
+                    "results": page["results"],
+                    "total": len(page["results"]),
+                    "next_cursor": page["next_cursor"]
+                }
+            }, status_code=200)
+
+        media_type = stream_media_type(query_json.get('stream', False), request.headers.get('accept'))
+        if media_type:
+            events = query_service.query_stream(query_text, query_filters=filters,
+                                                do_hybrid_search=do_hybrid_search, topk=topk)
+            body = (format_stream_event(phase, results, media_type, dumps) async for phase, results in events)
+            return StreamingResponse(body, media_type=media_type,
+                                     headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        results = await query_service.query(query_text, query_filters=filters, do_hybrid_search=do_hybrid_search,
+                                            topk=topk)
+
+        return JSONResponse({
+            "status": "success",
+            "data": {
+                "results": results if results else [],
+                "total": len(results) if results else 0
+            }
+        }, status_code=200)
+    except Exception as e:
+        return JSONResponse({
+            "status": "error",
+            "message": str(e)
+        }, status_code=500)
+
+
+async def query_batch(request: Request):
+    try:
+        queries = parse_query_batch(await request.json())
+    except ValueError as e:
+        return JSONResponse({
+            "status": "error",
+            "message": str(e)
+        }, status_code=400)
+    try:
+        query_service = await get_query_service(request.app)
+
+        batch_results = await query_service.query_batch(queries)
+
+        return JSONResponse({
+            "status": "success",
+            "data": {
+                "results": [{"results": results, "total": len(results)} for results in batch_results],
+                "total": len(batch_results)
+            }
+        }, status_code=200)
+    except Exception as e:
+        return JSONResponse({
+            "status": "error",
+            "message": str(e)
+        }, status_code=500)
+
+
+async def upload(request: Request):
+    return await queue_file_source(request, "ingest", "file upload")
+
+
+async def reindex(request: Request):
+    return await queue_file_source(request, "reindex", "re-index")
+
+
+async def queue_file_source(request: Request, kind: str, label: str):
+    try:
+        source, filename = await async_file_source_factory(request, request.app.state.http_client)
+        try:
+            job = ingest_queue.submit(source, filename=filename, kind=kind)
+        except QueueFullError:
+            if isinstance(source, TempFileSource):
+                source.cleanup()
+            raise
+        return JSONResponse({
+            "status": f"{label} queued",
+            "data": {
+                "job_id": job.job_id,
+                "status_url": f"/api/jobs/{job.job_id}"
+            }
+        }, status_code=202)
+
+    except QueueFullError as e:
+        logger.warning(f"{label.capitalize()} rejected: {e}")
+        return JSONResponse({
+            "status": "error",
+            "message": str(e)
+        }, status_code=429, headers={"Retry-After": "30"})
+
+    except Exception as e:
+        logger.error(f"{label.capitalize()} failed: {e}", exc_info=True)
+        return JSONResponse({
+            "status": "error",
+            "message": str(e)
+        }, status_code=400)
+
+
+async def job_status(request: Request):
+    job_id = request.path_params["job_id"]
+    job = ingest_queue.get_job(job_id)
+    if not job:
+        return JSONResponse({
+            "status": "error",
+            "message": f"Job '{job_id}' not found"
+        }, status_code=404)
+    return JSONResponse({"status": "success", "data": job.to_dict()}, status_code=200)
+
+
+async def jobs_stats(request: Request):
+    return JSONResponse({"status": "success", "data": ingest_queue.get_stats()}, status_code=200)
+
+
+async def metrics(request: Request):
+    return Response(stage_metrics.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+async def record_request_timing(request: Request, call_next):
+    """Record request latency and report the stages of this request in Server-Timing."""
+    started = time.perf_counter()
+    stage_metrics.begin_request()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    route = route.path if route is not None else "unmatched"
+    labels = (request.method, route, str(response.status_code))
+    if response.headers.get("content-type", "").split(";")[0] in STREAM_MEDIA_TYPES:
+        # Streamed results are sent after this returns, so time them when the
+        # body ends; the headers are already out, so there is no Server-Timing
+        body = response.body_iterator
+
+        async def timed_body():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                stage_metrics.end_request()
+                if stage_metrics.METRICS_ENABLED:
+                    stage_metrics.request_duration.observe(labels, time.perf_counter() - started)
+
+        response.body_iterator = timed_body()
+        return response
+    stages = stage_metrics.end_request()
+    if stage_metrics.METRICS_ENABLED:
+        elapsed = time.perf_counter() - started
+        stage_metrics.request_duration.observe(labels, elapsed)
+        response.headers["Server-Timing"] = stage_metrics.server_timing_header(stages, total=elapsed)
+    return response
+
+
+app = Starlette(
+    routes=[
+        Route('/status', status, methods=['GET']),
+        Route('/api/query', query, methods=['POST']),
+        Route('/api/query/batch', query_batch, methods=['POST']),
+        Route('/api/upload', upload, methods=['POST']),
+        Route('/api/reindex', reindex, methods=['POST']),
+        Route('/api/jobs/{job_id}', job_status, methods=['GET']),
+        Route('/api/jobs', jobs_stats, methods=['GET']),
+        Route('/metrics', metrics, methods=['GET']),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware,
+                   allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
+                   allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+                   allow_headers=["Content-Type", "Authorization"],
+                   allow_credentials=True),
+        Middleware(BaseHTTPMiddleware, dispatch=record_request_timing),
+    ],
+    lifespan=lifespan,
+)
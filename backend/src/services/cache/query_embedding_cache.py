@@ -0,0 +1,75 @@
+"""
+Process-wide cache of query embeddings
+"""
+import os
+from typing import Callable, List, Sequence
+
+import numpy as np
+
+from services.cache.lru_cache import LRUCache
+
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "10000"))
+QUERY_EMBEDDING_CACHE_MAX_MB = float(os.getenv("QUERY_EMBEDDING_CACHE_MAX_MB", "64"))
+QUERY_EMBEDDING_CACHE_TTL = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "0"))
+
+
+def normalize_query(query_text: str) -> str:
+    """Collapse whitespace and case so trivially different queries share an entry."""
+    return " ".join(query_text.lower().split())
+
+
+class QueryEmbeddingCache:
+    """LRU cache of query embeddings keyed by (model name, normalized query)."""
+
+    def __init__(self, max_entries: int = QUERY_EMBEDDING_CACHE_SIZE,
+                 max_mb: float = QUERY_EMBEDDING_CACHE_MAX_MB,
+                 ttl_seconds: float = QUERY_EMBEDDING_CACHE_TTL):
+        self._cache = LRUCache(
+            max_entries=max_entries,
+            max_bytes=int(max_mb * 1024 * 1024) if max_mb else None,
+            ttl_seconds=ttl_seconds,
+        )
+
+    def get_or_compute(self, model_name: str, query_text: str, compute: Callable[[str], np.ndarray]) -> np.ndarray:
+        """Return the cached embedding, calling compute(query_text) on a miss."""
+        key = (model_name, normalize_query(query_text))
+        embedding = self._cache.get(key)
+        if embedding is None:
+            embedding = np.asarray(compute(query_text), dtype=np.float32)
+            # Shared between requests, so callers must not modify it in place
+            embedding.setflags(write=False)
+            self._cache.set(key, embedding, size=embedding.nbytes + len(key[1]))
+        return embedding
+
+    def get_or_compute_many(self, model_name: str, query_texts: Sequence[str],
+                            compute: Callable[[List[str]], np.ndarray]) -> List[np.ndarray]:
+        """Return an embedding per query, calling compute once with all the distinct misses."""
+        keys = [(model_name, normalize_query(text)) for text in query_texts]
+        found = {}
+        missing = {}
+        for key, text in zip(keys, query_texts):
+            if key in found or key in missing:
+                continue
+            embedding = self._cache.get(key)
+            if embedding is None:
+                missing[key] = text
+            else:
+                found[key] = embedding
+        if missing:
+            embeddings = np.asarray(compute(list(missing.values())), dtype=np.float32)
+            for key, embedding in zip(missing, embeddings):
+                embedding = embedding.copy()
+                embedding.setflags(write=False)
+                self._cache.set(key, embedding, size=embedding.nbytes + len(key[1]))
+                found[key] = embedding
+        return [found[key] for key in keys]
+
+    def clear(self):
+        self._cache.clear()
+
+    def get_stats(self):
+        return self._cache.get_stats()
+
+
+# Global cache instance
+query_embedding_cache = QueryEmbeddingCache()
@@ -0,0 +1,274 @@
+"""
+Search result cache invalidated by a corpus generation counter
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument
+
+from services.cache.lru_cache import LRUCache
+from services.cache.query_embedding_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")
+RESULT_CACHE_URL = os.getenv("RESULT_CACHE_URL", "redis://localhost:6379/0")
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "5000"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+# Where the in-memory backend keeps the corpus generation: "mongodb" (shared by every process) | "process"
+RESULT_CACHE_GENERATION = os.getenv("RESULT_CACHE_GENERATION", "mongodb")
+
+
+class CacheBackend:
+    """Storage used by ResultCache. Keys are strings; values are any picklable object."""
+
+    # True when calls do network I/O, so async callers move them off the event loop
+    remote = False
+
+    def get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any):
+        raise NotImplementedError
+
+    def get_generation(self) -> int:
+        raise NotImplementedError
+
+    def bump_generation(self) -> int:
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class DictCacheBackend(CacheBackend):
+    """Unbounded dict with no expiry, a deterministic stand-in for tests."""
+
+    def __init__(self):
+        self.entries: Dict[str, Any] = {}
+        self.generation = 0
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value):
+        self.entries[key] = value
+
+    def get_generation(self):
+        return self.generation
+
+    def bump_generation(self):
+        self.generation += 1
+        return self.generation
+
+    def clear(self):
+        self.entries.clear()
+
+    def get_stats(self):
+        return {"entries": len(self.entries), "generation": self.generation}
+
+
+class MongoGenerationCounter:
+    """
+    Corpus generation kept in a counter document in MongoDB.
+
+    Every process that writes the corpus (app workers, bulk_ingest.py,
+    migrate_embeddings.py) bumps the same document, so each worker's
+    in-memory cache sees every write.
+    """
+
+    KEY = "result_cache_generation"
+
+    def __init__(self, config=None):
+        self.config = config
+        self._collection = None
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            # Imported here: the handler module imports this one to invalidate the cache
+            from services.db_handler.config import mongodb_config
+            from services.db_handler.mongodb_handler import get_mongo_client
+            config = self.config or mongodb_config
+            self._collection = get_mongo_client(config)[config.database_name][config.counters_collection_name]
+        return self._collection
+
+    def get(self) -> int:
+        doc = self.collection.find_one({"_id": self.KEY})
+        return int(doc["value"]) if doc else 0
+
+    def bump(self) -> int:
+        doc = self.collection.find_one_and_update(
+            {"_id": self.KEY}, {"$inc": {"value": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return int(doc["value"])
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Per-process LRU backend.
+
+    Entries are local to the process. The generation is read from MongoDB by
+    default, so writes from any process invalidate every worker's entries;
+    with generation="process" it is a local counter, which is only correct
+    when a single process both writes and queries the corpus.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, ttl_seconds: float = RESULT_CACHE_TTL,
+                 generation: str = RESULT_CACHE_GENERATION):
+        self._cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._counter = MongoGenerationCounter() if generation == "mongodb" else None
+        # Reading a shared generation is a network round trip
+        self.remote = self._counter is not None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value, size=1)
+
+    def get_generation(self):
+        if self._counter is not None:
+            return self._counter.get()
+        return self._generation
+
+    def bump_generation(self):
+        if self._counter is not None:
+            return self._counter.bump()
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+    def clear(self):
+        self._cache.clear()
+
+    def get_stats(self):
+        try:
+            generation = self.get_generation()
+        except Exception as e:
+            logger.warning(f"Result cache generation unavailable: {e}")
+            generation = None
+        return {**self._cache.get_stats(), "generation": generation}
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared backend so every worker sees the same entries and generation."""
+
+    GENERATION_KEY = "search_app:results:generation"
+    remote = True
+
+    def __init__(self, url: str = RESULT_CACHE_URL, ttl_seconds: float = RESULT_CACHE_TTL):
+        import redis  # optional dependency, only needed for this backend
+        self._client = redis.Redis.from_url(url)
+        self.ttl_seconds = int(ttl_seconds) or None
+
+    def get(self, key):
+        payload = self._client.get(key)
+        return pickle.loads(payload) if payload is not None else None
+
+    def set(self, key, value):
+        self._client.set(key, pickle.dumps(value), ex=self.ttl_seconds)
+
+    def get_generation(self):
+        return int(self._client.get(self.GENERATION_KEY) or 0)
+
+    def bump_generation(self):
+        return int(self._client.incr(self.GENERATION_KEY))
+
+    def clear(self):
+        # Entries of older generations are unreachable and expire by TTL
+        self.bump_generation()
+
+    def get_stats(self):
+        return {"generation": self.get_generation()}
+
+
+def create_cache_backend(name: str = RESULT_CACHE_BACKEND, max_entries: int = RESULT_CACHE_SIZE,
+                         ttl_seconds: float = RESULT_CACHE_TTL) -> CacheBackend:
+    if name == "redis":
+        try:
+            return RedisCacheBackend(ttl_seconds=ttl_seconds)
+        except ImportError:
+            logger.warning("redis is not installed, falling back to the in-memory result cache")
+    if name == "dict":
+        return DictCacheBackend()
+    return InMemoryCacheBackend(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+
+class ResultCache:
+    """
+    Caches formatted search results keyed by query parameters and corpus generation.
+
+    Every write to the corpus bumps the generation, which changes every key,
+    so results computed before a write are never served after it.
+    """
+
+    def __init__(self, backend: CacheBackend = None):
+        self.backend = backend or create_cache_backend()
+        self.hits = 0
+        self.misses = 0
+
+    def get_generation(self) -> int:
+        try:
+            return self.backend.get_generation()
+        except Exception as e:
+            logger.warning(f"Result cache generation unavailable: {e}")
+            return -1
+
+    def make_key(self, generation: int, query_text: str, filters: Optional[dict], hybrid: bool, topk: int,
+                 model_name: str = "") -> str:
+        params = json.dumps(
+            {"q": normalize_query(query_text), "filters": filters or {}, "hybrid": bool(hybrid), "topk": topk,
+             "model": model_name},
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha256(params.encode("utf-8")).hexdigest()
+        return f"search_app:results:{generation}:{digest}"
+
+    def get(self, key: str):
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Result cache get failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value):
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            logger.warning(f"Result cache set failed: {e}")
+
+    def invalidate(self):
+        """Mark every cached result stale after the corpus changed."""
+        try:
+            self.backend.bump_generation()
+        except Exception as e:
+            # Without a new generation old results could be served, so drop them outright
+            logger.error(f"Result cache invalidation failed, clearing cache: {e}")
+            try:
+                self.backend.clear()
+            except Exception as clear_e:
+                logger.error(f"Result cache clear failed: {clear_e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, **self.backend.get_stats()}
+
+
+# Global cache instance
+result_cache = ResultCache()
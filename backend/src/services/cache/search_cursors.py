@@ -0,0 +1,92 @@
+"""
+Server-side result windows behind opaque pagination cursors
+"""
+import base64
+import logging
+import os
+import secrets
+from typing import Optional, Tuple
+
+from services.cache.result_cache import RESULT_CACHE_BACKEND, CacheBackend, create_cache_backend
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CURSOR_TTL = float(os.getenv("SEARCH_CURSOR_TTL", "600"))
+SEARCH_CURSOR_CACHE_SIZE = int(os.getenv("SEARCH_CURSOR_CACHE_SIZE", "1000"))
+# Results fetched by the first page of a paginated query, capped by the handler's max_limit
+SEARCH_CURSOR_WINDOW = int(os.getenv("SEARCH_CURSOR_WINDOW", "100"))
+
+
+class CursorExpiredError(LookupError):
+    """The result window of a cursor expired or was evicted; the client must restart from the first page."""
+
+
+def encode_cursor(window_id: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{window_id}:{offset}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Raises:
+        ValueError: if cursor was not produced by encode_cursor
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        window_id, offset = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii").rsplit(":", 1)
+        offset = int(offset)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not window_id or offset < 0:
+        raise ValueError("Invalid cursor")
+    return window_id, offset
+
+
+class SearchCursorStore:
+    """
+    Keeps the formatted results of a paginated query for SEARCH_CURSOR_TTL seconds.
+
+    Uses the same storage backend as the result cache, so cursors work
+    across workers when that backend is shared (redis).
+    """
+
+    KEY_PREFIX = "search_app:cursors:"
+
+    def __init__(self, backend: CacheBackend = None):
+        self.backend = backend or create_cache_backend(
+            RESULT_CACHE_BACKEND, max_entries=SEARCH_CURSOR_CACHE_SIZE, ttl_seconds=SEARCH_CURSOR_TTL
+        )
+
+    def save(self, results: list) -> Optional[str]:
+        """Store a result window, returning its id, or None if it could not be stored."""
+        window_id = secrets.token_urlsafe(16)
+        try:
+            self.backend.set(self.KEY_PREFIX + window_id, results)
+        except Exception as e:
+            logger.warning(f"Search cursor save failed: {e}")
+            return None
+        return window_id
+
+    def load(self, window_id: str) -> list:
+        """
+        Raises:
+            CursorExpiredError: if the window is no longer stored
+        """
+        try:
+            results = self.backend.get(self.KEY_PREFIX + window_id)
+        except Exception as e:
+            logger.warning(f"Search cursor load failed: {e}")
+            results = None
+        if results is None:
+            raise CursorExpiredError("Cursor expired, run the query again")
+        return results
+
+
+def paginate(results: list, window_id: Optional[str], offset: int, page_size: int) -> dict:
+    """One page of a stored window: the results and the cursor of the next page, None on the last page."""
+    end = offset + page_size
+    next_cursor = encode_cursor(window_id, end) if window_id and end < len(results) else None
+    return {"results": results[offset:end], "next_cursor": next_cursor}
+
+
+# Global store instance
+search_cursor_store = SearchCursorStore()
@@ -0,0 +1,103 @@
+"""
+Compiled multi-keyword matcher used by the rule-based classifiers
+"""
+import json
+import re
+import threading
+from typing import Dict, List, Set
+
+_WORD_CHAR = re.compile(r"\w")
+
+
+def _normalize_keyword(keyword: str) -> str:
+    return " ".join(keyword.lower().split())
+
+
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    """Turn a character trie into a regex that shares common prefixes."""
+    is_end = "" in node
+    branches = []
+    for char in sorted(key for key in node if key):
+        char_pattern = r"\s+" if char == " " else re.escape(char)
+        branches.append(char_pattern + _trie_pattern(node[char]))
+
+    if not branches:
+        return ""
+    if len(branches) == 1 and not is_end:
+        return branches[0]
+    pattern = "(?:" + "|".join(branches) + ")"
+    # Greedy so the longest keyword at a position is matched; the regex engine backtracks
+    # to shorter keywords when the longer one is not followed by a word boundary
+    return pattern + "?" if is_end else pattern
+
+
+class KeywordMatcher:
+    """
+    Finds every keyword of every label in one pass over the text.
+
+    Keywords are compiled into a single prefix-shared alternation anchored on
+    word boundaries, so "ad" does not match inside "download" and the cost of a
+    scan grows with the text length rather than with the number of keywords.
+    Overlapping keywords all count: the pattern is a lookahead tried at every
+    word start, and keywords that are prefixes of a match are read from it, so
+    "data pipeline" also finds "data" and "pipeline".
+    """
+
+    def __init__(self, keyword_table: Dict[str, List[str]]):
+        self.keyword_table = keyword_table
+        self._labels_by_keyword: Dict[str, Set[str]] = {}
+        for label, keywords in keyword_table.items():
+            for keyword in keywords:
+                normalized = _normalize_keyword(keyword)
+                if normalized:
+                    self._labels_by_keyword.setdefault(normalized, set()).add(label)
+        self._pattern = self._compile(self._labels_by_keyword.keys())
+
+    def _compile(self, keywords) -> re.Pattern:
+        trie: Dict[str, dict] = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        if not trie:
+            return None
+        # Zero-width, so a match does not consume the keywords that overlap it
+        return re.compile(r"(?<!\w)(?=(" + _trie_pattern(trie) + r")(?!\w))", re.IGNORECASE)
+
+    def find(self, text: str) -> Dict[str, Set[str]]:
+        """Map each label to the distinct keywords found in text."""
+        matches: Dict[str, Set[str]] = {}
+        if not text or self._pattern is None:
+            return matches
+        for match in self._pattern.finditer(text):
+            longest = _normalize_keyword(match.group(1))
+            for end in range(1, len(longest) + 1):
+                # Shorter keywords starting here end where the text has no word character next
+                if end < len(longest) and _WORD_CHAR.match(longest[end]):
+                    continue
+                keyword = longest[:end]
+                for label in self._labels_by_keyword.get(keyword, ()):
+                    matches.setdefault(label, set()).add(keyword)
+        return matches
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Number of distinct keywords found per label, for labels with at least one hit."""
+        return {label: len(keywords) for label, keywords in self.find(text).items()}
+
+
+_matchers: Dict[str, KeywordMatcher] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_keyword_matcher(keyword_table: Dict[str, List[str]]) -> KeywordMatcher:
+    """Return a compiled matcher for keyword_table, compiling it once per process."""
+    key = json.dumps(keyword_table, sort_keys=True)
+    matcher = _matchers.get(key)
+    if matcher is None:
+        with _matchers_lock:
+            matcher = _matchers.get(key)
+            if matcher is None:
+                matcher = KeywordMatcher(keyword_table)
+                _matchers[key] = matcher
+    return matcher
@@ -0,0 +1,104 @@
+"""
+Precomputed label embedding matrices shared by the classifiers
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LABEL_CACHE_DIR = os.path.expanduser(
+    os.getenv("LABEL_EMBEDDING_CACHE_DIR", "~/.cache/search_app/label_embeddings")
+)
+
+# In-process copies so repeated classifier construction never re-encodes labels
+_matrix_cache: Dict[str, np.ndarray] = {}
+_matrix_lock = threading.Lock()
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so dot products are cosine similarities."""
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class LabelEmbeddings:
+    """Normalized embedding matrix for a fixed set of label descriptions."""
+
+    def __init__(self, embedding_model, descriptions: Dict[str, str], cache_dir: str = LABEL_CACHE_DIR):
+        self.embedding_model = embedding_model
+        self.labels = np.array(list(descriptions.keys()), dtype=object)
+        self.descriptions = list(descriptions.values())
+        self.cache_dir = cache_dir
+        self.cache_key = self._cache_key()
+        self.matrix = self._load_or_build()
+
+    def _cache_key(self) -> str:
+        model_name = getattr(self.embedding_model, "model_name", "unknown")
+        payload = json.dumps([list(self.labels), self.descriptions], sort_keys=True)
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+        safe_model = model_name.replace("/", "__")
+        return f"{safe_model}-{digest}"
+
+    def _cache_path(self) -> str:
+        return os.path.join(self.cache_dir, f"{self.cache_key}.npy")
+
+    def _load_or_build(self) -> np.ndarray:
+        matrix = _matrix_cache.get(self.cache_key)
+        if matrix is not None:
+            return matrix
+
+        with _matrix_lock:
+            matrix = _matrix_cache.get(self.cache_key)
+            if matrix is None:
+                matrix = self._load_from_disk()
+            if matrix is None:
+                matrix = normalize_rows(self.embedding_model.encode(self.descriptions, convert_to_tensor=False))
+                self._save_to_disk(matrix)
+            _matrix_cache[self.cache_key] = matrix
+        return matrix
+
+    def _load_from_disk(self):
+        path = self._cache_path()
+        if not os.path.exists(path):
+            return None
+        try:
+            matrix = np.load(path)
+            if matrix.shape[0] != len(self.labels):
+                return None
+            return matrix
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable label cache {path}: {e}")
+            return None
+
+    def _save_to_disk(self, matrix: np.ndarray):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._cache_path() + f".{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, matrix)
+            os.replace(tmp_path, self._cache_path())
+        except Exception as e:
+            logger.warning(f"Could not write label cache: {e}")
+
+    def classify(self, embeddings) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Assign the closest label to each embedding.
+
+        Args:
+            embeddings: (n, dim) array of vectors, or a single (dim,) vector
+
+        Returns:
+            Tuple of (labels, scores) arrays of length n
+        """
+        vectors = normalize_rows(embeddings)
+        similarities = vectors @ self.matrix.T
+        best = similarities.argmax(axis=1)
+        scores = similarities[np.arange(len(best)), best]
+        return self.labels[best], scores
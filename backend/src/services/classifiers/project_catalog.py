@@ -0,0 +1,218 @@
+"""
+Project catalog stored in MongoDB with an in-memory embedding matrix
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pymongo import ASCENDING
+
+from services.db_handler.change_feed import ChangeFeed
+from services.db_handler.mongodb_handler import MongoDBHandler
+from services.models.model_registry import get_embedding_model
+from services.classifiers.label_embeddings import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+PROJECT_CATALOG_REFRESH_SECONDS = float(os.getenv("PROJECT_CATALOG_REFRESH_SECONDS", "30"))
+
+
+class ProjectCatalog:
+    """
+    Project catalog backed by the projects collection.
+
+    Embeddings are computed once when a project is created or updated and
+    stored on the project document. The catalog keeps a normalized matrix of
+    all active projects in memory and pulls changes incrementally by
+    ``updated_at``, so new, edited and deleted projects show up without a
+    restart.
+    """
+
+    def __init__(self, embedding_model, db_handler: MongoDBHandler = None,
+                 refresh_interval: float = PROJECT_CATALOG_REFRESH_SECONDS):
+        self.embedding_model = embedding_model
+        self.db_handler = db_handler or MongoDBHandler()
+        self.refresh_interval = refresh_interval
+        self._collection = self.db_handler.get_collection(self.db_handler.config.projects_collection_name)
+        self._lock = threading.Lock()
+        # (project_ids, names, rows, matrix), replaced as a whole on every sync
+        self._state = ([], [], {}, np.empty((0, 0), dtype=np.float32))
+        self._feed = ChangeFeed(
+            self._collection,
+            projection={"project_id": 1, "name": 1, "description": 1, "embedding": 1,
+                        "embedding_model": 1, "deleted": 1, "updated_at": 1},
+        )
+        self._last_refresh = 0.0
+        self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        try:
+            self._collection.create_index([("project_id", ASCENDING)], unique=True, background=True)
+            self._collection.create_index([("updated_at", ASCENDING)], background=True)
+        except Exception as e:
+            logger.warning(f"Failed to create project catalog indexes: {e}")
+
+    def upsert_project(self, project_id: str, name: str, description: str) -> Dict[str, Any]:
+        """Create or update a project and store its embedding."""
+        embedding = self._embed([description])[0]
+        now = datetime.utcnow()
+        self._collection.update_one(
+            {"project_id": project_id},
+            {
+                "$set": {
+                    "name": name,
+                    "description": description,
+                    "embedding": embedding.tolist(),
+                    "embedding_model": self._model_name(),
+                    "deleted": False,
+                    "updated_at": now,
+                },
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True,
+        )
+        logger.info(f"Project {project_id} stored in catalog")
+        return {"project_id": project_id, "name": name, "description": description}
+
+    def delete_project(self, project_id: str) -> bool:
+        """Mark a project deleted so incremental syncs drop it from the matrix."""
+        result = self._collection.update_one(
+            {"project_id": project_id, "deleted": {"$ne": True}},
+            {"$set": {"deleted": True, "updated_at": datetime.utcnow()}},
+        )
+        return result.modified_count > 0
+
+    def list_projects(self) -> List[Dict[str, Any]]:
+        return list(self._collection.find(
+            {"deleted": {"$ne": True}},
+            {"_id": 0, "project_id": 1, "name": 1, "description": 1, "updated_at": 1},
+        ))
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Apply catalog changes made since the last sync.
+
+        Returns:
+            Number of changed projects applied to the in-memory matrix
+        """
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return 0
+
+        with self._lock:
+            if not force and now - self._last_refresh < self.refresh_interval:
+                return 0
+
+            changed = list(self._feed.changes())
+            self._last_refresh = now
+            if not changed:
+                return 0
+
+            self._backfill_embeddings(changed)
+            self._apply_changes(changed)
+            logger.info(f"Project catalog synced {len(changed)} changes, {len(self)} active projects")
+            return len(changed)
+
+    def _backfill_embeddings(self, projects: List[Dict[str, Any]]):
+        """Embed projects that were written without an embedding or with another model."""
+        model_name = self._model_name()
+        missing = [
+            p for p in projects
+            if not p.get("deleted") and (not p.get("embedding") or p.get("embedding_model") != model_name)
+        ]
+        if not missing:
+            return
+        embeddings = self._embed([p.get("description") or p.get("name", "") for p in missing])
+        for project, embedding in zip(missing, embeddings):
+            project["embedding"] = embedding.tolist()
+            self._collection.update_one(
+                {"_id": project["_id"]},
+                {"$set": {"embedding": project["embedding"], "embedding_model": model_name}},
+            )
+
+    def _apply_changes(self, projects: List[Dict[str, Any]]):
+        current_ids, current_names, current_rows, current_matrix = self._state
+        project_ids = list(current_ids)
+        names = list(current_names)
+        rows = dict(current_rows)
+        vectors = list(current_matrix) if len(current_matrix) else []
+
+        for project in projects:
+            project_id = project["project_id"]
+            row = rows.get(project_id)
+            if project.get("deleted"):
+                if row is None:
+                    continue
+                # Swap-remove keeps the matrix dense
+                last = len(project_ids) - 1
+                if row != last:
+                    project_ids[row], names[row], vectors[row] = project_ids[last], names[last], vectors[last]
+                    rows[project_ids[row]] = row
+                project_ids.pop()
+                names.pop()
+                vectors.pop()
+                del rows[project_id]
+                continue
+
+            vector = normalize_rows(project["embedding"])[0]
+            if row is None:
+                rows[project_id] = len(project_ids)
+                project_ids.append(project_id)
+                names.append(project.get("name", project_id))
+                vectors.append(vector)
+            else:
+                names[row] = project.get("name", project_id)
+                vectors[row] = vector
+
+        matrix = np.vstack(vectors).astype(np.float32) if vectors else np.empty((0, 0), dtype=np.float32)
+        # Swap in the new state in one step so readers never see a partial update
+        self._state = (project_ids, names, rows, matrix)
+
+    def nearest(self, embedding, k: int = 1) -> List[Tuple[str, str, float]]:
+        """
+        Find the k projects closest to an embedding.
+
+        Returns:
+            List of (project_id, name, score) sorted by descending score
+        """
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"Project catalog refresh failed: {e}")
+
+        project_ids, names, _, matrix = self._state
+        if not len(matrix):
+            return []
+
+        scores = matrix @ normalize_rows(embedding)[0]
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(project_ids[i], names[i], float(scores[i])) for i in top]
+
+    def __len__(self):
+        return len(self._state[0])
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.embedding_model.encode(texts, convert_to_tensor=False), dtype=np.float32)
+
+    def _model_name(self) -> str:
+        return getattr(self.embedding_model, "model_name", "unknown")
+
+
+_catalog: Optional[ProjectCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_project_catalog(embedding_model=None, db_handler: MongoDBHandler = None) -> ProjectCatalog:
+    """Return the process-wide project catalog, creating it on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = ProjectCatalog(embedding_model or get_embedding_model(), db_handler)
+    return _catalog
@@ -1,11 +1,13 @@
-
 from services.models.embedding_model import EmbeddingModel
+from services.models.model_registry import get_embedding_model
+from services.classifiers.project_catalog import ProjectCatalog, get_project_catalog
+import logging
+
+logger = logging.getLogger(__name__)
 
 
-def get_all_project_embeddings():
-    # Placeholder function to retrieve all project embeddings
-    # In a real implementation, this would fetch data from a database or other storage
-    SAMPLE_PROJECTS = [
+# Starter entries for an empty catalog, see setup_project_catalog.py
+SAMPLE_PROJECTS = [
     {
         "project_id": "P001",
         "name": "Q4 Promo Campaign",
@@ -31,33 +33,34 @@ def get_all_project_embeddings():
         "name": "Summer Discount Drive",
         "description": "Seasonal summer sale with discounts, landing page refresh, banners, and promotional emails."
     }
-    ]
-    return SAMPLE_PROJECTS
+]
 
 
 
 class ProjectClassifier:
 
-    def __init__(self):
-        self.embedding_model = EmbeddingModel()
-
-    def categorize(self, text: str) -> dict:
-        projects = get_all_project_embeddings()
-        if not projects:
-            return {"project": "General", "score": 0.0}
-        doc_emb = self.embedding_model.encode(text, convert_to_tensor=True)
-        best = None
-        best_score = -1.0
-        for p in projects:
-            if not p.get("embedding"):
-                continue
-            p_emb = p["embedding"]
-            # convert to tensor via numpy
-            sim = self.embedding_model.compute_similarity(doc_emb, self.embedding_model.encode(p["description"], convert_to_tensor=True)).item() \
-                if p_emb is None else self.embedding_model.compute_similarity(doc_emb, p_emb).item()
-            # note: we stored embedding json but recomputing from description keeps it consistent; or you can decode p_emb to tensor
-            # Keep this straightforward: use project description similarity
-            if sim > best_score:
-                best_score = sim
-                best = p["name"]
-        return best or "General"
\ No newline at end of file
+    def __init__(self, embedding_model: EmbeddingModel = None, catalog: ProjectCatalog = None):
+        self.embedding_model = embedding_model or get_embedding_model()
+        self.catalog = catalog
+
+    def categorize(self, text: str, embedding=None) -> dict:
+        try:
+            catalog = self.catalog if self.catalog is not None else get_project_catalog(self.embedding_model)
+        except Exception as e:
+            logger.warning(f"Project catalog unavailable: {e}")
+            return "General"
+        if not len(catalog):
+            # Projects added since the catalog was loaded show up within its refresh interval
+            try:
+                catalog.refresh()
+            except Exception as e:
+                logger.warning(f"Project catalog refresh failed: {e}")
+                return "General"
+        if not len(catalog):
+            return "General"
+        doc_emb = embedding if embedding is not None else self.embedding_model.encode(text, convert_to_tensor=False)
+        matches = catalog.nearest(doc_emb, k=1)
+        if not matches:
+            return "General"
+        # return {"project": matches[0][1], "score": matches[0][2]}
+        return matches[0][1] or "General"
@@ -1,42 +1,59 @@
 
+import json
+import os
 from services.models.embedding_model import EmbeddingModel
+from services.models.model_registry import get_embedding_model
+from services.classifiers.label_embeddings import LabelEmbeddings
+from services.classifiers.keyword_matcher import get_keyword_matcher
+
+DEFAULT_TEAM_KEYWORDS = {
+    "Marketing": ["marketing", "campaign", "roas", "ctr", "ad", "ads", "performance marketing"],
+    "Design": ["design", "logo", "visual", "ux", "ui", "illustration"],
+    "Product": ["product", "roadmap", "feature", "specification", "spec", "release"],
+    "Sales": ["sales", "pitch", "deal", "quota", "pipeline"],
+    "Content": ["content", "copy", "blog", "script", "storyboard"],
+    "SEO": ["seo", "keyword", "backlink", "organic", "search"]
+}
+
+
+def load_team_keywords(path: str = None) -> dict:
+    """Load the team keyword table from a JSON file ({team: [keywords]}), or the defaults."""
+    path = path or os.getenv("TEAM_KEYWORDS_PATH")
+    if not path:
+        return DEFAULT_TEAM_KEYWORDS
+    with open(path) as f:
+        return json.load(f)
+
 
 class TeamClassifier:
 
-    def __init__(self):
-        self.embedding_model = EmbeddingModel()
-        self.TEAM_KEYWORDS = {
-            "Marketing": ["marketing", "campaign", "roas", "ctr", "ad", "ads", "performance marketing"],
-            "Design": ["design", "logo", "visual", "ux", "ui", "illustration"],
-            "Product": ["product", "roadmap", "feature", "specification", "spec", "release"],
-            "Sales": ["sales", "pitch", "deal", "quota", "pipeline"],
-            "Content": ["content", "copy", "blog", "script", "storyboard"],
-            "SEO": ["seo", "keyword", "backlink", "organic", "search"]
-        }
+    def __init__(self, embedding_model: EmbeddingModel = None, team_keywords: dict = None):
+        self.embedding_model = embedding_model or get_embedding_model()
+        self.TEAM_KEYWORDS = team_keywords or load_team_keywords()
+        self.keyword_matcher = get_keyword_matcher(self.TEAM_KEYWORDS)
+        team_descriptions = {team: " ".join(keys) for team, keys in self.TEAM_KEYWORDS.items()}
+        self.label_embeddings = LabelEmbeddings(self.embedding_model, team_descriptions)
         
 
-    def categorize(self, text: str) -> dict:
-        text_l = text.lower()
-        scores = {}
-        for team, keys in self.TEAM_KEYWORDS.items():
-            s = sum(1 for k in keys if k in text_l)
-            if s > 0:
-                scores[team] = s
+    def categorize(self, text: str, embedding=None) -> dict:
+        return self.categorize_hits(self.keyword_hits(text), text=text, embedding=embedding)
+
+    def keyword_hits(self, text: str) -> dict:
+        """Distinct keywords found per team, found in a single pass over the text.
+
+        Hits of several parts of one document can be merged by set union.
+        """
+        return self.keyword_matcher.find(text)
+
+    def categorize_hits(self, hits: dict, text: str = None, embedding=None):
+        scores = {team: len(keywords) for team, keywords in hits.items()}
         if scores:
             # choose team with highest rule hits
             best_team = max(scores.items(), key=lambda x: x[1])[0]
             # return {"team": best_team, "method": "rules", "score": float(scores[best_team])}
             return best_team
         # fallback: semantic similarity between team descriptions and doc
-        team_descriptions = {team: " ".join(keys) for team, keys in self.TEAM_KEYWORDS.items()}
-        doc_emb = self.embedding_model.encode(text, convert_to_tensor=True)
-        best = None
-        best_score = -1.0
-        for team, desc in team_descriptions.items():
-            emb = self.embedding_model.encode(desc, convert_to_tensor=True)
-            sim = self.embedding_model.compute_similarity(doc_emb, emb).item()
-            if sim > best_score:
-                best_score = sim
-                best = team
-        # return {"team": best, "method": "semantic_fallback", "score": float(best_score)}
-        return best
\ No newline at end of file
+        doc_emb = embedding if embedding is not None else self.embedding_model.encode(text, convert_to_tensor=False)
+        labels, label_scores = self.label_embeddings.classify(doc_emb)
+        # return {"team": labels[0], "method": "semantic_fallback", "score": float(label_scores[0])}
+        return labels[0]
@@ -1,9 +1,11 @@
 from services.models.embedding_model import EmbeddingModel
+from services.models.model_registry import get_embedding_model
+from services.classifiers.label_embeddings import LabelEmbeddings
 
 class TopicClassifier:
     
-    def __init__(self):
-        self.embedding_model = EmbeddingModel()
+    def __init__(self, embedding_model: EmbeddingModel = None):
+        self.embedding_model = embedding_model or get_embedding_model()
         self.TOPIC_DESCRIPTIONS = {
             "pricing": "Documents related to pricing, discounts, offers, cost changes, rate card",
             "product_release": "Documents about product launches, product updates, release notes",
@@ -12,18 +14,21 @@ class TopicClassifier:
             "sales_enablement": "Sales decks, battle cards, pitch, enablement content",
             "internal_documents": "Internal memos, policies, processes, HR documents"
         }
+        self.label_embeddings = LabelEmbeddings(self.embedding_model, self.TOPIC_DESCRIPTIONS)
 
-    def categorize(self, text):
+    def categorize(self, text, embedding=None):
         if not text or not text.strip():
             return {"topic": "uncategorized", "score": 0.0}
-        doc_emb = self.embedding_model.encode(text, convert_to_tensor=True)
-        best = None
-        best_score = -1.0
-        for topic, desc in self.TOPIC_DESCRIPTIONS.items():
-            cat_emb = self.embedding_model.encode(desc, convert_to_tensor=True)
-            sim = self.embedding_model.compute_similarity(doc_emb, cat_emb).item()
-            if sim > best_score:
-                best_score = sim
-                best = topic
-        # return {"topic": best, "score": float(best_score)}
-        return best or "uncategorized"
\ No newline at end of file
+        # Reuse the chunk embedding computed by the indexer when available
+        doc_emb = embedding if embedding is not None else self.embedding_model.encode(text, convert_to_tensor=False)
+        labels, scores = self.label_embeddings.classify(doc_emb)
+        # return {"topic": labels[0], "score": float(scores[0])}
+        return labels[0] or "uncategorized"
+
+    def categorize_batch(self, embeddings):
+        """Classify a batch of chunk embeddings with a single matrix multiply.
+
+        Returns:
+            Tuple of (topics, scores) arrays aligned with the input rows
+        """
+        return self.label_embeddings.classify(embeddings)
@@ -0,0 +1,160 @@
+"""
+Async MongoDB search for the ASGI serving path
+"""
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from .config import mongodb_config
+from .mongodb_handler import MongoDBHandler, _client_key
+from services.metrics.stage_metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
+# One pooled client per connection settings, created on the serving event loop
+_async_clients: Dict[tuple, AsyncIOMotorClient] = {}
+
+
+def get_async_mongo_client(config=None) -> AsyncIOMotorClient:
+    """Return the shared Motor client for config. Motor connects lazily on the first operation."""
+    config = config or mongodb_config
+    key = _client_key(config)
+    client = _async_clients.get(key)
+    if client is None:
+        client = AsyncIOMotorClient(config.connection_string, **config.get_connection_params())
+        _async_clients[key] = client
+        logger.info("Created shared async MongoDB client")
+    return client
+
+
+def close_async_clients():
+    for client in _async_clients.values():
+        client.close()
+    _async_clients.clear()
+
+
+class AsyncMongoDBHandler:
+    """
+    Non-blocking counterpart of MongoDBHandler.vector_search.
+
+    Pipelines, filters and fusion are shared with MongoDBHandler so both
+    serving paths return the same results. Only the Atlas retrievals are
+    awaited; the rarely used BM25 fallbacks run the sync handler in a thread.
+    """
+
+    _build_filters = MongoDBHandler._build_filters
+    _combine_search_results = MongoDBHandler._combine_search_results
+    _result_projection = MongoDBHandler._result_projection
+    _vector_search_pipeline = MongoDBHandler._vector_search_pipeline
+    _text_search_pipeline = MongoDBHandler._text_search_pipeline
+
+    def __init__(self, config=None, sync_handler: MongoDBHandler = None):
+        self.config = config or mongodb_config
+        self._client = get_async_mongo_client(self.config)
+        self._collection = self._client[self.config.database_name][self.config.collection_name]
+        self._sync_handler = sync_handler
+
+    @property
+    def sync_handler(self) -> MongoDBHandler:
+        # Created on first fallback; it connects, so never on the event loop thread
+        if self._sync_handler is None:
+            self._sync_handler = MongoDBHandler(self.config)
+        return self._sync_handler
+
+    async def vector_search(
+        self,
+        query_vector: Union[List[float], np.ndarray],
+        query_text: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        topk: int = 10,
+        alpha: float = 0.5,
+        fusion: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Same contract as MongoDBHandler.vector_search."""
+        results = []
+        async for _, results in self.iter_vector_search(query_vector, query_text, filters, topk, alpha, fusion):
+            pass
+        return results
+
+    async def iter_vector_search(
+        self,
+        query_vector: Union[List[float], np.ndarray],
+        query_text: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        topk: int = 10,
+        alpha: float = 0.5,
+        fusion: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """Same events as MongoDBHandler.iter_vector_search."""
+        topk = min(topk, self.config.max_limit)
+        hybrid = bool(query_text) and alpha > 0
+
+        vector_task = asyncio.ensure_future(self._run_vector_search(query_vector, filters, topk))
+        text_task = asyncio.ensure_future(self._run_text_search(query_text, filters, topk * 2)) if hybrid else None
+        try:
+            try:
+                results = await vector_task
+            except Exception as e:
+                logger.error(f"Vector search failed: {e}")
+                results = None
+            if results is not None and text_task is not None:
+                yield "partial", results
+
+            text_results = None
+            if text_task is not None:
+                try:
+                    text_results = await text_task
+                except Exception as e:
+                    logger.warning(f"Hybrid text search failed, using the local BM25 index: {e}")
+                    try:
+                        text_results = await asyncio.to_thread(
+                            self._sync_fallback, "_local_text_search", query_text, filters, topk * 2
+                        )
+                    except Exception as local_e:
+                        logger.warning(f"Local text search failed: {local_e}")
+                        text_results = None
+        finally:
+            # A consumer that stops after the partial results leaves the text search running
+            if text_task is not None and not text_task.done():
+                text_task.cancel()
+
+        if results is None:
+            if text_results:
+                yield "final", text_results[:topk]
+                return
+            yield "final", await asyncio.to_thread(
+                self._sync_fallback, "_text_search_fallback", query_text, filters, topk
+            )
+            return
+
+        if text_results is not None:
+            results = self._combine_search_results(
+                results, text_results, alpha, strategy=fusion or self.config.fusion_strategy
+            )[:topk]
+
+        logger.info(f"Vector search returned {len(results)} results")
+        yield "final", results
+
+    async def _run_vector_search(self, query_vector, filters, topk) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            cursor = self._collection.aggregate(self._vector_search_pipeline(query_vector, filters, topk))
+            return await cursor.to_list(length=None)
+        finally:
+            observe_stage("query", "vector_search", time.perf_counter() - started)
+
+    async def _run_text_search(self, query_text, filters, limit) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            cursor = self._collection.aggregate(self._text_search_pipeline(query_text, filters, limit))
+            return await cursor.to_list(length=None)
+        finally:
+            observe_stage("query", "text_search", time.perf_counter() - started)
+
+    def _sync_fallback(self, method: str, *args):
+        return getattr(self.sync_handler, method)(*args)
+
@@ -0,0 +1,104 @@
+"""
+Incremental reads of a MongoDB collection for the in-process indexes
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How far behind the newest updated_at each poll looks again for late commits
+INDEX_SYNC_LAG_SECONDS = float(os.getenv("INDEX_SYNC_LAG_SECONDS", "120"))
+
+
+class ChangeFeed:
+    """
+    Documents written to a collection since the last poll, by updated_at.
+
+    Writers stamp updated_at on their own clock before the write commits, so
+    a batch stamped earlier can become visible after a later one, and clocks
+    differ between hosts. Each poll therefore looks again at a lag window
+    behind the newest updated_at seen. Only ids and timestamps are read for
+    that window; documents already returned with the same updated_at are not
+    fetched again. A write that commits more than lag_seconds after its stamp
+    is missed.
+
+    With a tombstones collection (see MongoDBHandler.record_deletions) the
+    feed also returns the ids deleted since the last poll. If the feed falls
+    further behind than the tombstone retention, it reports that deletions
+    may have been missed so the caller can reconcile against the live ids.
+    """
+
+    def __init__(self, collection, query: Dict[str, Any] = None, projection: Dict[str, Any] = None,
+                 tombstones=None, tombstone_retention: float = None, since: Optional[datetime] = None,
+                 lag_seconds: float = INDEX_SYNC_LAG_SECONDS, batch_size: int = 1000):
+        """
+        :param collection: Collection to read
+        :param query: Filter every returned document must match
+        :param projection: Fields of the returned documents
+        :param tombstones: Collection of {"doc_id", "deleted_at"} records, None to not track deletions
+        :param tombstone_retention: Seconds tombstones are kept before they expire
+        :param since: updated_at already covered, e.g. by a snapshot; None to start with every document
+        """
+        self.collection = collection
+        self.query = query or {}
+        self.projection = projection
+        self.tombstones = tombstones
+        self.tombstone_retention = timedelta(seconds=tombstone_retention) if tombstone_retention else None
+        self.lag = timedelta(seconds=lag_seconds)
+        self.batch_size = batch_size
+        self.last_synced_at = since
+        self._deletions_since = since
+        # _id -> updated_at of documents returned within the lag window
+        self._seen: Dict[Any, datetime] = {}
+
+    def changes(self) -> Iterator[Dict[str, Any]]:
+        """Yield documents inserted or updated since the last poll; the feed advances as they are consumed."""
+        since = self.last_synced_at
+        if since is None:
+            # Full load; the lag window after it is read again once, in full
+            for doc in self.collection.find(self.query, self.projection).batch_size(self.batch_size):
+                self._advance(doc.get("updated_at"))
+                yield doc
+            return
+
+        window = {**self.query, "updated_at": {"$gte": since - self.lag}}
+        stamps = self.collection.find(window, {"_id": 1, "updated_at": 1})
+        pending = [doc["_id"] for doc in stamps if self._seen.get(doc["_id"]) != doc.get("updated_at")]
+        for start in range(0, len(pending), self.batch_size):
+            batch = {**self.query, "_id": {"$in": pending[start:start + self.batch_size]}}
+            for doc in self.collection.find(batch, self.projection):
+                updated_at = doc.get("updated_at")
+                if updated_at is not None:
+                    self._seen[doc["_id"]] = updated_at
+                self._advance(updated_at)
+                yield doc
+
+        cutoff = self.last_synced_at - self.lag
+        self._seen = {doc_id: updated_at for doc_id, updated_at in self._seen.items() if updated_at >= cutoff}
+
+    def deletions(self) -> Tuple[List[Any], bool]:
+        """
+        Ids deleted since the last poll. Ids may repeat across polls; removing them again must be a no-op.
+
+        Returns:
+            Tuple of (deleted ids, True if deletions may have been missed and the caller should reconcile)
+        """
+        if self.tombstones is None:
+            return [], False
+        polled_at = datetime.utcnow()
+        since = self._deletions_since
+        self._deletions_since = polled_at
+        if since is None:
+            # The full load only saw live documents
+            return [], False
+        if self.tombstone_retention is not None and polled_at - since > self.tombstone_retention - self.lag:
+            logger.warning("Change feed fell behind the tombstone retention, reconciling deletions")
+            return [], True
+        cursor = self.tombstones.find({"deleted_at": {"$gte": since - self.lag}}, {"doc_id": 1})
+        return [doc["doc_id"] for doc in cursor], False
+
+    def _advance(self, updated_at: Optional[datetime]):
+        if updated_at is not None and (self.last_synced_at is None or updated_at > self.last_synced_at):
+            self.last_synced_at = updated_at
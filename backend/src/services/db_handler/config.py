@@ -16,18 +16,33 @@ class MongoDBConfig:
     )
     database_name: str = os.getenv("MONGODB_DATABASE", "search_app")
     collection_name: str = os.getenv("MONGODB_COLLECTION", "documents")
+    projects_collection_name: str = os.getenv("MONGODB_PROJECTS_COLLECTION", "projects")
+    counters_collection_name: str = os.getenv("MONGODB_COUNTERS_COLLECTION", "counters")
+    # Ids of deleted documents, read by the in-process indexes to drop them
+    tombstones_collection_name: str = os.getenv("MONGODB_TOMBSTONES_COLLECTION", "deleted_documents")
+    tombstone_ttl_seconds: int = int(os.getenv("MONGODB_TOMBSTONE_TTL_SECONDS", str(7 * 24 * 3600)))
     
     # Vector search settings
     vector_index_name: str = "vector_index"
     text_index_name: str = "text_index"
     embedding_dimension: int = 384  # for all-MiniLM-L6-v2
+    # How embeddings are stored: "array" (BSON doubles) or BSON binary vectors "float32" | "int8"
+    embedding_format: str = os.getenv("MONGODB_EMBEDDING_FORMAT", "array")
     max_limit: int = 100  # Maximum number of results to return
     
-    # Connection parameters
-    max_pool_size: int = 50
-    min_pool_size: int = 5
-    max_idle_time_ms: int = 30000
-    server_selection_timeout_ms: int = 5000
+    # Hybrid search settings
+    fusion_strategy: str = os.getenv("HYBRID_FUSION", "rrf")  # "rrf" | "weighted"
+    rrf_k: int = int(os.getenv("HYBRID_RRF_K", "60"))
+    search_workers: int = int(os.getenv("MONGODB_SEARCH_WORKERS", "16"))
+    
+    # Connection parameters (one pool per process, shared by all handlers)
+    max_pool_size: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+    min_pool_size: int = int(os.getenv("MONGODB_MIN_POOL_SIZE", "5"))
+    max_idle_time_ms: int = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "30000"))
+    server_selection_timeout_ms: int = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    
+    # Create indexes once when the app starts (otherwise run setup_indexes.py)
+    bootstrap_indexes: bool = os.getenv("MONGODB_BOOTSTRAP_INDEXES", "true").lower() == "true"
     
     def get_connection_params(self) -> Dict[str, Any]:
         """Get MongoDB connection parameters."""
@@ -62,6 +77,14 @@ class MongoDBConfig:
                     {
                         "type": "filter",
                         "path": "project"
+                    },
+                    {
+                        "type": "filter",
+                        "path": "source"
+                    },
+                    {
+                        "type": "filter",
+                        "path": "sources"
                     }
                 ]
             }
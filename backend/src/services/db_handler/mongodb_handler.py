@@ -2,16 +2,89 @@
 MongoDB Handler for Vector Search and Document Storage
 """
 import logging
-from typing import List, Dict, Any, Optional, Union
+import threading
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 from datetime import datetime
 import numpy as np
-from pymongo import MongoClient, ASCENDING, DESCENDING
-from pymongo.errors import ConnectionFailure, OperationFailure, DuplicateKeyError
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import MongoClient, ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, OperationFailure, DuplicateKeyError
 from bson import ObjectId
 from .config import mongodb_config
+from .pool_monitor import PoolStatsListener
+from .vector_codec import EMBEDDING_FORMATS, decode_vector, encode_vector, vector_format
+from services.cache.result_cache import result_cache
+from services.metrics.stage_metrics import submit_in_context, timed_stage
 
 logger = logging.getLogger(__name__)
 
+# Chunks of a streaming ingest that has not finished yet are left out of search results
+NOT_PENDING = {"ingest_pending": {"$ne": True}}
+
+# One pooled client per connection settings, shared by every handler in the process
+_clients: Dict[tuple, MongoClient] = {}
+_pool_listeners: Dict[tuple, PoolStatsListener] = {}
+_bootstrapped_collections = set()
+_clients_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _client_key(config) -> tuple:
+    return (config.connection_string, tuple(sorted(config.get_connection_params().items())))
+
+
+def get_mongo_client(config=None) -> MongoClient:
+    """Return the shared MongoClient for config, connecting on first use."""
+    config = config or mongodb_config
+    key = _client_key(config)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            listener = PoolStatsListener(config.max_pool_size)
+            client = MongoClient(
+                config.connection_string,
+                event_listeners=[listener],
+                **config.get_connection_params()
+            )
+            # Test connection
+            client.admin.command('ping')
+            _clients[key] = client
+            _pool_listeners[key] = listener
+            logger.info("Created shared MongoDB client")
+    return client
+
+
+def _search_executor() -> ThreadPoolExecutor:
+    """Threads running the vector and text retrievals of a query concurrently."""
+    global _executor
+    if _executor is None:
+        with _clients_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=mongodb_config.search_workers,
+                    thread_name_prefix="mongo-search"
+                )
+    return _executor
+
+
+def get_pool_stats(config=None) -> Dict[str, Any]:
+    """Connection pool utilization of the shared client."""
+    listener = _pool_listeners.get(_client_key(config or mongodb_config))
+    return listener.get_stats() if listener else {}
+
+
+def close_all_clients():
+    """Close every shared client, e.g. at process shutdown."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        _pool_listeners.clear()
+
 class MongoDBHandler:
     """MongoDB handler with vector search capabilities."""
     
@@ -25,20 +98,12 @@ class MongoDBHandler:
     def connect(self):
         """Establish connection to MongoDB."""
         try:
-            self._client = MongoClient(
-                self.config.connection_string,
-                **self.config.get_connection_params()
-            )
-            # Test connection
-            self._client.admin.command('ping')
+            self._client = get_mongo_client(self.config)
             
             self._database = self._client[self.config.database_name]
             self._collection = self._database[self.config.collection_name]
             
-            # Ensure indexes
-            self._ensure_indexes()
-            
-            logger.info(f"Connected to MongoDB: {self.config.database_name}.{self.config.collection_name}")
+            logger.debug(f"Connected to MongoDB: {self.config.database_name}.{self.config.collection_name}")
             
         except ConnectionFailure as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
@@ -47,8 +112,29 @@ class MongoDBHandler:
             logger.error(f"Unexpected error connecting to MongoDB: {e}")
             raise
     
-    def _ensure_indexes(self):
-        """Create necessary indexes for efficient querying."""
+    def ensure_indexes(self, force: bool = False) -> bool:
+        """
+        Create indexes once per process, or again when force is set.
+
+        Returns:
+            True if the indexes exist; a failed attempt is not remembered, so calling again retries it
+        """
+        key = (_client_key(self.config), self.config.database_name, self.config.collection_name)
+        if key in _bootstrapped_collections and not force:
+            return True
+        if not self._ensure_indexes():
+            return False
+        with _clients_lock:
+            _bootstrapped_collections.add(key)
+        return True
+    
+    def _ensure_indexes(self) -> bool:
+        """
+        Create necessary indexes for efficient querying.
+
+        Returns:
+            True if the filter and content hash indexes exist afterwards
+        """
         try:
             # Create indexes for filtering
             index_specs = [
@@ -57,6 +143,9 @@ class MongoDBHandler:
                 [("team", ASCENDING)],
                 [("source", ASCENDING)],
                 [("created_at", DESCENDING)],
+                [("updated_at", ASCENDING)],
+                [("ingest_id", ASCENDING)],
+                [("sources", ASCENDING)],
                 [("topic", ASCENDING), ("project", ASCENDING)],
                 [("team", ASCENDING), ("project", ASCENDING)]
             ]
@@ -67,20 +156,33 @@ class MongoDBHandler:
                 except DuplicateKeyError:
                     pass  # Index already exists
             
-            # Create text search index for fallback
+            # One document per chunk content; older documents without a hash are exempt
+            try:
+                self._collection.create_index(
+                    [("content_hash", ASCENDING)],
+                    unique=True,
+                    partialFilterExpression={"content_hash": {"$exists": True}},
+                    background=True
+                )
+            except Exception as e:
+                logger.warning(f"Could not create content hash index: {e}")
+                return False
+            
             try:
-                text_index = [("content", "text"), ("title", "text")]
-                self._collection.create_index(text_index, background=True)
-                logger.info("Text search index created")
-            except DuplicateKeyError:
-                pass  # Index already exists
+                self.tombstones.create_index(
+                    [("deleted_at", ASCENDING)],
+                    expireAfterSeconds=self.config.tombstone_ttl_seconds,
+                    background=True
+                )
             except Exception as e:
-                logger.warning(f"Could not create text search index: {e}")
-                    
+                logger.warning(f"Could not create tombstone index: {e}")
+            
             logger.info("MongoDB indexes ensured")
+            return True
             
         except Exception as e:
             logger.warning(f"Failed to create some indexes: {e}")
+            return False
     
     def insert_document(self, document: Dict[str, Any]) -> str:
         """Insert a single document."""
@@ -88,8 +190,10 @@ class MongoDBHandler:
             # Add metadata
             document['created_at'] = datetime.utcnow()
             document['updated_at'] = datetime.utcnow()
+            self._encode_embedding(document)
             
             result = self._collection.insert_one(document)
+            self._corpus_changed()
             logger.info(f"Document inserted with ID: {result.inserted_id}")
             return str(result.inserted_id)
             
@@ -97,16 +201,32 @@ class MongoDBHandler:
             logger.error(f"Failed to insert document: {e}")
             raise
     
-    def insert_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
-        """Insert multiple documents."""
+    def insert_documents(self, documents: List[Dict[str, Any]], ignore_duplicates: bool = False) -> List[str]:
+        """
+        Insert multiple documents.
+
+        With ignore_duplicates, documents rejected by a unique index (e.g. a
+        chunk another ingest inserted first) are skipped instead of raising.
+        """
         try:
             # Add metadata to all documents
             for doc in documents:
                 doc['created_at'] = datetime.utcnow()
                 doc['updated_at'] = datetime.utcnow()
+                self._encode_embedding(doc)
             
-            result = self._collection.insert_many(documents)
-            inserted_ids = [str(id) for id in result.inserted_ids]
+            try:
+                result = self._collection.insert_many(documents, ordered=not ignore_duplicates)
+                inserted_ids = [str(id) for id in result.inserted_ids]
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if not ignore_duplicates or any(error.get("code") != 11000 for error in errors):
+                    raise
+                rejected = {error["index"] for error in errors}
+                inserted_ids = [str(doc["_id"]) for i, doc in enumerate(documents) if i not in rejected]
+                logger.info(f"Skipped {len(rejected)} duplicate documents")
+            if inserted_ids:
+                self._corpus_changed()
             logger.info(f"Inserted {len(inserted_ids)} documents")
             return inserted_ids
             
@@ -114,13 +234,19 @@ class MongoDBHandler:
             logger.error(f"Failed to insert documents: {e}")
             raise
     
+    def _encode_embedding(self, document: Dict[str, Any]):
+        """Convert document["embedding"], if any, to the configured storage format in place."""
+        if document.get("embedding") is not None:
+            document["embedding"] = encode_vector(document["embedding"], self.config.embedding_format)
+    
     def vector_search(
         self, 
         query_vector: Union[List[float], np.ndarray],
         query_text: Optional[str] = None,
         filters: Optional[Dict[str, Any]] = None,
         topk: int = 10,
-        alpha: float = 0.5
+        alpha: float = 0.5,
+        fusion: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Perform vector search with optional hybrid search.
@@ -131,164 +257,186 @@ class MongoDBHandler:
             filters: MongoDB query filters
             topk: Number of results to return
             alpha: Weight for hybrid search (0.0 = pure vector, 1.0 = pure text)
+            fusion: "rrf" or "weighted", defaults to config.fusion_strategy
+        """
+        results = []
+        for _, results in self.iter_vector_search(query_vector, query_text, filters, topk, alpha, fusion):
+            pass
+        return results
+
+    def iter_vector_search(
+        self,
+        query_vector: Union[List[float], np.ndarray],
+        query_text: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        topk: int = 10,
+        alpha: float = 0.5,
+        fusion: Optional[str] = None
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
         """
+        vector_search that also reports the vector hits of a hybrid query before fusion.
+
+        Yields:
+            ("partial", vector results) as soon as $vectorSearch returns, only
+            for hybrid queries, then ("final", the results vector_search returns)
+        """
+        # Limit topk
+        topk = min(topk, self.config.max_limit)
+        hybrid = bool(query_text) and alpha > 0
+
+        # Run both retrievals at the same time so hybrid costs max(vector, text)
+        vector_future = submit_in_context(_search_executor(), self._run_vector_search, query_vector, filters, topk)
+        text_future = None
+        if hybrid:
+            text_future = submit_in_context(_search_executor(), self._run_text_search, query_text, filters, topk * 2)
+
         try:
-            # Ensure query_vector is a list
-            if isinstance(query_vector, np.ndarray):
-                query_vector = query_vector.tolist()
-            
-            # Limit topk
-            topk = min(topk, self.config.max_limit)
-            
-            # Build aggregation pipeline for vector search
-            pipeline = []
-            
-            # Vector search stage (Atlas Vector Search)
-            vector_search_stage = {
-                "$vectorSearch": {
-                    "index": self.config.vector_index_name,
-                    "path": "embedding",
-                    "queryVector": query_vector,
-                    "numCandidates": min(topk * 10, 1000),
-                    "limit": topk
-                }
-            }
-            
-            # Add filters if provided
-            if filters:
-                vector_search_stage["$vectorSearch"]["filter"] = self._build_filters(filters)
-            
-            pipeline.append(vector_search_stage)
-            
-            # Add metadata fields
-            pipeline.append({
-                "$addFields": {
-                    "score": {"$meta": "vectorSearchScore"}
-                }
-            })
-            
-            # Project fields
-            pipeline.append({
-                "$project": {
-                    "text": 1,
-                    "topic": 1,
-                    "project": 1,
-                    "team": 1,
-                    "source": 1,
-                    "title": {"$ifNull": ["$title", "Untitled"]},
-                    "created_at": 1,
-                    "score": 1
-                }
-            })
-            
-            # Execute search
-            results = list(self._collection.aggregate(pipeline))
-            
-            # If hybrid search is requested and we have query_text
-            if query_text and alpha > 0:
-                results = self._hybrid_search(results, query_text, alpha)
-            
-            logger.info(f"Vector search returned {len(results)} results")
-            return results
-            
+            results = vector_future.result()
         except Exception as e:
             logger.error(f"Vector search failed: {e}")
+            results = None
+        if results is not None and text_future is not None:
+            try:
+                yield "partial", results
+            except GeneratorExit:
+                # The client went away after the partial results; skip the text search if it has not started
+                text_future.cancel()
+                raise
+
+        text_results = None
+        if text_future is not None:
+            try:
+                text_results = text_future.result()
+            except Exception as e:
+                logger.warning(f"Hybrid text search failed, using the local BM25 index: {e}")
+                try:
+                    text_results = self._local_text_search(query_text, filters, topk * 2)
+                except Exception as local_e:
+                    logger.warning(f"Local text search failed: {local_e}")
+
+        if results is None:
+            if text_results:
+                yield "final", text_results[:topk]
+                return
             # Fallback to text search if vector search fails
-            return self._text_search_fallback(query_text, filters, topk)
+            yield "final", self._text_search_fallback(query_text, filters, topk)
+            return
+
+        # If hybrid search is requested and we have query_text
+        if text_results is not None:
+            results = self._combine_search_results(
+                results, text_results, alpha, strategy=fusion or self.config.fusion_strategy
+            )[:topk]
+
+        logger.info(f"Vector search returned {len(results)} results")
+        yield "final", results
     
-    def _hybrid_search(self, vector_results: List[Dict], query_text: str, alpha: float) -> List[Dict]:
-        """Combine vector search with text search for hybrid results."""
-        try:
-            # Perform text search
-            text_pipeline = [
-                {
-                    "$search": {
-                        "index": "text_index",  # You'll need to create this
-                        "text": {
-                            "query": query_text,
-                            "path": ["text", "title"]
-                        }
-                    }
-                },
-                {
-                    "$addFields": {
-                        "text_score": {"$meta": "searchScore"}
+    @timed_stage("query", "vector_search")
+    def _run_vector_search(
+        self,
+        query_vector: Union[List[float], np.ndarray],
+        filters: Optional[Dict[str, Any]],
+        topk: int
+    ) -> List[Dict[str, Any]]:
+        """Run the Atlas $vectorSearch pipeline."""
+        return list(self._collection.aggregate(self._vector_search_pipeline(query_vector, filters, topk)))
+    
+    @timed_stage("query", "text_search")
+    def _run_text_search(self, query_text: str, filters: Optional[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        """Run the Atlas $search pipeline with the same filters as the vector search."""
+        return list(self._collection.aggregate(self._text_search_pipeline(query_text, filters, limit)))
+    
+    def _vector_search_pipeline(
+        self,
+        query_vector: Union[List[float], np.ndarray],
+        filters: Optional[Dict[str, Any]],
+        topk: int
+    ) -> List[Dict[str, Any]]:
+        # Query with the same vector type as the stored embeddings
+        query_vector = encode_vector(query_vector, self.config.embedding_format)
+        
+        # Vector search stage (Atlas Vector Search)
+        vector_search_stage = {
+            "$vectorSearch": {
+                "index": self.config.vector_index_name,
+                "path": "embedding",
+                "queryVector": query_vector,
+                "numCandidates": min(topk * 10, 1000),
+                "limit": topk
+            }
+        }
+        
+        # Add filters if provided
+        if filters:
+            vector_search_stage["$vectorSearch"]["filter"] = self._build_filters(filters)
+        
+        return [
+            vector_search_stage,
+            {"$match": NOT_PENDING},
+            # Add metadata fields
+            {"$addFields": {"score": {"$meta": "vectorSearchScore"}}},
+            {"$project": self._result_projection("score")}
+        ]
+    
+    def _text_search_pipeline(self, query_text: str, filters: Optional[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        pipeline = [
+            {
+                "$search": {
+                    "index": self.config.text_index_name,
+                    "text": {
+                        "query": query_text,
+                        "path": ["text", "title"]
                     }
-                },
-                {"$limit": max(1, len(vector_results) * 2)}
-            ]
-            
-            text_results = list(self._collection.aggregate(text_pipeline))
-            
-            # Combine and re-rank results
-            combined_results = self._combine_search_results(
-                vector_results, text_results, alpha
-            )
-            
-            return combined_results
-            
-        except Exception as e:
-            logger.warning(f"Hybrid search fallback failed: {e}")
-            return vector_results
+                }
+            },
+            {"$addFields": {"text_score": {"$meta": "searchScore"}}}
+        ]
+        pipeline.append({"$match": {**self._build_filters(filters), **NOT_PENDING} if filters else NOT_PENDING})
+        pipeline.append({"$limit": max(1, limit)})
+        pipeline.append({"$project": self._result_projection("text_score")})
+        return pipeline
+    
+    def _result_projection(self, score_field: str) -> Dict[str, Any]:
+        """Fields returned by search pipelines; never the embedding."""
+        return {
+            "text": 1,
+            "topic": 1,
+            "project": 1,
+            "team": 1,
+            "source": 1,
+            "title": {"$ifNull": ["$title", "Untitled"]},
+            "created_at": 1,
+            score_field: 1
+        }
+    
+    @timed_stage("query", "text_search")
+    def _local_text_search(self, query_text: str, filters: Optional[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        """Keyword search against the in-process BM25 index, for deployments without Atlas Search."""
+        # Imported here because the searcher package builds on this module
+        from services.searcher.bm25_index import get_bm25_index
+
+        index = get_bm25_index(self)
+        if not index.ready:
+            logger.info("BM25 index is still loading, keyword search returns no hits")
+            return []
+        hits = index.search(query_text, filters=filters, topk=max(1, limit))
+        scores = dict(hits)
+        results = self.get_documents_by_ids([doc_id for doc_id, _ in hits])
+        for doc in results:
+            doc.pop("score", None)
+            doc["text_score"] = scores[doc["_id"]]
+        return results
     
     def _text_search_fallback(self, query_text: str, filters: Dict, topk: int) -> List[Dict]:
         """Fallback text search when vector search is not available."""
         try:
             if not query_text:
                 return []
-                
-            # Try text search first
-            try:
-                search_query = {"$text": {"$search": query_text}}
-                
-                # Add filters
-                if filters:
-                    search_query.update(self._build_filters(filters))
-                
-                # Execute search
-                results = list(
-                    self._collection.find(
-                        search_query,
-                        {"content": 1, "topic": 1, "project": 1, "team": 1, "source": 1, "title": 1}
-                    )
-                    .limit(topk)
-                )
-                
-                if results:
-                    logger.info(f"Text search fallback returned {len(results)} results")
-                    return results
-                    
-            except Exception as text_e:
-                logger.warning(f"Text search failed: {text_e}")
-            
-            # If text search fails, try simple regex matching
-            try:
-                regex_query = {
-                    "$or": [
-                        {"content": {"$regex": query_text, "$options": "i"}},
-                        {"title": {"$regex": query_text, "$options": "i"}}
-                    ]
-                }
-                
-                # Add filters
-                if filters:
-                    regex_query = {"$and": [regex_query, self._build_filters(filters)]}
-                
-                results = list(
-                    self._collection.find(
-                        regex_query,
-                        {"content": 1, "topic": 1, "project": 1, "team": 1, "source": 1, "title": 1}
-                    )
-                    .limit(topk)
-                )
-                
-                logger.info(f"Regex search fallback returned {len(results)} results")
-                return results
-                
-            except Exception as regex_e:
-                logger.error(f"Regex search failed: {regex_e}")
-                return []
-            
+            results = self._local_text_search(query_text, filters, topk)
+            for doc in results:
+                doc["score"] = doc["text_score"]
+            logger.info(f"Text search fallback returned {len(results)} results")
+            return results
         except Exception as e:
             logger.error(f"Text search fallback failed: {e}")
             return []
@@ -300,7 +448,10 @@ class MongoDBHandler:
         for key, value in filters.items():
             if key in ['topic', 'project', 'team', 'source']:
                 if isinstance(value, list):
-                    mongo_filters[key] = {"$in": value}
+                    value = {"$in": value}
+                if key == 'source':
+                    # Deduplicated chunks list every source containing them in sources
+                    mongo_filters['$or'] = [{"source": value}, {"sources": value}]
                 else:
                     mongo_filters[key] = value
             elif key == 'date_range':
@@ -314,36 +465,53 @@ class MongoDBHandler:
         
         return mongo_filters
     
+    @timed_stage("query", "fusion")
     def _combine_search_results(
         self, 
         vector_results: List[Dict], 
         text_results: List[Dict], 
-        alpha: float
+        alpha: float,
+        strategy: str = "rrf"
     ) -> List[Dict]:
-        """Combine and re-rank vector and text search results."""
-        # Create lookup for text results
-        text_scores = {str(doc['_id']): doc.get('text_score', 0) for doc in text_results}
-        
-        # Normalize scores and combine
-        max_vector_score = max([doc.get('score', 0) for doc in vector_results] + [1])
-        max_text_score = max(text_scores.values()) if text_scores else 1
+        """
+        Fuse vector and text results over the union of both candidate sets.
         
-        combined_results = []
+        Args:
+            strategy: "rrf" for weighted reciprocal rank fusion, or "weighted"
+                for a weighted sum of max-normalized scores
+        """
+        docs = {}
         for doc in vector_results:
+            docs[str(doc['_id'])] = doc
+        for doc in text_results:
             doc_id = str(doc['_id'])
-            
+            if doc_id in docs:
+                docs[doc_id]['text_score'] = doc.get('text_score', 0)
+            else:
+                docs[doc_id] = doc
+        
+        if strategy == "weighted":
             # Normalize scores to [0, 1]
-            vector_score = doc.get('score', 0) / max_vector_score
-            text_score = text_scores.get(doc_id, 0) / max_text_score
-            
-            # Combine scores
-            combined_score = (1 - alpha) * vector_score + alpha * text_score
-            doc['combined_score'] = combined_score
-            
-            combined_results.append(doc)
+            max_vector_score = max([doc.get('score', 0) for doc in vector_results] + [1])
+            max_text_score = max([doc.get('text_score', 0) for doc in text_results] + [1])
+            for doc in docs.values():
+                vector_score = doc.get('score', 0) / max_vector_score
+                text_score = doc.get('text_score', 0) / max_text_score
+                doc['combined_score'] = (1 - alpha) * vector_score + alpha * text_score
+        else:
+            k = self.config.rrf_k
+            vector_ranks = {str(doc['_id']): rank for rank, doc in enumerate(vector_results, 1)}
+            text_ranks = {str(doc['_id']): rank for rank, doc in enumerate(text_results, 1)}
+            for doc_id, doc in docs.items():
+                combined_score = 0.0
+                if doc_id in vector_ranks:
+                    combined_score += (1 - alpha) / (k + vector_ranks[doc_id])
+                if doc_id in text_ranks:
+                    combined_score += alpha / (k + text_ranks[doc_id])
+                doc['combined_score'] = combined_score
         
         # Sort by combined score
-        combined_results.sort(key=lambda x: x['combined_score'], reverse=True)
+        combined_results = sorted(docs.values(), key=lambda x: x['combined_score'], reverse=True)
         
         return combined_results
     
@@ -351,33 +519,212 @@ class MongoDBHandler:
         """Retrieve a document by its ID."""
         try:
             result = self._collection.find_one({"_id": ObjectId(doc_id)})
+            if result and result.get("embedding") is not None:
+                result["embedding"] = decode_vector(result["embedding"]).tolist()
             return result
         except Exception as e:
             logger.error(f"Failed to get document {doc_id}: {e}")
             return None
     
+    def get_documents_by_ids(self, doc_ids: List[Any]) -> List[Dict[str, Any]]:
+        """Fetch search result fields for doc_ids, in the order given."""
+        docs = {
+            doc["_id"]: doc
+            for doc in self._collection.aggregate([
+                {"$match": {"_id": {"$in": list(doc_ids)}}},
+                {"$project": self._result_projection("score")}
+            ])
+        }
+        return [docs[doc_id] for doc_id in doc_ids if doc_id in docs]
+    
+    def find_embeddings_by_content_hash(self, content_hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Stored embeddings of the documents with the given content hashes, keyed by hash."""
+        if not content_hashes:
+            return {}
+        cursor = self._collection.find(
+            {"content_hash": {"$in": list(content_hashes)}},
+            {"content_hash": 1, "embedding": 1}
+        )
+        return {doc["content_hash"]: decode_vector(doc.get("embedding")) for doc in cursor}
+    
+    def link_sources(self, content_hashes: List[str], source: str) -> int:
+        """Add source to the sources of existing documents with the given content hashes."""
+        if not content_hashes or not source:
+            return 0
+        result = self._collection.update_many(
+            {"content_hash": {"$in": list(content_hashes)}, "sources": {"$ne": source}},
+            {"$addToSet": {"sources": source}, "$set": {"updated_at": datetime.utcnow()}}
+        )
+        if result.modified_count > 0:
+            # Source filters match sources, so filtered results may change
+            self._corpus_changed()
+        return result.modified_count
+    
+    def unlink_sources(self, content_hashes: List[str], source: str) -> int:
+        """Remove source from the linked sources of documents with the given content hashes."""
+        if not content_hashes or not source:
+            return 0
+        result = self._collection.update_many(
+            {"content_hash": {"$in": list(content_hashes)}, "sources": source, "source": {"$ne": source}},
+            {"$pull": {"sources": source}, "$set": {"updated_at": datetime.utcnow()}}
+        )
+        if result.modified_count > 0:
+            self._corpus_changed()
+        return result.modified_count
+    
+    def find_source_chunks(self, source: str) -> List[Dict[str, Any]]:
+        """Documents inserted from or linked to source, without their embeddings."""
+        return list(self._collection.find(
+            {"$or": [{"source": source}, {"sources": source}]},
+            {"content_hash": 1, "source": 1, "sources": 1}
+        ))
+    
+    def bulk_write(self, requests: List[Any], ordered: bool = False, deleted_ids: List[Any] = None):
+        """
+        Apply a batch of pymongo write operations in one round trip.
+
+        deleted_ids lists the _ids removed by the DeleteOne requests in the batch.
+        """
+        if not requests:
+            return None
+        try:
+            result = self._collection.bulk_write(requests, ordered=ordered)
+            self._corpus_changed()
+            return result
+        except Exception as e:
+            logger.error(f"Bulk write failed: {e}")
+            # Some operations may have been applied
+            self._corpus_changed()
+            raise
+        finally:
+            self.record_deletions(deleted_ids)
+    
     def update_document(self, doc_id: str, updates: Dict[str, Any]) -> bool:
         """Update a document."""
         try:
             updates['updated_at'] = datetime.utcnow()
+            self._encode_embedding(updates)
             result = self._collection.update_one(
                 {"_id": ObjectId(doc_id)},
                 {"$set": updates}
             )
+            if result.modified_count > 0:
+                self._corpus_changed()
             return result.modified_count > 0
         except Exception as e:
             logger.error(f"Failed to update document {doc_id}: {e}")
             return False
     
+    def update_documents(self, query: Dict[str, Any], updates: Dict[str, Any]) -> int:
+        """Update every document matching query."""
+        try:
+            updates['updated_at'] = datetime.utcnow()
+            result = self._collection.update_many(query, {"$set": updates})
+            if result.modified_count > 0:
+                self._corpus_changed()
+            return result.modified_count
+        except Exception as e:
+            logger.error(f"Failed to update documents: {e}")
+            raise
+    
+    def delete_documents(self, query: Dict[str, Any], batch_size: int = 1000) -> int:
+        """Delete every document matching query."""
+        try:
+            doc_ids = [doc["_id"] for doc in self._collection.find(query, {"_id": 1})]
+            deleted_count = 0
+            # By _id so exactly the recorded ids are deleted
+            for start in range(0, len(doc_ids), batch_size):
+                batch = doc_ids[start:start + batch_size]
+                deleted_count += self._collection.delete_many({"_id": {"$in": batch}}).deleted_count
+                self.record_deletions(batch)
+            if deleted_count > 0:
+                self._corpus_changed()
+            return deleted_count
+        except Exception as e:
+            logger.error(f"Failed to delete documents: {e}")
+            raise
+    
     def delete_document(self, doc_id: str) -> bool:
         """Delete a document."""
         try:
             result = self._collection.delete_one({"_id": ObjectId(doc_id)})
+            if result.deleted_count > 0:
+                self.record_deletions([ObjectId(doc_id)])
+                self._corpus_changed()
             return result.deleted_count > 0
         except Exception as e:
             logger.error(f"Failed to delete document {doc_id}: {e}")
             return False
     
+    def record_deletions(self, doc_ids: Optional[List[Any]]):
+        """
+        Write a tombstone for each deleted document id.
+
+        In-process indexes poll the tombstones to drop deleted documents
+        (see ChangeFeed); they expire after config.tombstone_ttl_seconds.
+        """
+        if not doc_ids:
+            return
+        deleted_at = datetime.utcnow()
+        try:
+            self.tombstones.insert_many(
+                [{"doc_id": doc_id, "deleted_at": deleted_at} for doc_id in doc_ids],
+                ordered=False
+            )
+        except Exception as e:
+            # The documents are gone either way; indexes catch up when they reconcile
+            logger.warning(f"Failed to record {len(doc_ids)} deletions: {e}")
+    
+    @property
+    def tombstones(self):
+        """Collection of deleted document ids."""
+        return self._database[self.config.tombstones_collection_name]
+    
+    def migrate_embeddings(self, target_format: str = None, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Rewrite every stored embedding in target_format (defaults to config.embedding_format).
+
+        updated_at is left alone since the content does not change; in-process
+        indexes read every format.
+        """
+        target_format = target_format or self.config.embedding_format
+        if target_format not in EMBEDDING_FORMATS:
+            raise ValueError(f"Unknown embedding format: {target_format}")
+
+        query: Dict[str, Any] = {"embedding": {"$exists": True, "$ne": None}}
+        if target_format == "array":
+            query["embedding"]["$not"] = {"$type": "array"}
+        elif target_format == "float32":
+            # int8 vectors cannot be restored to float32, so only arrays are converted
+            query["embedding"]["$type"] = "array"
+
+        stats = {"scanned": 0, "migrated": 0, "skipped": 0}
+        requests = []
+        for doc in self._collection.find(query, {"embedding": 1}).batch_size(batch_size):
+            stats["scanned"] += 1
+            if vector_format(doc["embedding"]) == target_format:
+                stats["skipped"] += 1
+                continue
+            vector = encode_vector(decode_vector(doc["embedding"]), target_format)
+            requests.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"embedding": vector}}))
+            if len(requests) >= batch_size:
+                stats["migrated"] += self._collection.bulk_write(requests, ordered=False).modified_count
+                requests = []
+        if requests:
+            stats["migrated"] += self._collection.bulk_write(requests, ordered=False).modified_count
+        if stats["migrated"]:
+            self._corpus_changed()
+        logger.info(f"Embedding migration to {target_format}: {stats}")
+        return stats
+    
+    def _corpus_changed(self):
+        """Invalidate cached search results after a write to the documents collection."""
+        result_cache.invalidate()
+    
+    def get_collection(self, name: str):
+        """Get another collection from the same database."""
+        return self._database[name]
+    
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get collection statistics."""
         try:
@@ -393,10 +740,10 @@ class MongoDBHandler:
             return {}
     
     def close_connection(self):
-        """Close MongoDB connection."""
-        if self._client:
-            self._client.close()
-            logger.info("MongoDB connection closed")
+        """Release this handler; the shared client stays open for other handlers."""
+        self._client = None
+        self._database = None
+        self._collection = None
     
     def __enter__(self):
         return self
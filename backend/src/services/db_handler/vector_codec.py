@@ -0,0 +1,64 @@
+"""
+Encoding of embeddings as BSON arrays or BSON binary vectors
+"""
+from typing import Any, Optional
+
+import numpy as np
+from bson.binary import Binary
+
+# BSON binary subtype 9 (vector): one dtype byte, one padding byte, then the packed values
+VECTOR_SUBTYPE = 9
+FLOAT32_DTYPE = 0x27
+INT8_DTYPE = 0x03
+PACKED_BIT_DTYPE = 0x10
+
+EMBEDDING_FORMATS = ("array", "float32", "int8")
+
+
+def encode_vector(vector, embedding_format: str = "array") -> Any:
+    """
+    Encode an embedding for storage.
+
+    Args:
+        vector: List or array of floats
+        embedding_format: "array" (BSON doubles), "float32" or "int8" (BSON binary vectors)
+    """
+    if embedding_format == "array":
+        return vector.tolist() if isinstance(vector, np.ndarray) else list(vector)
+
+    values = np.asarray(vector, dtype=np.float32).reshape(-1)
+    if embedding_format == "float32":
+        return Binary(bytes((FLOAT32_DTYPE, 0)) + values.astype("<f4").tobytes(), VECTOR_SUBTYPE)
+    if embedding_format == "int8":
+        # One scale per vector: cosine similarity ignores it, so it is not stored
+        scale = 127.0 / max(float(np.abs(values).max()), 1e-12)
+        codes = np.clip(np.rint(values * scale), -128, 127).astype(np.int8)
+        return Binary(bytes((INT8_DTYPE, 0)) + codes.tobytes(), VECTOR_SUBTYPE)
+    raise ValueError(f"Unknown embedding format: {embedding_format}")
+
+
+def decode_vector(value) -> Optional[np.ndarray]:
+    """Decode a stored embedding in any format to float32; None when missing."""
+    if value is None:
+        return None
+    if isinstance(value, Binary) and value.subtype == VECTOR_SUBTYPE:
+        data = bytes(value)
+        dtype, padding = data[0], data[1]
+        if dtype == FLOAT32_DTYPE:
+            return np.frombuffer(data, dtype="<f4", offset=2).astype(np.float32)
+        if dtype == INT8_DTYPE:
+            return np.frombuffer(data, dtype=np.int8, offset=2).astype(np.float32)
+        if dtype == PACKED_BIT_DTYPE:
+            bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8, offset=2))
+            return bits[:bits.size - padding].astype(np.float32)
+        raise ValueError(f"Unknown binary vector dtype: {dtype:#x}")
+    return np.asarray(value, dtype=np.float32)
+
+
+def vector_format(value) -> Optional[str]:
+    """Storage format of an embedding as returned by MongoDB."""
+    if value is None:
+        return None
+    if isinstance(value, Binary) and value.subtype == VECTOR_SUBTYPE:
+        return {FLOAT32_DTYPE: "float32", INT8_DTYPE: "int8"}.get(bytes(value)[0], "binary")
+    return "array"
@@ -3,13 +3,27 @@ import mimetypes
 # from PIL import Image
 # import pytesseract
 import io
+import codecs
+import logging
 from services.indexer.indexer import TextIndexer
+from services.metrics.stage_metrics import stage, timed_iter
+
+logger = logging.getLogger(__name__)
+
+
 class FileProcesser:
 
-    def __init__(self):
-        self.indexer = TextIndexer()
+    def __init__(self, indexer: TextIndexer = None):
+        self._indexer = indexer
 
-    def process(self, file_bytes, source) -> None:
+    @property
+    def indexer(self) -> TextIndexer:
+        # Created on first use so extraction-only processers do not load the model
+        if self._indexer is None:
+            self._indexer = TextIndexer()
+        return self._indexer
+
+    def process(self, file_bytes, source, progress=None) -> None:
         source  = str(source)
         file_type = self.detect_file_type(str(source))
 
@@ -19,22 +33,79 @@ class FileProcesser:
         "raw_text": None,
         }
 
-        if file_type == "image":
-            result["raw_text"] = self.ocr_image(file_bytes)
+        with stage("ingest", "extract"):
+            if file_type == "image":
+                result["raw_text"] = self.ocr_image(file_bytes)
 
-        elif file_type == "pdf":
-            result["raw_text"] = self.ocr_pdf(file_bytes)
+            elif file_type == "pdf":
+                result["raw_text"] = self.ocr_pdf(file_bytes)
 
-        else:
-            result["raw_text"] = file_bytes.decode(errors="ignore")
+            else:
+                result["raw_text"] = file_bytes.decode(errors="ignore")
 
         if not result["raw_text"]:
             raise Exception("No text extracted from the file or invalid source")
         print("Indexing extracted text...")
-        index_response = self.indexer.process(result["raw_text"], source=source)
+        index_response = self.indexer.process(result["raw_text"], source=source, progress=progress)
         print("Indexing completed.")
         return index_response
 
+    def process_source(self, file_source, progress=None) -> dict:
+        """Stream a FileSource through the indexer without loading it into memory."""
+        blocks, filename, source_link = file_source.stream()
+        source = str(source_link or filename)
+        file_type = self.detect_file_type(source)
+
+        if file_type in ("image", "pdf"):
+            # OCR needs the whole file
+            return self.process(b"".join(blocks), source, progress=progress)
+
+        logger.info(f"Indexing streamed text of {source}")
+        text_blocks = timed_iter(self.decode_blocks(blocks), "ingest", "extract")
+        index_response = self.indexer.process_stream(text_blocks, source=source, progress=progress)
+        logger.info(f"Indexing of {source} completed")
+        return index_response
+
+    def reindex_source(self, file_source, progress=None) -> dict:
+        """Re-index a new version of a source, touching only the chunks that changed."""
+        blocks, filename, source_link = file_source.stream()
+        source = str(source_link or filename)
+        file_type = self.detect_file_type(source)
+
+        if file_type == "image":
+            with stage("ingest", "extract"):
+                text_blocks = [self.ocr_image(b"".join(blocks))]
+        elif file_type == "pdf":
+            with stage("ingest", "extract"):
+                text_blocks = [self.ocr_pdf(b"".join(blocks))]
+        else:
+            text_blocks = timed_iter(self.decode_blocks(blocks), "ingest", "extract")
+
+        logger.info(f"Re-indexing {source}")
+        return self.indexer.reindex(text_blocks, source=source, progress=progress)
+
+    def extract_text(self, file_source):
+        """Read a FileSource to text. Returns (text, source)."""
+        blocks, filename, source_link = file_source.stream()
+        source = str(source_link or filename)
+        file_type = self.detect_file_type(source)
+        if file_type == "image":
+            return self.ocr_image(b"".join(blocks)), source
+        if file_type == "pdf":
+            return self.ocr_pdf(b"".join(blocks)), source
+        return "".join(self.decode_blocks(blocks)), source
+
+    def decode_blocks(self, blocks):
+        """Decode byte blocks incrementally so multi-byte characters may span blocks."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        for block in blocks:
+            text = decoder.decode(block)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
     def detect_file_type(self,source):
         mime = mimetypes.guess_type(source)[0]
 
@@ -1,5 +1,10 @@
+import os
 import requests
 import re
+import tempfile
+
+STREAM_BLOCK_SIZE = 1024 * 1024
+
 class FileSource:
     def load(self):
         """
@@ -7,6 +12,14 @@ class FileSource:
         """
         raise NotImplementedError
 
+    def stream(self, block_size=STREAM_BLOCK_SIZE):
+        """
+        Returns tuple: (iterator of byte blocks, filename, source_link)
+        Sources that cannot stream fall back to a single block.
+        """
+        file_bytes, filename, source_link = self.load()
+        return iter([file_bytes]), filename, source_link
+
 class UploadedFileSource(FileSource):
     def __init__(self, file):
         self.file = file
@@ -14,6 +27,13 @@ class UploadedFileSource(FileSource):
     def load(self):
         return self.file.read(), self.file.filename, None
 
+    def spool(self):
+        """Save the upload to a temporary file so it can be processed after the request ends."""
+        fd, path = tempfile.mkstemp(prefix="upload-", suffix=os.path.splitext(self.file.filename or "")[1])
+        with os.fdopen(fd, "wb") as f:
+            self.file.save(f)
+        return TempFileSource(path, self.file.filename)
+
 
 
 class URLFileSource(FileSource):
@@ -27,6 +47,13 @@ class URLFileSource(FileSource):
         filename = self.url.split("/")[-1]
         return resp.content, filename, self.url
 
+    def stream(self, block_size=STREAM_BLOCK_SIZE):
+        resp = requests.get(self.url, stream=True)
+        resp.raise_for_status()
+
+        filename = self.url.split("/")[-1]
+        return resp.iter_content(block_size), filename, self.url
+
 
 
 class GoogleDriveFileSource(FileSource):
@@ -35,6 +62,16 @@ class GoogleDriveFileSource(FileSource):
         self.drive_url = drive_url
 
     def load(self):
+        response, filename = self._open()
+        file_bytes = response.content
+
+        return file_bytes, filename, self.drive_url
+
+    def stream(self, block_size=STREAM_BLOCK_SIZE):
+        response, filename = self._open()
+        return response.iter_content(block_size), filename, self.drive_url
+
+    def _open(self):
         file_id = self.extract_file_id(self.drive_url)
         url = "https://drive.google.com/uc?export=download"
         
@@ -50,10 +87,7 @@ class GoogleDriveFileSource(FileSource):
                 stream=True
             )
 
-        file_bytes = response.content
-        filename = f"{file_id}.file"
-
-        return file_bytes, filename, self.drive_url
+        return response, f"{file_id}.file"
 
     def _get_confirm_token(self, response):
         for key, value in response.cookies.items():
@@ -83,6 +117,46 @@ class LocalFileSource(FileSource):
         with open(self.path, "rb") as f:
             return f.read(), self.path.split("/")[-1], None
 
+    def stream(self, block_size=STREAM_BLOCK_SIZE):
+        return self._read_blocks(block_size), self.path.split("/")[-1], None
+
+    def _read_blocks(self, block_size):
+        with open(self.path, "rb") as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                yield block
+
+
+class TempFileSource(LocalFileSource):
+    """Spooled upload that is deleted once it has been read."""
+
+    def __init__(self, path, filename, source_link=None):
+        super().__init__(path)
+        self.filename = filename
+        self.source_link = source_link
+
+    def load(self):
+        try:
+            file_bytes, _, _ = super().load()
+            return file_bytes, self.filename, self.source_link
+        finally:
+            self.cleanup()
+
+    def stream(self, block_size=STREAM_BLOCK_SIZE):
+        return self._read_blocks(block_size), self.filename, self.source_link
+
+    def _read_blocks(self, block_size):
+        try:
+            yield from super()._read_blocks(block_size)
+        finally:
+            self.cleanup()
+
+    def cleanup(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
 
 
 def file_source_factory(request):
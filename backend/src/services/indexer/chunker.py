@@ -1,5 +1,6 @@
 import re
-from typing import List, Dict
+import zlib
+from typing import List, Dict, Iterable, Iterator
 
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -7,15 +8,17 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 
 class TextChunker:
-    def __init__(self, chunk_size: int = 800, overlap: int = 120, mode: str = "char"):
+    def __init__(self, chunk_size: int = 800, overlap: int = 120, mode: str = "char", window_size: int = 64 * 1024):
         """
         :param chunk_size: Max size of each chunk
         :param overlap: Overlapping characters between chunks
-        :param mode: "char" | "sentence" | "paragraph"
+        :param mode: "char" | "sentence" | "paragraph" | "content"
+        :param window_size: Characters buffered at a time by chunk_stream
         """
         self.chunk_size = chunk_size
         self.overlap = overlap
         self.mode = mode
+        self.window_size = window_size
 
     def clean_text(self, text: str) -> str:
         """Normalize whitespace and remove noise."""
@@ -45,7 +48,7 @@ class TextChunker:
         idx = 0
 
         for s in sentences:
-            if len(current_chunk) + len(s) <= self.chunk_size:
+            if len(current_chunk) + len(s) <= self.chunk_size or not current_chunk.strip():
                 current_chunk += s + " "
             else:
                 chunks.append({
@@ -75,7 +78,7 @@ class TextChunker:
         idx = 0
 
         for p in paragraphs:
-            if len(curr) + len(p) <= self.chunk_size:
+            if len(curr) + len(p) <= self.chunk_size or not curr.strip():
                 curr += p + " "
             else:
                 chunks.append({
@@ -93,6 +96,44 @@ class TextChunker:
 
         return chunks
 
+    def chunk_by_content(self, text: str) -> List[str]:
+        """
+        Content-defined chunking: cut after words whose hash hits a target.
+
+        Boundaries depend only on nearby words, not on the offset from the
+        start, so an edit changes the chunks around it and the boundaries after
+        it line up again. That keeps content hashes stable across versions and
+        overlapping documents. Chunks are at most chunk_size characters and do
+        not overlap; runs without spaces longer than that (CJK text, base64)
+        are cut into chunk_size windows from the start of the run.
+        """
+        min_size = self.chunk_size // 4
+        # About 6 characters per word, so cuts land near chunk_size / 2 on average
+        divisor = max(2, (self.chunk_size // 2 - min_size) // 6)
+        chunks = []
+        current = []
+        length = 0
+        for word in text.split(" "):
+            while len(word) > self.chunk_size:
+                if current:
+                    chunks.append(" ".join(current))
+                    current, length = [], 0
+                chunks.append(word[:self.chunk_size])
+                word = word[self.chunk_size:]
+            if current and length + len(word) > self.chunk_size:
+                chunks.append(" ".join(current))
+                current, length = [], 0
+            # Only words of the current chunk count, so cuts do not depend on the text before it
+            previous = current[-1] if current else ""
+            current.append(word)
+            length += len(word) + 1
+            if length >= min_size and zlib.crc32(f"{previous} {word}".encode("utf-8")) % divisor == 0:
+                chunks.append(" ".join(current))
+                current, length = [], 0
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+
     def chunk(self, text: str) -> List[Dict]:
         text = self.clean_text(text)
 
@@ -103,6 +144,57 @@ class TextChunker:
             return self.chunk_by_sentences(text)
         if self.mode == "paragraph":
             return self.chunk_by_paragraphs(text)
+        if self.mode == "content":
+            return self.chunk_by_content(text)
 
         # default = char-based chunking
         return self.chunk_by_chars(text)
+
+    def chunk_stream(self, text_blocks: Iterable[str]) -> Iterator[str]:
+        """
+        Chunk text arriving in blocks while holding at most about one window in memory.
+
+        Each window is split with the configured mode; every chunk but the last
+        is emitted and the text from the start of the last one is carried into
+        the next window, where it is split again together with the new text, so
+        the chunks are the same as chunking the whole text at once.
+        """
+        buffer = ""
+        carried = False
+        for block in text_blocks:
+            buffer = re.sub(r"\s+", " ", buffer + block)
+            if not carried:
+                buffer = buffer.lstrip()
+            if len(buffer) < self.window_size:
+                continue
+            # Chunk whole words only; the word cut by the block edge waits for the next block.
+            # Text without spaces (CJK, base64) is cut anyway, so the buffer stays bounded.
+            end = buffer.rfind(" ")
+            if end <= 0 or len(buffer) - end > self.chunk_size:
+                end = len(buffer)
+            window, tail = buffer[:end], buffer[end:]
+            chunks = self._chunk_texts(window)
+            for chunk in chunks[:-1]:
+                yield chunk
+            # Carry the raw text from the start of the last chunk, not the
+            # stripped chunk, so words at the window edge stay separated
+            start = window.rfind(chunks[-1]) if chunks else -1
+            if start > 0 and self.mode not in ("sentence", "paragraph", "content") and window[start - 1] == " ":
+                # The character splitter counts the separator before a piece as part of it
+                start -= 1
+            buffer = window[max(start, 0):] + tail
+            carried = True
+
+        buffer = buffer.rstrip()
+        if buffer.strip():
+            yield from self._chunk_texts(buffer)
+
+    def _chunk_texts(self, text: str) -> List[str]:
+        """Chunk already cleaned text and return only the chunk strings."""
+        if self.mode == "sentence":
+            return [c["text"] for c in self.chunk_by_sentences(text)]
+        if self.mode == "paragraph":
+            return [c["text"] for c in self.chunk_by_paragraphs(text)]
+        if self.mode == "content":
+            return self.chunk_by_content(text)
+        return self.chunk_by_chars(text)
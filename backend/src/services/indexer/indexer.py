@@ -1,69 +1,404 @@
-from services.models.embedding_model import EmbeddingModel
+import hashlib
+import os
+import uuid
+from datetime import datetime
+from itertools import islice
+import numpy as np
+from pymongo import DeleteOne, UpdateOne
+from services.models.embedding_model import EmbeddingModel, DEFAULT_BATCH_SIZE
+from services.models.model_registry import get_embedding_model
 from services.indexer.chunker import TextChunker
 from services.classifiers.topic_classifier import TopicClassifier
 from services.classifiers.project_classifier import ProjectClassifier
 from services.classifiers.team_classifier import TeamClassifier
 from services.db_handler.mongodb_handler import MongoDBHandler
+from services.metrics.stage_metrics import stage, timed_iter, timed_stage
 import logging
 
 logger = logging.getLogger(__name__)
 
+INGEST_INSERT_BATCH_SIZE = int(os.getenv("INGEST_INSERT_BATCH_SIZE", "256"))
+# What to do with chunks already stored: "link" adds the new source to them, "skip" ignores them
+INGEST_DUPLICATES = os.getenv("INGEST_DUPLICATES", "link")
+# "content" chunk boundaries survive edits, so re-indexing and deduplication only touch changed text
+INGEST_CHUNK_MODE = os.getenv("INGEST_CHUNK_MODE", "char")
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Collapse whitespace only; case is kept, since "US" and "us" are different chunks."""
+    return " ".join(text.split())
+
+
+def content_hash(text: str, model_name: str) -> str:
+    """Identity of a chunk: its whitespace-normalized text embedded by model_name."""
+    return hashlib.sha256(f"{model_name}\0{normalize_chunk_text(text)}".encode("utf-8")).hexdigest()
+
+
 class TextIndexer:
     
-    def __init__(self, mongodb_handler: MongoDBHandler = None):
-        self.embedding_model = EmbeddingModel()
-        self.text_chunker = TextChunker()
+    def __init__(self, mongodb_handler: MongoDBHandler = None, embedding_model: EmbeddingModel = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, insert_batch_size: int = INGEST_INSERT_BATCH_SIZE,
+                 duplicates: str = INGEST_DUPLICATES):
+        self.embedding_model = embedding_model or get_embedding_model()
+        self.batch_size = batch_size
+        self.insert_batch_size = insert_batch_size
+        self.duplicates = duplicates
+        self.text_chunker = TextChunker(mode=INGEST_CHUNK_MODE)
         self.db_handler = mongodb_handler or MongoDBHandler()
 
-    def process(self, text: str, filename=None, source= None) -> dict:
-        topic_classifier = TopicClassifier()
-        project_classifier = ProjectClassifier()
-        team_classifier = TeamClassifier()
-        project= project_classifier.categorize(text)
-        team = team_classifier.categorize(text)
-        chunks  = self.text_chunker.chunk(text)
+    def process(self, text: str, filename=None, source= None, progress=None) -> dict:
+        """
+        Chunk, classify, embed and persist a document.
+
+        :param progress: Optional callable receiving keyword counters
+            (chunks_total, chunks_embedded, chunks_inserted) as work advances
+        """
+        topic_classifier = TopicClassifier(self.embedding_model)
+        project_classifier = ProjectClassifier(self.embedding_model)
+        team_classifier = TeamClassifier(self.embedding_model)
+        with stage("ingest", "chunk"):
+            chunks  = self.text_chunker.chunk(text)
+        if progress:
+            progress(chunks_total=len(chunks))
+
+        # Embed every new chunk once; the classifiers reuse these vectors
+        embeddings, hashes, new_rows, duplicate_hashes = self.embed_new_chunks(chunks, progress=progress)
+        with stage("ingest", "classify"):
+            doc_embedding = self.document_embedding(embeddings)
+            project= project_classifier.categorize(text, embedding=doc_embedding)
+            team = team_classifier.categorize(text, embedding=doc_embedding)
+
+            topics, _ = topic_classifier.categorize_batch(embeddings[new_rows]) if new_rows else ([], [])
+
         nodes = []
-        for chunk in chunks:
-            topic = topic_classifier.categorize(chunk)
+        for row, topic in zip(new_rows, topics):
             nodes.append({
-                "text": chunk,
+                "text": chunks[row],
                 "topic": topic,
                 "project": project,
                 "team": team,
                 "source": source,
-                "filename": filename
+                "filename": filename,
+                "embedding": embeddings[row],
+                "content_hash": hashes[row]
             })
-        embeddings = [self.embedding_model.encode(chunk, convert_to_tensor=False).tolist() for chunk in chunks]
-
-        for node,embedding in zip(nodes,embeddings):
-            node["embedding"] = embedding
 
         db_operation_response = self.persist_to_db(nodes)
+        if db_operation_response.get("success"):
+            db_operation_response["duplicate_count"] = len(chunks) - len(new_rows)
+            self._link_duplicates(duplicate_hashes, source)
+        if progress and db_operation_response.get("success"):
+            progress(chunks_inserted=db_operation_response["inserted_count"])
         print("DB ingestion response:", db_operation_response)
         return db_operation_response
 
+    def process_stream(self, text_blocks, filename=None, source=None, progress=None) -> dict:
+        """
+        Chunk, embed and persist text arriving in blocks with bounded memory.
+
+        Chunks are embedded and inserted in batches of insert_batch_size as
+        they are produced. Project and team are document-level labels, so they
+        are computed from running aggregates and set on all chunks of this
+        ingest at the end; until then the chunks are marked ingest_pending and
+        searches skip them. A failed ingest deletes its chunks and removes the
+        source from the existing chunks it was linked to.
+        """
+        ingest_id = uuid.uuid4().hex
+        topic_classifier = TopicClassifier(self.embedding_model)
+        project_classifier = ProjectClassifier(self.embedding_model)
+        team_classifier = TeamClassifier(self.embedding_model)
+
+        chunk_count = 0
+        inserted_count = 0
+        duplicate_count = 0
+        embedding_sum = None
+        team_hits = {}
+        linked_hashes = set()
+        try:
+            if self.duplicates == "link" and source:
+                # Chunks already listing this source were not linked by this ingest, so a rollback keeps them
+                already_linked = {doc.get("content_hash") for doc in self.db_handler.find_source_chunks(str(source))}
+            chunks = timed_iter(self.text_chunker.chunk_stream(text_blocks), "ingest", "chunk")
+            while True:
+                batch = list(islice(chunks, self.insert_batch_size))
+                if not batch:
+                    break
+                chunk_count += len(batch)
+                if progress:
+                    progress(chunks_total=chunk_count)
+
+                embeddings, hashes, new_rows, duplicate_hashes = self.embed_new_chunks(batch)
+                if progress:
+                    progress(chunks_embedded=chunk_count)
+                with stage("ingest", "classify"):
+                    topics, _ = topic_classifier.categorize_batch(embeddings[new_rows]) if new_rows else ([], [])
+
+                    normalized = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+                    batch_sum = normalized.sum(axis=0)
+                    embedding_sum = batch_sum if embedding_sum is None else embedding_sum + batch_sum
+                    for chunk in batch:
+                        for team, keywords in team_classifier.keyword_hits(chunk).items():
+                            team_hits.setdefault(team, set()).update(keywords)
+
+                documents = [
+                    self._build_document({
+                        "text": batch[row],
+                        "topic": topic,
+                        "project": None,
+                        "team": None,
+                        "source": source,
+                        "embedding": embeddings[row],
+                        "content_hash": hashes[row],
+                    }, ingest_id=ingest_id)
+                    for row, topic in zip(new_rows, topics)
+                ]
+                with stage("ingest", "insert"):
+                    if documents:
+                        inserted_count += len(self.db_handler.insert_documents(documents, ignore_duplicates=True))
+                    self._link_duplicates(duplicate_hashes, source)
+                if self.duplicates == "link" and source:
+                    linked_hashes.update(h for h in duplicate_hashes if h not in already_linked)
+                duplicate_count += len(batch) - len(new_rows)
+                if progress:
+                    progress(chunks_inserted=inserted_count)
+
+            if chunk_count == 0:
+                raise Exception("No text extracted from the file or invalid source")
+
+            with stage("ingest", "classify"):
+                doc_embedding = embedding_sum / chunk_count
+                project = project_classifier.categorize(None, embedding=doc_embedding)
+                team = team_classifier.categorize_hits(team_hits, embedding=doc_embedding)
+            with stage("ingest", "insert"):
+                self.db_handler.update_documents({"ingest_id": ingest_id},
+                                                 {"project": project, "team": team, "ingest_pending": False})
+
+            logger.info(f"Successfully streamed {inserted_count} nodes to database")
+            return {
+                "success": True,
+                "ingest_id": ingest_id,
+                "inserted_count": inserted_count,
+                "duplicate_count": duplicate_count,
+                "message": f"Successfully indexed {inserted_count} document chunks"
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to stream nodes to database: {e}")
+            if inserted_count:
+                # Do not leave a partially indexed document behind
+                try:
+                    self.db_handler.delete_documents({"ingest_id": ingest_id})
+                except Exception as cleanup_e:
+                    logger.error(f"Failed to remove partial ingest {ingest_id}: {cleanup_e}")
+            if linked_hashes:
+                try:
+                    self.db_handler.unlink_sources(linked_hashes, str(source))
+                except Exception as cleanup_e:
+                    logger.error(f"Failed to unlink {source} from duplicate chunks: {cleanup_e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "message": "Failed to index documents"
+            }
+
+    def reindex(self, text_blocks, source, progress=None) -> dict:
+        """
+        Bring the chunks stored for source in line with a new version of it.
+
+        Chunks are matched by content hash: unchanged ones are left alone,
+        new ones are embedded and inserted, and ones no longer in the source
+        are deleted, or only unlinked when other sources share them. Chunks
+        stored before content hashes existed are replaced once.
+        """
+        source = str(source)
+        try:
+            chunks = list(timed_iter(self.text_chunker.chunk_stream(text_blocks), "ingest", "chunk"))
+            if not chunks:
+                raise Exception("No text extracted from the file or invalid source")
+            if progress:
+                progress(chunks_total=len(chunks))
+
+            stored = self.db_handler.find_source_chunks(source)
+            stored_hashes = {doc["content_hash"] for doc in stored if doc.get("content_hash")}
+
+            embeddings, hashes, new_rows, duplicate_hashes = self.embed_new_chunks(chunks, progress=progress)
+            with stage("ingest", "classify"):
+                doc_embedding = self.document_embedding(embeddings)
+                project = ProjectClassifier(self.embedding_model).categorize(None, embedding=doc_embedding)
+                team_classifier = TeamClassifier(self.embedding_model)
+                team_hits = {}
+                for chunk in chunks:
+                    for team, keywords in team_classifier.keyword_hits(chunk).items():
+                        team_hits.setdefault(team, set()).update(keywords)
+                team = team_classifier.categorize_hits(team_hits, embedding=doc_embedding)
+                topics, _ = TopicClassifier(self.embedding_model).categorize_batch(embeddings[new_rows]) if new_rows else ([], [])
+
+            # Insert before removing so the source never disappears from search
+            inserted_count = 0
+            if new_rows:
+                documents = [
+                    self._build_document({
+                        "text": chunks[row],
+                        "topic": topic,
+                        "project": project,
+                        "team": team,
+                        "source": source,
+                        "embedding": embeddings[row],
+                        "content_hash": hashes[row],
+                    })
+                    for row, topic in zip(new_rows, topics)
+                ]
+                with stage("ingest", "insert"):
+                    inserted_count = len(self.db_handler.insert_documents(documents, ignore_duplicates=True))
+            if progress:
+                progress(chunks_inserted=inserted_count)
+            with stage("ingest", "insert"):
+                self.db_handler.link_sources([h for h in duplicate_hashes if h not in stored_hashes], source)
+
+            current_hashes = set(hashes)
+            now = datetime.utcnow()
+            requests = []
+            deleted_ids = []
+            for doc in stored:
+                if doc.get("content_hash") in current_hashes:
+                    continue
+                remaining = [s for s in doc.get("sources") or [] if s != source]
+                if not remaining:
+                    requests.append(DeleteOne({"_id": doc["_id"]}))
+                    deleted_ids.append(doc["_id"])
+                else:
+                    primary = doc.get("source") if doc.get("source") != source else remaining[0]
+                    requests.append(UpdateOne(
+                        {"_id": doc["_id"]},
+                        {"$set": {"sources": remaining, "source": primary, "updated_at": now}}
+                    ))
+            deleted_count = len(deleted_ids)
+            with stage("ingest", "insert"):
+                self.db_handler.bulk_write(requests, deleted_ids=deleted_ids)
+
+                # Document-level labels may have moved with the edit
+                self.db_handler.update_documents(
+                    {"source": source, "$or": [{"project": {"$ne": project}}, {"team": {"$ne": team}}]},
+                    {"project": project, "team": team}
+                )
+
+            unchanged_count = len(current_hashes & stored_hashes)
+            logger.info(f"Re-indexed {source}: {inserted_count} inserted, {deleted_count} deleted, "
+                        f"{len(requests) - deleted_count} unlinked, {unchanged_count} unchanged")
+            return {
+                "success": True,
+                "source": source,
+                "inserted_count": inserted_count,
+                "deleted_count": deleted_count,
+                "unlinked_count": len(requests) - deleted_count,
+                "unchanged_count": unchanged_count,
+                "message": f"Re-indexed {source}: {inserted_count} chunks added, {len(requests)} removed"
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to re-index {source}: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "message": "Failed to re-index source"
+            }
+
+    @timed_stage("ingest", "embed")
+    def embed_new_chunks(self, chunks: list, progress=None):
+        """
+        Embed the chunks that are not stored yet and reuse stored embeddings for the rest.
+
+        Returns:
+            Tuple of (embeddings of all chunks, content hashes, rows of the
+            chunks to insert, hashes of the chunks already stored)
+        """
+        model_name = getattr(self.embedding_model, "model_name", "")
+        hashes = [content_hash(chunk, model_name) for chunk in chunks]
+        stored = {
+            chunk_hash: vector
+            for chunk_hash, vector in self.db_handler.find_embeddings_by_content_hash(set(hashes)).items()
+            if vector is not None
+        }
+
+        # First occurrence of each unseen hash; repeats within the batch reuse its vector
+        first_row = {}
+        for row, chunk_hash in enumerate(hashes):
+            if chunk_hash not in stored and chunk_hash not in first_row:
+                first_row[chunk_hash] = row
+        new_rows = list(first_row.values())
+
+        new_embeddings = self.embed_chunks([chunks[row] for row in new_rows], progress=progress)
+        if not chunks:
+            return new_embeddings, hashes, new_rows, []
+        dim = new_embeddings.shape[1] if len(new_rows) else len(next(iter(stored.values())))
+        embeddings = np.empty((len(chunks), dim), dtype=np.float32)
+        vectors = {chunk_hash: new_embeddings[i] for i, chunk_hash in enumerate(first_row)}
+        vectors.update(stored)
+        for row, chunk_hash in enumerate(hashes):
+            embeddings[row] = vectors[chunk_hash]
+        if stored:
+            logger.info(f"Reusing stored embeddings for {len(chunks) - len(new_rows)} of {len(chunks)} chunks")
+        return embeddings, hashes, new_rows, list(stored)
+
+    @timed_stage("ingest", "insert")
+    def _link_duplicates(self, duplicate_hashes: list, source):
+        if self.duplicates == "link" and duplicate_hashes and source:
+            self.db_handler.link_sources(duplicate_hashes, str(source))
+
+    def embed_chunks(self, chunks: list, progress=None) -> np.ndarray:
+        """Encode all chunks in batched forward passes."""
+        if not chunks:
+            return np.empty((0, 0), dtype=np.float32)
+        batches = []
+        for start in range(0, len(chunks), self.batch_size):
+            batch = chunks[start:start + self.batch_size]
+            embeddings = self.embedding_model.encode(batch, convert_to_tensor=False, batch_size=self.batch_size)
+            batches.append(np.asarray(embeddings, dtype=np.float32))
+            if progress:
+                progress(chunks_embedded=start + len(batch))
+        return np.vstack(batches)
+
+    def document_embedding(self, embeddings: np.ndarray):
+        """Mean of the normalized chunk embeddings, used for document-level classification."""
+        if len(embeddings) == 0:
+            return None
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        normalized = embeddings / np.maximum(norms, 1e-12)
+        return normalized.mean(axis=0)
+
+    def _build_document(self, node: dict, ingest_id: str = None) -> dict:
+        """Format a node for database insertion."""
+        # Convert source object to string representation
+        source_str = str(node["source"]) if node["source"] else None
+
+        document = {
+            "text": node["text"],
+            "topic": node["topic"],
+            "project": node["project"],
+            "team": node["team"],
+            "embedding": node["embedding"],
+            "source": source_str,
+            "title": node.get("title", None),
+        }
+        if node.get("content_hash"):
+            document["content_hash"] = node["content_hash"]
+            document["sources"] = [source_str] if source_str else []
+        if ingest_id:
+            document["ingest_id"] = ingest_id
+            # Hidden from search until the ingest sets its document-level labels
+            document["ingest_pending"] = True
+        return document
+
+    @timed_stage("ingest", "insert")
     def persist_to_db(self, nodes: list) -> dict:
         """Persist nodes to MongoDB database."""
         try:
             # Format nodes for database insertion
-            documents = []
-            for node in nodes:
-                # Convert source object to string representation
-                source_str = str(node["source"]) if node["source"] else None
-                
-                document = {
-                    "text": node["text"],
-                    "topic": node["topic"],
-                    "project": node["project"],
-                    "team": node["team"],
-                    "embedding": node["embedding"],
-                    "source": source_str,
-                    "title": node.get("title", None),
-                }
-                documents.append(document)
+            documents = [self._build_document(node) for node in nodes]
             
             # Insert documents using MongoDB handler
-            inserted_ids = self.db_handler.insert_documents(documents)
+            # Every chunk may already be stored
+            inserted_ids = self.db_handler.insert_documents(documents, ignore_duplicates=True) if documents else []
             print("Inserted document IDs:", inserted_ids)
             logger.info(f"Successfully persisted {len(inserted_ids)} nodes to database")
             
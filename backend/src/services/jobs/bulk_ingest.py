@@ -0,0 +1,289 @@
+"""
+Parallel bulk ingestion of directory trees and JSONL manifests
+"""
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from services.file_upload.file_upload_handler import GoogleDriveFileSource, LocalFileSource, URLFileSource
+from services.file_upload.file_processer import FileProcesser
+from services.indexer.chunker import TextChunker
+from services.indexer.indexer import INGEST_CHUNK_MODE, TextIndexer
+from services.classifiers.topic_classifier import TopicClassifier
+from services.classifiers.project_classifier import ProjectClassifier
+from services.classifiers.team_classifier import TeamClassifier
+
+logger = logging.getLogger(__name__)
+
+BULK_EXTRACT_WORKERS = int(os.getenv("BULK_EXTRACT_WORKERS", str(os.cpu_count() or 2)))
+BULK_ENCODE_BATCH = int(os.getenv("BULK_ENCODE_BATCH", "1024"))
+BULK_INSERT_WORKERS = int(os.getenv("BULK_INSERT_WORKERS", "4"))
+
+
+def iter_directory(root: str) -> Iterator[Dict[str, str]]:
+    """Every file under root, in a stable order."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not filename.startswith("."):
+                yield {"path": os.path.join(dirpath, filename)}
+
+
+def iter_manifest(path: str) -> Iterator[Dict[str, str]]:
+    """Items of a JSONL manifest; each line has one of "path", "url" or "drive_url"."""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if not any(key in item for key in ("path", "url", "drive_url")):
+                raise ValueError(f"Manifest line {line_number} has no path, url or drive_url")
+            yield item
+
+
+def item_key(item: Dict[str, str]) -> str:
+    return item.get("path") or item.get("url") or item.get("drive_url")
+
+
+def extract_item(item: Dict[str, str]) -> Dict[str, Any]:
+    """Read and chunk one item. Runs in a worker process, so it only returns plain data."""
+    key = item_key(item)
+    try:
+        if "path" in item:
+            file_source = LocalFileSource(item["path"])
+        elif "url" in item:
+            file_source = URLFileSource(item["url"])
+        else:
+            file_source = GoogleDriveFileSource(item["drive_url"])
+        text, source = FileProcesser().extract_text(file_source)
+        chunks = list(TextChunker(mode=INGEST_CHUNK_MODE).chunk_stream([text or ""]))
+        if not chunks:
+            raise Exception("No text extracted from the file or invalid source")
+        return {"key": key, "source": item.get("source") or source, "chunks": chunks}
+    except Exception as e:
+        return {"key": key, "error": str(e)}
+
+
+class BulkIngester:
+    """
+    Three-stage ingest pipeline for backfills.
+
+    Worker processes read and chunk files; the calling thread owns the one
+    embedding model and encodes chunks of many documents per batch; a thread
+    pool writes finished batches with unordered insert_many. Each stage is
+    bounded so a slow stage holds back the ones before it instead of
+    buffering. Completed items are appended to a JSONL checkpoint and skipped
+    on the next run; an item interrupted mid-write is simply ingested again,
+    since chunks already stored are recognized by content hash.
+    """
+
+    def __init__(self, indexer: TextIndexer = None, extract_workers: int = BULK_EXTRACT_WORKERS,
+                 encode_batch: int = BULK_ENCODE_BATCH, insert_workers: int = BULK_INSERT_WORKERS,
+                 checkpoint_path: Optional[str] = None, report_interval: float = 10.0):
+        self.indexer = indexer or TextIndexer()
+        self.extract_workers = extract_workers
+        self.encode_batch = encode_batch
+        self.insert_workers = insert_workers
+        self.checkpoint_path = checkpoint_path
+        self.report_interval = report_interval
+        self.topic_classifier = TopicClassifier(self.indexer.embedding_model)
+        self.project_classifier = ProjectClassifier(self.indexer.embedding_model)
+        self.team_classifier = TeamClassifier(self.indexer.embedding_model)
+        self._lock = threading.Lock()
+        self.stats = {"docs": 0, "failed": 0, "skipped": 0, "chunks": 0, "inserted": 0, "duplicates": 0}
+        self._started = 0.0
+        self._last_report = 0.0
+
+    # ---------- Checkpoint ----------
+
+    def load_checkpoint(self) -> Set[str]:
+        """Keys of items completed by earlier runs."""
+        done = set()
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line of an interrupted run
+                    if entry.get("status") == "done":
+                        done.add(entry["key"])
+        return done
+
+    def _record(self, key: str, status: str, **fields):
+        if not self.checkpoint_path:
+            return
+        with self._lock, open(self.checkpoint_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "status": status, **fields}) + "\n")
+
+    # ---------- Pipeline ----------
+
+    def run(self, items: Iterable[Dict[str, str]]) -> Dict[str, Any]:
+        """Ingest items and return throughput stats."""
+        done = self.load_checkpoint()
+        self._started = self._last_report = time.monotonic()
+
+        def pending_items():
+            for item in items:
+                if item_key(item) in done:
+                    self.stats["skipped"] += 1
+                    continue
+                yield item
+
+        batch: List[Dict[str, Any]] = []
+        batch_chunks = 0
+        writes = []
+        # spawn: forking a process that holds the model and driver threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(self.extract_workers, mp_context=context) as extractors, \
+                ThreadPoolExecutor(self.insert_workers, thread_name_prefix="bulk-insert") as writers:
+            for extracted in self._extract(extractors, pending_items()):
+                if "error" in extracted:
+                    logger.warning(f"Skipping {extracted['key']}: {extracted['error']}")
+                    self.stats["failed"] += 1
+                    self._record(extracted["key"], "failed", error=extracted["error"])
+                    continue
+                batch.append(extracted)
+                batch_chunks += len(extracted["chunks"])
+                if batch_chunks >= self.encode_batch:
+                    writes = self._submit(writers, writes, batch)
+                    batch, batch_chunks = [], 0
+                self._report()
+            if batch:
+                writes = self._submit(writers, writes, batch)
+            for future in writes:
+                future.result()
+
+        return self._summary()
+
+    def _extract(self, executor, items: Iterator[Dict[str, str]]) -> Iterator[Dict[str, Any]]:
+        """Yield extracted items in completion order, keeping a bounded number in flight."""
+        in_flight = set()
+        for item in items:
+            in_flight.add(executor.submit(extract_item, item))
+            if len(in_flight) >= self.extract_workers * 2:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield future.result()
+        for future in in_flight:
+            yield future.result()
+
+    def _submit(self, writers, writes: list, batch: List[Dict[str, Any]]) -> list:
+        """Encode a batch and hand it to a writer, waiting when every writer is busy."""
+        payload = self._encode(batch)
+        running = []
+        for future in writes:
+            if future.done():
+                future.result()
+            else:
+                running.append(future)
+        writes = running
+        while len(writes) >= self.insert_workers:
+            finished, pending = wait(writes, return_when=FIRST_COMPLETED)
+            for future in finished:
+                future.result()
+            writes = list(pending)
+        writes.append(writers.submit(self._write, payload))
+        return writes
+
+    def _encode(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Embed the chunks of several documents at once and build their MongoDB documents."""
+        all_chunks = [chunk for doc in batch for chunk in doc["chunks"]]
+        embeddings, hashes, new_rows, _ = self.indexer.embed_new_chunks(all_chunks)
+        new_row_set = set(new_rows)
+        topics = {}
+        if new_rows:
+            new_topics, _ = self.topic_classifier.categorize_batch(embeddings[new_rows])
+            topics = dict(zip(new_rows, new_topics))
+
+        payload = []
+        offset = 0
+        for doc in batch:
+            rows = range(offset, offset + len(doc["chunks"]))
+            offset += len(doc["chunks"])
+            doc_embedding = self.indexer.document_embedding(embeddings[rows.start:rows.stop])
+            project = self.project_classifier.categorize(None, embedding=doc_embedding)
+            team = self.team_classifier.categorize(" ".join(doc["chunks"]), embedding=doc_embedding)
+            documents = [
+                self.indexer._build_document({
+                    "text": all_chunks[row],
+                    "topic": topics[row],
+                    "project": project,
+                    "team": team,
+                    "source": doc["source"],
+                    "embedding": embeddings[row],
+                    "content_hash": hashes[row],
+                })
+                for row in rows if row in new_row_set
+            ]
+            payload.append({
+                "key": doc["key"],
+                "source": doc["source"],
+                "chunks": len(rows),
+                "documents": documents,
+                "linked_hashes": sorted({hashes[row] for row in rows if row not in new_row_set}),
+            })
+        return payload
+
+    def _write(self, payload: List[Dict[str, Any]]):
+        """Insert and link a batch; documents not done when a write fails are recorded as failed."""
+        db_handler = self.indexer.db_handler
+        insert_batch_size = self.indexer.insert_batch_size
+        documents = [document for doc in payload for document in doc["documents"]]
+        done = []
+        try:
+            inserted_ids = set()
+            for start in range(0, len(documents), insert_batch_size):
+                inserted_ids.update(db_handler.insert_documents(documents[start:start + insert_batch_size],
+                                                                ignore_duplicates=True))
+            # Link after inserting: a repeated chunk may belong to a document of this same batch.
+            # Documents rejected by the unique index were inserted by a concurrent writer, so they link too.
+            for doc in payload:
+                rejected = [document["content_hash"] for document in doc["documents"]
+                            if str(document["_id"]) not in inserted_ids]
+                if self.indexer.duplicates == "link":
+                    db_handler.link_sources(doc["linked_hashes"] + rejected, doc["source"])
+                inserted = len(doc["documents"]) - len(rejected)
+                self._record(doc["key"], "done", chunks=doc["chunks"], inserted=inserted)
+                done.append((doc, inserted))
+        except Exception as e:
+            # Failed items are not checkpointed as done, so the next run retries them
+            failed = payload[len(done):]
+            logger.error(f"Writing {len(failed)} documents failed: {e}")
+            for doc in failed:
+                self._record(doc["key"], "failed", error=str(e))
+            with self._lock:
+                self.stats["failed"] += len(failed)
+
+        chunks = sum(doc["chunks"] for doc, _ in done)
+        inserted = sum(count for _, count in done)
+        with self._lock:
+            self.stats["docs"] += len(done)
+            self.stats["chunks"] += chunks
+            self.stats["inserted"] += inserted
+            self.stats["duplicates"] += chunks - inserted
+
+    # ---------- Reporting ----------
+
+    def _summary(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        with self._lock:
+            stats = dict(self.stats)
+        stats["elapsed_seconds"] = round(elapsed, 2)
+        stats["docs_per_second"] = round(stats["docs"] / elapsed, 2)
+        stats["chunks_per_second"] = round(stats["chunks"] / elapsed, 2)
+        return stats
+
+    def _report(self):
+        now = time.monotonic()
+        if now - self._last_report >= self.report_interval:
+            self._last_report = now
+            stats = self._summary()
+            logger.info(f"Bulk ingest: {stats['docs']} docs ({stats['docs_per_second']}/s), "
+                        f"{stats['chunks']} chunks ({stats['chunks_per_second']}/s), {stats['failed']} failed")
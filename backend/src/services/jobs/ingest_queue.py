@@ -0,0 +1,175 @@
+"""
+Background job queue for file ingestion
+"""
+import logging
+import os
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "20"))
+INGEST_JOB_RETENTION = int(os.getenv("INGEST_JOB_RETENTION", "1000"))
+
+
+class QueueFullError(Exception):
+    """Raised when the ingest queue has no room for another job."""
+
+
+@dataclass
+class IngestJob:
+    """State and progress of one queued upload."""
+
+    job_id: str
+    kind: str = "ingest"  # ingest | reindex
+    filename: Optional[str] = None
+    source: Optional[str] = None
+    status: str = "queued"  # queued | running | completed | failed
+    chunks_total: int = 0
+    chunks_embedded: int = 0
+    chunks_inserted: int = 0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def update_progress(self, **counters):
+        for key, value in counters.items():
+            setattr(self, key, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "filename": self.filename,
+            "source": self.source,
+            "status": self.status,
+            "progress": {
+                "chunks_total": self.chunks_total,
+                "chunks_embedded": self.chunks_embedded,
+                "chunks_inserted": self.chunks_inserted,
+            },
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class IngestQueue:
+    """
+    Bounded queue of uploads processed by a fixed pool of worker threads.
+
+    The pool size caps how many files are ingested concurrently and the queue
+    size caps how many wait; submit() raises QueueFullError beyond that so the
+    API can push back on clients instead of buffering without limit.
+    """
+
+    def __init__(self, processor_factory: Callable[[], Any], num_workers: int = INGEST_WORKERS,
+                 max_queued: int = INGEST_QUEUE_SIZE, retention: int = INGEST_JOB_RETENTION):
+        """
+        :param processor_factory: Returns an object with process_source(file_source, progress=...)
+            and reindex_source(file_source, progress=...)
+        :param num_workers: Number of jobs processed concurrently
+        :param max_queued: Number of jobs allowed to wait for a worker
+        :param retention: Number of jobs kept for status lookups
+        """
+        self.processor_factory = processor_factory
+        self.num_workers = num_workers
+        self.retention = retention
+        self._queue: "queue.Queue[Tuple[IngestJob, Any]]" = queue.Queue(maxsize=max_queued)
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            for i in range(self.num_workers):
+                worker = threading.Thread(target=self._run_worker, name=f"ingest-worker-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            self._started = True
+
+    def submit(self, file_source, filename: str = None, source: str = None, kind: str = "ingest") -> IngestJob:
+        """
+        Queue an upload.
+
+        :param file_source: FileSource streamed by the worker
+        :param kind: "ingest" to add the file, "reindex" to update a source already indexed
+        """
+        self.start()
+        job = IngestJob(job_id=uuid.uuid4().hex, kind=kind, filename=filename, source=source)
+        self._remember(job)
+        try:
+            self._queue.put_nowait((job, file_source))
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.job_id, None)
+            raise QueueFullError(f"Ingest queue is full ({self._queue.maxsize} jobs waiting)")
+        return job
+
+    def get_job(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "workers": self.num_workers,
+            "queued": self._queue.qsize(),
+            "max_queued": self._queue.maxsize,
+            "running": statuses.count("running"),
+            "completed": statuses.count("completed"),
+            "failed": statuses.count("failed"),
+        }
+
+    def _remember(self, job: IngestJob):
+        with self._lock:
+            self._jobs[job.job_id] = job
+            # Forget the oldest finished jobs beyond the retention limit
+            while len(self._jobs) > self.retention:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest.status in ("queued", "running"):
+                    break
+                del self._jobs[oldest_id]
+
+    def _run_worker(self):
+        processor = None
+        while True:
+            job, file_source = self._queue.get()
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            try:
+                if processor is None:
+                    processor = self.processor_factory()
+                handler = processor.reindex_source if job.kind == "reindex" else processor.process_source
+                result = handler(file_source, progress=job.update_progress)
+                if not result or not result.get("success", True):
+                    raise Exception((result or {}).get("error") or "File processing failed")
+                job.result = result
+                job.status = "completed"
+            except Exception as e:
+                logger.error(f"Ingest job {job.job_id} failed: {e}", exc_info=True)
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                # Spooled uploads delete themselves once read; a job that failed before that must do it
+                cleanup = getattr(file_source, "cleanup", None)
+                if cleanup is not None:
+                    try:
+                        cleanup()
+                    except OSError as e:
+                        logger.warning(f"Could not remove the upload of job {job.job_id}: {e}")
+                job.finished_at = datetime.utcnow()
+                self._queue.task_done()
@@ -0,0 +1,209 @@
+"""
+Per-stage latency histograms in Prometheus text format, and Server-Timing
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Seconds; spans sub-millisecond query stages up to long ingest inserts
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Prometheus histogram with one series per label tuple."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts (not cumulative) + overflow, sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], seconds: float):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, counts, total, count in sorted(snapshot):
+            label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+stage_duration = Histogram(
+    "search_app_stage_duration_seconds",
+    "Time spent in each query and ingest stage, excluding nested stages",
+    ("pipeline", "stage"),
+)
+request_duration = Histogram(
+    "search_app_request_duration_seconds",
+    "HTTP request latency",
+    ("method", "route", "status"),
+)
+
+
+def render_metrics() -> str:
+    """All histograms in the Prometheus text exposition format."""
+    lines = stage_duration.render() + request_duration.render()
+    return "\n".join(lines) + "\n"
+
+
+# ---------- Stage timing ----------
+
+# Stages of the current request, for its Server-Timing header
+_request_stages: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_stages", default=None
+)
+# Per-thread stack of nested stage time, so an outer stage excludes the inner ones
+_nesting = threading.local()
+
+
+def _observe(pipeline: str, name: str, seconds: float):
+    stage_duration.observe((pipeline, name), seconds)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((name, seconds))
+
+
+def _enter() -> float:
+    stack = getattr(_nesting, "stack", None)
+    if stack is None:
+        stack = _nesting.stack = []
+    stack.append(0.0)
+    return time.perf_counter()
+
+
+def _exit(start: float) -> float:
+    """Exclusive seconds since start; the total is credited to the enclosing stage."""
+    elapsed = time.perf_counter() - start
+    stack = _nesting.stack
+    inner = stack.pop()
+    if stack:
+        stack[-1] += elapsed
+    return elapsed - inner
+
+
+@contextmanager
+def stage(pipeline: str, name: str):
+    """Time a block as one stage."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = _enter()
+    try:
+        yield
+    finally:
+        _observe(pipeline, name, _exit(start))
+
+
+def timed_stage(pipeline: str, name: str):
+    """Decorator timing every call of a function as one stage."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(pipeline, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_iter(iterable: Iterable, pipeline: str, name: str) -> Iterator:
+    """
+    Yield from iterable, timing only the work done producing items.
+
+    Time spent by the consumer between items is not counted, so lazily
+    chained stages (e.g. extraction feeding chunking) are each credited with
+    their own share. The stage is observed once, when the iterator ends.
+    """
+    if not METRICS_ENABLED:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    elapsed = 0.0
+    try:
+        while True:
+            start = _enter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += _exit(start)
+            yield item
+    finally:
+        _observe(pipeline, name, elapsed)
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """executor.submit that keeps the caller's request context, so stages run there reach its Server-Timing."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+async def run_in_executor(executor, fn, *args):
+    """Await fn(*args) on executor, keeping the caller's request context like submit_in_context."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(contextvars.copy_context().run, fn, *args))
+
+
+def observe_stage(pipeline: str, name: str, seconds: float):
+    """
+    Record a stage timed by the caller.
+
+    For coroutines: stage() keeps its nesting per thread, so it must not be
+    held across an await.
+    """
+    if METRICS_ENABLED:
+        _observe(pipeline, name, seconds)
+
+
+# ---------- Request tracking ----------
+
+def begin_request():
+    """Start collecting stages for the current request."""
+    _request_stages.set([])
+
+
+def end_request() -> List[Tuple[str, float]]:
+    """Stages of the current request, summed per name in first-seen order."""
+    stages = _request_stages.get() or []
+    _request_stages.set(None)
+    totals: Dict[str, float] = {}
+    for name, seconds in stages:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return list(totals.items())
+
+
+def server_timing_header(stages: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in stages]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
@@ -1,12 +1,84 @@
+import logging
+import os
+import time
 from sentence_transformers import SentenceTransformer , util
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+DEFAULT_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+# torch | onnx (ONNX Runtime fp32) | onnx-int8 (dynamically quantized); onnx needs onnxruntime
+DEFAULT_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
 
 
 class EmbeddingModel:
-    def __init__(self, model_name="all-MiniLM-L6-v2"):
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, backend=DEFAULT_BACKEND):
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {backend}")
+        self.model_name = model_name
         self.model = SentenceTransformer(model_name)
+        self.backend = "torch"
+        self.onnx_encoder = None
+        if backend != "torch":
+            try:
+                from services.models.onnx_backend import OnnxEncoder  # optional dependency
+                self.onnx_encoder = OnnxEncoder(self.model, model_name, quantize=backend == "onnx-int8")
+                self.backend = backend
+            except ImportError as e:
+                logger.warning(f"{backend} backend unavailable ({e}), encoding with torch")
+            except Exception:
+                # A model the exporter or quantizer cannot handle should not stop the service
+                logger.exception(f"{backend} backend failed for {model_name}, encoding with torch")
+
+    def encode(self, texts, convert_to_tensor=False, batch_size=DEFAULT_BATCH_SIZE):
+        if self.onnx_encoder is None or convert_to_tensor:
+            return self.model.encode(texts, convert_to_tensor=convert_to_tensor, batch_size=batch_size)
+        return self.onnx_encoder.encode(texts, batch_size=batch_size)
 
-    def encode(self, texts, convert_to_tensor=False):
-        return self.model.encode(texts, convert_to_tensor=convert_to_tensor)
-    
     def compute_similarity(self, emb1, emb2):
-        return util.cos_sim(emb1, emb2)
\ No newline at end of file
+        return util.cos_sim(emb1, emb2)
+
+
+def compare_backends(texts, model_name=DEFAULT_MODEL_NAME, backends=EMBEDDING_BACKENDS,
+                     batch_size=DEFAULT_BATCH_SIZE, repeats=3):
+    """
+    Parity and speed of each backend against the torch embeddings of texts.
+
+    Returns:
+        One dict per backend with the mean and minimum cosine similarity to
+        torch, the fraction of texts whose nearest neighbour among texts is
+        unchanged, and the best encode time over repeats
+    """
+    reference = None
+    reference_neighbours = None
+    report = []
+    for backend in ("torch",) + tuple(b for b in backends if b != "torch"):
+        model = EmbeddingModel(model_name, backend=backend)
+        if model.backend != backend:
+            report.append({"backend": backend, "error": "backend unavailable"})
+            continue
+        model.encode(texts[:1], batch_size=batch_size)  # warm up
+        seconds = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            embeddings = np.asarray(model.encode(texts, batch_size=batch_size), dtype=np.float32)
+            seconds.append(time.perf_counter() - started)
+        embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+        similarity = embeddings @ embeddings.T
+        np.fill_diagonal(similarity, -np.inf)
+        neighbours = similarity.argmax(axis=1)
+        if reference is None:
+            reference, reference_neighbours = embeddings, neighbours
+        cosine = (embeddings * reference).sum(axis=1)
+        report.append({
+            "backend": backend,
+            "mean_cosine": round(float(cosine.mean()), 6),
+            "min_cosine": round(float(cosine.min()), 6),
+            "neighbour_agreement": round(float((neighbours == reference_neighbours).mean()), 4),
+            "seconds": round(min(seconds), 4),
+            "texts_per_second": round(len(texts) / min(seconds), 1),
+        })
+    return report
@@ -0,0 +1,82 @@
+"""
+Process-wide registry of loaded embedding models
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from services.models.embedding_model import EmbeddingModel, DEFAULT_MODEL_NAME
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Loads each embedding model once per process and shares it between services."""
+
+    WARMUP_TEXTS = ["warmup"]
+
+    def __init__(self, default_model_name: str = DEFAULT_MODEL_NAME):
+        self.default_model_name = default_model_name
+        self._models: Dict[str, EmbeddingModel] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._warmup_error: Optional[str] = None
+
+    def get(self, model_name: str = None) -> EmbeddingModel:
+        """Return the shared model for model_name, loading it on first use."""
+        model_name = model_name or self.default_model_name
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            model = self._models.get(model_name)
+            if model is None:
+                logger.info(f"Loading embedding model: {model_name}")
+                model = EmbeddingModel(model_name)
+                self._models[model_name] = model
+        return model
+
+    def warmup(self, model_name: str = None) -> bool:
+        """Load the model and run one inference so the first request is not cold."""
+        try:
+            model = self.get(model_name)
+            model.encode(self.WARMUP_TEXTS)
+            self._warmup_error = None
+            self._ready.set()
+            logger.info(f"Embedding model warmed up: {model.model_name}")
+            return True
+        except Exception as e:
+            self._warmup_error = str(e)
+            logger.error(f"Embedding model warmup failed: {e}", exc_info=True)
+            return False
+
+    def warmup_until_ready(self, model_name: str = None, delay: float = 5):
+        """Warm up, retrying with backoff until it works; run it in a daemon thread."""
+        while not self.warmup(model_name):
+            logger.info(f"Retrying embedding model warmup in {delay}s")
+            time.sleep(delay)
+            delay = min(delay * 2, 300)
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def get_status(self) -> Dict[str, object]:
+        """Readiness details for the /status endpoint."""
+        return {
+            "ready": self.is_ready(),
+            "loaded_models": list(self._models.keys()),
+            "backends": {name: model.backend for name, model in self._models.items()},
+            "warmup_error": self._warmup_error,
+        }
+
+
+# Global registry instance
+model_registry = ModelRegistry()
+
+
+def get_embedding_model(model_name: str = None) -> EmbeddingModel:
+    """Shortcut for the shared model of the global registry."""
+    return model_registry.get(model_name)
@@ -0,0 +1,149 @@
+"""
+ONNX Runtime inference for SentenceTransformer models
+"""
+import logging
+import os
+import re
+import tempfile
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ONNX_CACHE_DIR = os.path.expanduser(os.getenv("EMBEDDING_ONNX_CACHE_DIR", "~/.cache/search_app/onnx"))
+ONNX_OPSET = 14
+
+_export_lock = threading.Lock()
+
+
+def _cache_dir(model_name: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+
+
+def export_model(st_model, model_name: str, quantize: bool = False, cache_dir: str = ONNX_CACHE_DIR) -> str:
+    """
+    Export the transformer of a SentenceTransformer to ONNX, once.
+
+    The fp32 graph is cached as model.onnx and its dynamically quantized int8
+    copy as model.int8.onnx. Files are written under a temporary name and
+    renamed, so a concurrent process never loads a partial export.
+
+    Returns:
+        Path of the requested ONNX file
+    """
+    import onnx
+    import torch  # only needed to export
+
+    target_dir = _cache_dir(model_name, cache_dir)
+    fp32_path = os.path.join(target_dir, "model.onnx")
+    int8_path = os.path.join(target_dir, "model.int8.onnx")
+    with _export_lock:
+        os.makedirs(target_dir, exist_ok=True)
+        if not os.path.exists(fp32_path):
+            logger.info(f"Exporting {model_name} to ONNX: {fp32_path}")
+            transformer = st_model[0].auto_model.eval()
+
+            sample = st_model.tokenizer(["export"], return_tensors="pt")
+            # MPNet and RoBERTa tokenizers have no token_type_ids; export only what the tokenizer feeds
+            input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids")
+                           if name in st_model.tokenizer.model_input_names and name in sample]
+
+            class LastHiddenState(torch.nn.Module):
+                def __init__(self, model):
+                    super().__init__()
+                    self.model = model
+
+                def forward(self, input_ids, attention_mask, token_type_ids=None):
+                    inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+                    if token_type_ids is not None:
+                        inputs["token_type_ids"] = token_type_ids
+                    return self.model(**inputs)[0]
+
+            dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+            with tempfile.TemporaryDirectory(dir=target_dir) as tmp_dir:
+                export_path = os.path.join(tmp_dir, "model.onnx")
+                with torch.no_grad():
+                    torch.onnx.export(
+                        LastHiddenState(transformer),
+                        tuple(sample[name] for name in input_names),
+                        export_path,
+                        input_names=input_names,
+                        output_names=["last_hidden_state"],
+                        dynamic_axes=dynamic_axes,
+                        opset_version=ONNX_OPSET,
+                    )
+                # Some exporters keep weights in a side file; store one self-contained graph
+                tmp_path = os.path.join(tmp_dir, "model.single.onnx")
+                onnx.save_model(onnx.load(export_path), tmp_path)
+                os.replace(tmp_path, fp32_path)
+
+        if quantize and not os.path.exists(int8_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            logger.info(f"Quantizing {model_name} to int8: {int8_path}")
+            tmp_path = f"{int8_path}.{os.getpid()}.tmp"
+            quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+    return int8_path if quantize else fp32_path
+
+
+class OnnxEncoder:
+    """
+    Encodes like SentenceTransformer.encode, with the transformer run by ONNX Runtime.
+
+    Tokenization, pooling and normalization follow the modules of the loaded
+    SentenceTransformer, so the output is a drop-in replacement for its
+    float32 embeddings.
+    """
+
+    def __init__(self, st_model, model_name: str, quantize: bool = False, cache_dir: str = ONNX_CACHE_DIR):
+        import onnxruntime as ort
+
+        path = export_model(st_model, model_name, quantize=quantize, cache_dir=cache_dir)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = st_model.tokenizer
+        self.max_seq_length = st_model.max_seq_length
+
+        module_names = [type(module).__name__ for module in st_model]
+        pooling = next((module for module in st_model if type(module).__name__ == "Pooling"), None)
+        self.cls_pooling = bool(pooling is not None and getattr(pooling, "pooling_mode_cls_token", False))
+        self.normalize = "Normalize" in module_names
+
+    def encode(self, texts, batch_size: int = 64) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # Longest first, as SentenceTransformer does, so each batch pads little
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        embeddings = [None] * len(texts)
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            batch = self._encode_batch([texts[row] for row in rows])
+            for row, embedding in zip(rows, batch):
+                embeddings[row] = embedding
+        embeddings = np.stack(embeddings)
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, texts) -> np.ndarray:
+        features = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_seq_length,
+                                  return_tensors="np")
+        feed = {name: np.asarray(value, dtype=np.int64) for name, value in features.items() if name in self.input_names}
+        if "token_type_ids" in self.input_names and "token_type_ids" not in feed:
+            feed["token_type_ids"] = np.zeros_like(feed["input_ids"])
+        hidden = self.session.run(None, feed)[0]
+
+        if self.cls_pooling:
+            pooled = hidden[:, 0]
+        else:
+            mask = feed["attention_mask"][:, :, None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled = pooled.astype(np.float32)
+        if self.normalize:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
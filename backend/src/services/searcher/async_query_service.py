@@ -0,0 +1,212 @@
+"""
+Query path for the ASGI app: awaits MongoDB and keeps encoding off the event loop
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterator, Tuple
+
+from services.db_handler.async_mongodb_handler import AsyncMongoDBHandler
+from services.metrics.stage_metrics import observe_stage, run_in_executor, stage
+from services.cache.search_cursors import SEARCH_CURSOR_WINDOW, decode_cursor, paginate
+from services.searcher.query_service import QueryService
+from services.searcher.search_backend import AtlasSearchBackend
+
+logger = logging.getLogger(__name__)
+
+# Model inference holds a CPU core per call; more workers than cores only queue inside torch
+ASYNC_ENCODE_WORKERS = int(os.getenv("ASYNC_ENCODE_WORKERS", "2"))
+
+_encode_executor = None
+
+
+def get_encode_executor() -> ThreadPoolExecutor:
+    """Dedicated threads for query encoding, so a burst of encodes never starves blocking I/O."""
+    global _encode_executor
+    if _encode_executor is None:
+        _encode_executor = ThreadPoolExecutor(max_workers=ASYNC_ENCODE_WORKERS, thread_name_prefix="encode")
+    return _encode_executor
+
+
+async def _iterate_in_thread(iterator: Iterator) -> AsyncIterator:
+    """Drive a blocking iterator from a worker thread, one item at a time."""
+    done = object()
+    while True:
+        item = await run_in_executor(None, next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+class AsyncQueryService:
+    """
+    Same results as QueryService.query, without blocking the event loop.
+
+    Caching, query embedding and formatting are delegated to a QueryService.
+    With the Atlas backend both retrievals are awaited on the async driver.
+    Other backends search in-process, which is CPU-bound, so they run in a
+    worker thread.
+    """
+
+    def __init__(self, query_service: QueryService, db_handler: AsyncMongoDBHandler = None,
+                 encode_executor: ThreadPoolExecutor = None):
+        self.query_service = query_service
+        self.db_handler = db_handler or AsyncMongoDBHandler(sync_handler=query_service.db_handler)
+        self.encode_executor = encode_executor or get_encode_executor()
+
+    async def query(self, query_text: str, query_filters: dict = None, do_hybrid_search: bool = True,
+                    topk: int = 5) -> list:
+        try:
+            service = self.query_service
+            result_cache = service.result_cache
+            generation = await self._cache_call(result_cache.get_generation)
+            cache_key = service._cache_key(generation, query_text, query_filters, do_hybrid_search, topk)
+            if cache_key is not None:
+                cached = await self._cache_call(result_cache.get, cache_key)
+                if cached is not None:
+                    return cached
+
+            started = time.perf_counter()
+            query_embedding = await run_in_executor(self.encode_executor, service.embed_query, query_text)
+            observe_stage("query", "embed", time.perf_counter() - started)
+
+            return await self._search_and_format(query_embedding, query_text, query_filters, do_hybrid_search,
+                                                 topk, cache_key)
+
+        except Exception as e:
+            logger.error(f"Query failed: {e}")
+            return []
+
+    async def query_page(self, query_text: str = None, query_filters: dict = None, do_hybrid_search: bool = True,
+                         page_size: int = 5, cursor: str = None) -> dict:
+        """Same contract as QueryService.query_page."""
+        # The cursor store uses the same kind of backend as the result cache
+        cursor_store = self.query_service.cursor_store
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        if cursor:
+            window_id, offset = decode_cursor(cursor)
+            return paginate(await self._cache_call(cursor_store.load, window_id), window_id, offset, page_size)
+
+        window_size = max(page_size, min(SEARCH_CURSOR_WINDOW, self.query_service.db_handler.config.max_limit))
+        results = await self.query(query_text, query_filters=query_filters, do_hybrid_search=do_hybrid_search,
+                                   topk=window_size)
+        window_id = await self._cache_call(cursor_store.save, results) if len(results) > page_size else None
+        return paginate(results, window_id, 0, page_size)
+
+    async def query_stream(self, query_text: str, query_filters: dict = None, do_hybrid_search: bool = True,
+                           topk: int = 5) -> AsyncIterator[Tuple[str, list]]:
+        """Same events as QueryService.query_stream."""
+        try:
+            service = self.query_service
+            generation = await self._cache_call(service.result_cache.get_generation)
+            cache_key = service._cache_key(generation, query_text, query_filters, do_hybrid_search, topk)
+            if cache_key is not None:
+                cached = await self._cache_call(service.result_cache.get, cache_key)
+                if cached is not None:
+                    yield "final", cached
+                    return
+
+            started = time.perf_counter()
+            query_embedding = await run_in_executor(self.encode_executor, service.embed_query, query_text)
+            observe_stage("query", "embed", time.perf_counter() - started)
+
+            search_args = dict(query_vector=query_embedding, query_text=query_text if do_hybrid_search else None,
+                               filters=query_filters, topk=topk, alpha=0.5)
+            if isinstance(service.search_backend, AtlasSearchBackend):
+                events = self.db_handler.iter_vector_search(**search_args)
+            else:
+                events = _iterate_in_thread(service.search_backend.search_stream(**search_args))
+            async for phase, results in events:
+                with stage("query", "format"):
+                    formatted_results = service._format_results(results)
+                if phase == "final":
+                    if cache_key is not None:
+                        await self._cache_call(service.result_cache.set, cache_key, formatted_results)
+                    logger.info(f"Query '{query_text}' returned {len(formatted_results)} results")
+                yield phase, formatted_results
+
+        except Exception as e:
+            logger.error(f"Query failed: {e}")
+            yield "final", []
+
+    async def query_batch(self, queries: list) -> list:
+        """Same results as QueryService.query_batch: one encode call, then all searches awaited together."""
+        service = self.query_service
+        generation = await self._cache_call(service.result_cache.get_generation)
+        results = [None] * len(queries)
+        cache_keys = [None] * len(queries)
+        pending = []
+        for i, q in enumerate(queries):
+            try:
+                cache_keys[i] = service._cache_key(generation, q["query_text"], q.get("query_filters"),
+                                                   q.get("do_hybrid_search", True), q.get("topk", 5))
+                if cache_keys[i] is not None:
+                    results[i] = await self._cache_call(service.result_cache.get, cache_keys[i])
+            except Exception as e:
+                logger.warning(f"Result cache lookup failed: {e}")
+            if results[i] is None:
+                pending.append(i)
+        if not pending:
+            return results
+
+        try:
+            started = time.perf_counter()
+            embeddings = await run_in_executor(
+                self.encode_executor, service.embed_queries, [queries[i]["query_text"] for i in pending]
+            )
+            observe_stage("query", "embed", time.perf_counter() - started)
+        except Exception as e:
+            logger.error(f"Batch query encoding failed: {e}")
+            for i in pending:
+                results[i] = []
+            return results
+
+        searched = await asyncio.gather(*(
+            self._search_and_format(embedding, queries[i]["query_text"], queries[i].get("query_filters"),
+                                    queries[i].get("do_hybrid_search", True), queries[i].get("topk", 5),
+                                    cache_keys[i])
+            for i, embedding in zip(pending, embeddings)
+        ), return_exceptions=True)
+        for i, outcome in zip(pending, searched):
+            if isinstance(outcome, Exception):
+                logger.error(f"Query failed: {outcome}")
+                outcome = []
+            results[i] = outcome
+
+        logger.info(f"Batch of {len(queries)} queries, {len(pending)} searched")
+        return results
+
+    async def _search_and_format(self, query_embedding, query_text: str, query_filters, do_hybrid_search: bool,
+                                 topk: int, cache_key=None) -> list:
+        service = self.query_service
+        # Vector-only queries pass no text, as QueryService does
+        query_text_arg = query_text if do_hybrid_search else None
+        if isinstance(service.search_backend, AtlasSearchBackend):
+            results = await self.db_handler.vector_search(
+                query_vector=query_embedding, query_text=query_text_arg, filters=query_filters,
+                topk=topk, alpha=0.5
+            )
+        else:
+            results = await run_in_executor(
+                None, lambda: service.search_backend.search(
+                    query_vector=query_embedding, query_text=query_text_arg, filters=query_filters,
+                    topk=topk, alpha=0.5
+                )
+            )
+
+        with stage("query", "format"):
+            formatted_results = service._format_results(results)
+        if cache_key is not None:
+            await self._cache_call(service.result_cache.set, cache_key, formatted_results)
+
+        logger.info(f"Query '{query_text}' returned {len(formatted_results)} results")
+        return formatted_results
+
+    async def _cache_call(self, fn, *args):
+        """Call the result cache inline, or in a thread when its backend does network I/O."""
+        if self.query_service.result_cache.backend.remote:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
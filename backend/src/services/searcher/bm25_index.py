@@ -0,0 +1,409 @@
+"""
+In-process BM25 keyword index kept in sync with the MongoDB documents collection
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.cache.result_cache import result_cache
+from services.db_handler.change_feed import ChangeFeed
+from services.db_handler.mongodb_handler import MongoDBHandler
+from services.searcher.local_vector_index import LinkedSources, LocalVectorIndex, _timestamp, linked_source_codes
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+BM25_REFRESH_SECONDS = float(os.getenv("BM25_REFRESH_SECONDS", "5"))
+# Flush postings every this many documents while syncing
+BM25_SYNC_BATCH = 20000
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    if not text:
+        return []
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def encode_varints(values) -> bytes:
+    """LEB128-encode non-negative integers."""
+    out = bytearray()
+    for value in values:
+        value = int(value)
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_varints(buf: bytes) -> np.ndarray:
+    """Vectorized inverse of encode_varints."""
+    data = np.frombuffer(buf, dtype=np.uint8)
+    if data.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shifts = (np.arange(data.size) - np.repeat(starts, ends - starts + 1)) * 7
+    return np.add.reduceat((data & 0x7F).astype(np.int64) << shifts, starts)
+
+
+class BM25Index:
+    """
+    Inverted index over chunk text and title, scored with Okapi BM25.
+
+    Each term maps to an immutable (row deltas, term frequencies, last row)
+    tuple: row ids are delta-encoded as varints and frequencies stored as
+    uint16, so postings take two to three bytes per occurrence. A sync builds
+    the new tuples aside and swaps them in; searches only take a short state
+    lock to capture the columns and postings. Updated documents get a new row
+    and the old one is masked out; once dead rows make up a quarter of the
+    index they are dropped and the live rows renumbered. Filters use the same
+    integer-coded columns as LocalVectorIndex, source filters included.
+
+    A background thread (see start) loads the index and then pulls changes
+    through a ChangeFeed, deletions from the tombstones collection. Until the
+    first load finishes, searches return no hits.
+    """
+
+    FILTER_FIELDS = LocalVectorIndex.FILTER_FIELDS
+
+    def __init__(self, db_handler: MongoDBHandler = None, k1: float = BM25_K1, b: float = BM25_B,
+                 refresh_interval: float = BM25_REFRESH_SECONDS):
+        self.db_handler = db_handler or MongoDBHandler()
+        self.k1 = k1
+        self.b = b
+        self.refresh_interval = refresh_interval
+        # _lock serializes syncs; _state_lock guards the columns against searches
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._postings: Dict[str, Tuple[bytes, np.ndarray, int]] = {}
+        self._size = 0  # rows ever assigned, including dead ones
+        self._live = 0
+        self._total_length = 0
+        self._doc_length = np.zeros(1024, dtype=np.float32)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._created_at = np.zeros(1024, dtype=np.float64)
+        self._text_hash = np.zeros(1024, dtype=np.int64)
+        self._codes = {field: np.zeros(1024, dtype=np.int32) for field in self.FILTER_FIELDS}
+        # Code 0 is reserved for missing values
+        self._vocab: Dict[str, Dict[Any, int]] = {field: {None: 0} for field in self.FILTER_FIELDS}
+        self._ids: List[Any] = []
+        self._row_of_id: Dict[Any, int] = {}
+        self._linked = LinkedSources()
+        config = self.db_handler.config
+        self._feed = ChangeFeed(
+            self.db_handler.get_collection(config.collection_name),
+            projection={"text": 1, "title": 1, "updated_at": 1, "created_at": 1, "sources": 1, "ingest_pending": 1,
+                        **{f: 1 for f in self.FILTER_FIELDS}},
+            tombstones=self.db_handler.tombstones,
+            tombstone_retention=config.tombstone_ttl_seconds,
+        )
+
+    def __len__(self):
+        return self._live
+
+    @property
+    def ready(self) -> bool:
+        """Whether the first sync has finished."""
+        return self._ready.is_set()
+
+    # ---------- Sync ----------
+
+    def start(self):
+        """Load the index and keep it in sync with MongoDB from a daemon thread, every refresh_interval seconds."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._sync_loop, name="bm25-index-sync", daemon=True)
+            self._thread.start()
+
+    def _sync_loop(self):
+        while True:
+            try:
+                self.sync()
+            except Exception as e:
+                logger.warning(f"BM25 index sync failed: {e}")
+            time.sleep(self.refresh_interval)
+
+    def sync(self) -> int:
+        """
+        Pull changes from MongoDB made since the last sync.
+
+        Returns:
+            Number of documents added, updated or removed
+        """
+        with self._lock:
+            changed = 0
+            pending: Dict[str, List[Tuple[int, int]]] = {}
+            for doc in self._feed.changes():
+                with self._state_lock:
+                    self._upsert_row(doc, pending)
+                changed += 1
+                if changed % BM25_SYNC_BATCH == 0:
+                    self._flush(pending)
+            self._flush(pending)
+
+            collection = self.db_handler.get_collection(self.db_handler.config.collection_name)
+            deleted, reconcile = self._feed.deletions()
+            if reconcile or collection.estimated_document_count() < self._live:
+                changed += self._remove_deleted(collection)
+            else:
+                with self._state_lock:
+                    for doc_id in deleted:
+                        self._linked.remove(doc_id)
+                        row = self._row_of_id.pop(doc_id, None)
+                        if row is not None:
+                            self._kill_row(row)
+                            changed += 1
+            if self._size - self._live > max(1024, self._size // 4):
+                self._compact()
+
+            self._ready.set()
+            if changed:
+                # Writes bump the cache generation before this index sees them, so a
+                # search in between cached results of the old index under the new one
+                result_cache.invalidate()
+                logger.info(f"BM25 index synced {changed} changes, {self._live} documents")
+            return changed
+
+    def _remove_deleted(self, collection) -> int:
+        live_ids = {doc["_id"] for doc in collection.find({}, {"_id": 1})}
+        with self._state_lock:
+            removed = [doc_id for doc_id in self._row_of_id if doc_id not in live_ids]
+            for doc_id in removed:
+                self._kill_row(self._row_of_id.pop(doc_id))
+                self._linked.remove(doc_id)
+        return len(removed)
+
+    def _ensure_capacity(self, size: int):
+        capacity = len(self._alive)
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2)
+        # New arrays rather than in-place resizes, so a running search keeps a consistent view
+        self._doc_length = np.resize(self._doc_length, new_capacity)
+        self._alive = np.concatenate([self._alive, np.zeros(new_capacity - capacity, dtype=bool)])
+        self._created_at = np.resize(self._created_at, new_capacity)
+        self._text_hash = np.resize(self._text_hash, new_capacity)
+        for field in self.FILTER_FIELDS:
+            self._codes[field] = np.resize(self._codes[field], new_capacity)
+
+    def _code(self, field: str, value) -> int:
+        vocab = self._vocab[field]
+        code = vocab.get(value)
+        if code is None:
+            code = len(vocab)
+            vocab[value] = code
+        return code
+
+    def _upsert_row(self, doc: Dict[str, Any], pending: Dict[str, List[Tuple[int, int]]]):
+        if doc.get("ingest_pending"):
+            # Chunks of an unfinished ingest are indexed once it sets ingest_pending to False
+            self._linked.remove(doc["_id"])
+            row = self._row_of_id.pop(doc["_id"], None)
+            if row is not None:
+                self._kill_row(row)
+            return
+        title = doc.get("title") if isinstance(doc.get("title"), str) else ""
+        text = doc.get("text") if isinstance(doc.get("text"), str) else ""
+        text_hash = hash((title, text))
+
+        row = self._row_of_id.get(doc["_id"])
+        if row is None or self._text_hash[row] != text_hash:
+            if row is not None:
+                self._kill_row(row)
+            terms = Counter(tokenize(title))
+            terms.update(tokenize(text))
+            self._ensure_capacity(self._size + 1)
+            row = self._size
+            self._size += 1
+            self._ids.append(doc["_id"])
+            self._row_of_id[doc["_id"]] = row
+            for term, tf in terms.items():
+                pending.setdefault(term, []).append((row, tf))
+            length = sum(terms.values())
+            self._doc_length[row] = length
+            self._text_hash[row] = text_hash
+            self._total_length += length
+            self._live += 1
+            self._alive[row] = True
+
+        # Metadata-only updates, such as the team/project set after ingest, keep their postings
+        created_at = doc.get("created_at")
+        self._created_at[row] = created_at.timestamp() if isinstance(created_at, datetime) else 0.0
+        for field in self.FILTER_FIELDS:
+            value = doc.get(field)
+            self._codes[field][row] = self._code(field, value if isinstance(value, str) else None)
+        self._linked.update(doc["_id"], linked_source_codes(doc, self._code))
+
+    def _kill_row(self, row: int):
+        if self._alive[row]:
+            self._alive[row] = False
+            self._live -= 1
+            self._total_length -= int(self._doc_length[row])
+
+    def _flush(self, pending: Dict[str, List[Tuple[int, int]]]):
+        """
+        Append pending (row, tf) pairs, rows ascending, to the postings.
+
+        Tuples are replaced in place; a search that captured the columns earlier skips the rows past its view.
+        """
+        for term, entries in pending.items():
+            rows = np.fromiter((row for row, _ in entries), dtype=np.int64, count=len(entries))
+            tfs = np.fromiter((tf for _, tf in entries), dtype=np.int64, count=len(entries))
+            row_bytes, old_tfs, last_row = self._postings.get(term, (b"", np.zeros(0, dtype=np.uint16), -1))
+            deltas = np.diff(rows, prepend=max(last_row, 0))
+            self._postings[term] = (
+                row_bytes + encode_varints(deltas),
+                np.concatenate([old_tfs, np.minimum(tfs, 0xFFFF).astype(np.uint16)]),
+                int(rows[-1]),
+            )
+        pending.clear()
+
+    def _compact(self):
+        """Drop dead rows and renumber the live ones; built aside and swapped in under the state lock."""
+        kept = np.flatnonzero(self._alive[:self._size])
+        live = kept.size
+        new_row = np.full(self._size, -1, dtype=np.int64)
+        new_row[kept] = np.arange(live)
+
+        postings: Dict[str, Tuple[bytes, np.ndarray, int]] = {}
+        for term, (row_bytes, tfs, _) in self._postings.items():
+            rows = np.cumsum(decode_varints(row_bytes))
+            keep = new_row[rows] >= 0
+            if not keep.any():
+                continue
+            # Renumbering preserves order, so the rows stay ascending
+            rows = new_row[rows[keep]]
+            postings[term] = (encode_varints(np.diff(rows, prepend=0)), tfs[keep], int(rows[-1]))
+
+        capacity = max(1024, 2 * live)
+
+        def take(column: np.ndarray) -> np.ndarray:
+            out = np.zeros(capacity, dtype=column.dtype)
+            out[:live] = column[kept]
+            return out
+
+        doc_length, alive = take(self._doc_length), take(self._alive)
+        created_at, text_hash = take(self._created_at), take(self._text_hash)
+        codes = {field: take(column) for field, column in self._codes.items()}
+        ids = [self._ids[row] for row in kept]
+        row_of_id = {doc_id: row for row, doc_id in enumerate(ids)}
+
+        with self._state_lock:
+            self._postings, self._ids, self._row_of_id = postings, ids, row_of_id
+            self._doc_length, self._alive, self._created_at, self._text_hash = doc_length, alive, created_at, text_hash
+            self._codes = codes
+            self._size = live
+        logger.info(f"BM25 index compacted to {live} rows and {len(postings)} terms")
+
+    # ---------- Search ----------
+
+    def _wanted_codes(self, field: str, value) -> List[int]:
+        values = value if isinstance(value, list) else [value]
+        return [self._vocab[field][v] for v in values if v in self._vocab[field]]
+
+    def _filter_mask(self, filters: Dict[str, Any], rows: np.ndarray, codes, created_at,
+                     linked_rows: np.ndarray) -> np.ndarray:
+        """Mask over rows; linked_rows are rows whose linked sources match the source filter."""
+        mask = np.ones(rows.size, dtype=bool)
+        for key, value in filters.items():
+            if key in self.FILTER_FIELDS:
+                field_mask = np.isin(codes[key][rows], self._wanted_codes(key, value))
+                if key == "source":
+                    field_mask |= np.isin(rows, linked_rows)
+                mask &= field_mask
+            elif key == "date_range" and value:
+                if "start" in value:
+                    mask &= created_at[rows] >= _timestamp(value["start"])
+                if "end" in value:
+                    mask &= created_at[rows] <= _timestamp(value["end"])
+        return mask
+
+    def search(self, query_text: str, filters: Optional[Dict[str, Any]] = None, topk: int = 10) -> List[Tuple[Any, float]]:
+        """
+        Find the topk documents with the highest BM25 score for query_text that match filters.
+
+        Returns:
+            List of (document _id, BM25 score) sorted by descending score
+        """
+        terms = set(tokenize(query_text))
+        if not terms or topk <= 0 or self._live == 0:
+            return []
+
+        with self._state_lock:
+            postings, ids, alive, doc_length = self._postings, self._ids, self._alive, self._doc_length
+            codes, created_at = dict(self._codes), self._created_at
+            live, average_length = self._live, max(self._total_length / max(self._live, 1), 1e-6)
+            size = self._size
+            linked_rows = np.zeros(0, dtype=np.int64)
+            if filters and filters.get("source") is not None:
+                linked_ids = self._linked.ids(self._wanted_codes("source", filters["source"]))
+                linked_rows = np.array([self._row_of_id[doc_id] for doc_id in linked_ids
+                                        if doc_id in self._row_of_id], dtype=np.int64)
+
+        scores = np.zeros(size, dtype=np.float32)
+        for term in terms:
+            posting = postings.get(term)
+            if posting is None:
+                continue
+            row_bytes, tfs, _ = posting
+            rows = np.cumsum(decode_varints(row_bytes))
+            tfs = tfs.astype(np.float32)
+            in_view = rows < size
+            rows, tfs = rows[in_view], tfs[in_view]
+            df = int(alive[rows].sum())
+            if df == 0:
+                continue
+            idf = np.log(1.0 + (live - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * doc_length[rows] / average_length)
+            # Rows are unique within a posting list, so plain fancy-index addition is safe
+            scores[rows] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+        candidates = np.flatnonzero((scores > 0) & alive[:size])
+        if filters and candidates.size:
+            candidates = candidates[self._filter_mask(filters, candidates, codes, created_at, linked_rows)]
+        if candidates.size == 0:
+            return []
+
+        k = min(topk, candidates.size)
+        candidate_scores = scores[candidates]
+        top = np.argpartition(-candidate_scores, k - 1)[:k]
+        top = top[np.argsort(-candidate_scores[top])]
+        return [(ids[candidates[i]], float(candidate_scores[i])) for i in top]
+
+
+_bm25_index: Optional[BM25Index] = None
+_bm25_index_lock = threading.Lock()
+
+
+def get_bm25_index(db_handler: MongoDBHandler = None) -> BM25Index:
+    """
+    Return the process-wide BM25 index.
+
+    On first use it starts loading from MongoDB in the background; check
+    ready to tell an empty result from an index that is still loading.
+    """
+    global _bm25_index
+    if _bm25_index is None:
+        with _bm25_index_lock:
+            if _bm25_index is None:
+                index = BM25Index(db_handler)
+                index.start()
+                _bm25_index = index
+    return _bm25_index
@@ -0,0 +1,182 @@
+"""
+Memory-mapped, scalar-quantized snapshot of the local vector index
+"""
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+LOCAL_INDEX_STORE_DIR = os.path.expanduser(
+    os.getenv("LOCAL_INDEX_STORE_DIR", "~/.cache/search_app/vector_store")
+)
+LOCAL_INDEX_QUANTIZATION = os.getenv("LOCAL_INDEX_QUANTIZATION", "int8")  # "int8" | "float16"
+
+CURRENT_FILE = "CURRENT"
+
+
+def quantize(vectors: np.ndarray, quantization: str):
+    """
+    Quantize normalized float32 vectors.
+
+    Returns:
+        Tuple of (quantized matrix, per-dimension scales or None)
+    """
+    if quantization == "float16":
+        return vectors.astype(np.float16), None
+    # int8 with one scale per dimension, so x ~= codes * scales
+    scales = np.abs(vectors).max(axis=0) / 127.0 if len(vectors) else np.ones(vectors.shape[1])
+    scales = np.maximum(scales, 1e-12).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def encode_ids(doc_ids) -> np.ndarray:
+    return np.array([ObjectId(doc_id).binary for doc_id in doc_ids], dtype="S12")
+
+
+class EmbeddingStore:
+    """
+    Read-only snapshot mapped from disk.
+
+    Every process that opens the same snapshot shares its pages through the
+    OS page cache. Search scans the quantized matrix and rescores the best
+    candidates with the float32 matrix, which is only read for those rows.
+    A snapshot is a directory of .npy files plus meta.json; CURRENT names
+    the latest one so a new snapshot can be published atomically.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        self.dim = self.meta["dim"]
+        self.quantization = self.meta["quantization"]
+        self.vocab: Dict[str, Dict[Any, int]] = {
+            field: {None if value == "" else value: code for value, code in values}
+            for field, values in self.meta["vocab"].items()
+        }
+        synced_at = self.meta.get("last_synced_at")
+        self.last_synced_at = datetime.fromisoformat(synced_at) if synced_at else None
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        self.vectors = load("vectors")
+        self.exact_vectors = load("vectors_f32")
+        self.scales = np.load(os.path.join(path, "scales.npy")) if self.quantization == "int8" else None
+        self.ids = load("ids")
+        self.sorted_ids = load("sorted_ids")
+        self.sorted_rows = load("sorted_rows")
+        self.created_at = load("created_at")
+        self.codes = {field: load(f"codes_{field}") for field in self.vocab}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row_of(self, doc_id) -> Optional[int]:
+        """Row of a Mongo _id, looked up in the sorted id map."""
+        key = encode_ids([doc_id])[0]  # S12 drops trailing NULs, compare in the same form
+        pos = int(np.searchsorted(self.sorted_ids, key))
+        if pos < len(self.sorted_ids) and self.sorted_ids[pos] == key:
+            return int(self.sorted_rows[pos])
+        return None
+
+    def doc_id(self, row: int) -> ObjectId:
+        return ObjectId(self.ids[row:row + 1].view(np.uint8).tobytes())
+
+    def approximate_scores(self, query: np.ndarray, rows: np.ndarray = None, block_size: int = 16384) -> np.ndarray:
+        """Scores of query against quantized rows, dequantized block by block."""
+        # Fold the per-dimension scales into the query instead of the matrix
+        weights = query * self.scales if self.scales is not None else query
+        if rows is not None:
+            return self.vectors[rows].astype(np.float32) @ weights
+        scores = np.empty(len(self.vectors), dtype=np.float32)
+        for start in range(0, len(self.vectors), block_size):
+            block = self.vectors[start:start + block_size]
+            scores[start:start + len(block)] = block.astype(np.float32) @ weights
+        return scores
+
+    def exact_scores(self, query: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Float32 scores of rows, returned as (sorted rows, scores)."""
+        rows = np.sort(rows)  # read the float matrix in file order
+        return rows, self.exact_vectors[rows] @ query
+
+    @classmethod
+    def open_current(cls, store_dir: str = LOCAL_INDEX_STORE_DIR) -> Optional["EmbeddingStore"]:
+        """Open the latest published snapshot, if any."""
+        try:
+            with open(os.path.join(store_dir, CURRENT_FILE)) as f:
+                name = f.read().strip()
+            return cls(os.path.join(store_dir, name))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not open vector store in {store_dir}: {e}")
+            return None
+
+    @staticmethod
+    def write(store_dir: str, vectors: np.ndarray, doc_ids, created_at: np.ndarray,
+              codes: Dict[str, np.ndarray], vocab: Dict[str, Dict[Any, int]],
+              last_synced_at: Optional[datetime], quantization: str = LOCAL_INDEX_QUANTIZATION) -> str:
+        """
+        Write a snapshot and publish it as CURRENT.
+
+        Args:
+            vectors: (n, dim) normalized float32 embeddings
+            doc_ids: Mongo _ids of the rows
+
+        Returns:
+            Path of the new snapshot
+        """
+        os.makedirs(store_dir, exist_ok=True)
+        name = f"snapshot-{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(store_dir, name)
+        os.makedirs(path)
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        quantized, scales = quantize(vectors, quantization)
+        ids = encode_ids(doc_ids)
+        order = np.argsort(ids, kind="stable")
+        save = lambda file_name, array: np.save(os.path.join(path, f"{file_name}.npy"), array)
+        save("vectors", quantized)
+        save("vectors_f32", vectors)
+        if scales is not None:
+            save("scales", scales)
+        save("ids", ids)
+        save("sorted_ids", ids[order])
+        save("sorted_rows", order.astype(np.int64))
+        save("created_at", np.asarray(created_at, dtype=np.float64))
+        for field, field_codes in codes.items():
+            save(f"codes_{field}", np.asarray(field_codes, dtype=np.int32))
+
+        meta = {
+            "dim": int(vectors.shape[1]),
+            "count": int(len(vectors)),
+            "quantization": quantization,
+            "last_synced_at": last_synced_at.isoformat() if last_synced_at else None,
+            # JSON keys must be strings, so missing values are stored as ""
+            "vocab": {field: [["" if value is None else value, code] for value, code in values.items()]
+                      for field, values in vocab.items()},
+        }
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+        # Publish atomically; readers keep using the snapshot they mapped
+        current_tmp = os.path.join(store_dir, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+        with open(current_tmp, "w") as f:
+            f.write(name)
+        os.replace(current_tmp, os.path.join(store_dir, CURRENT_FILE))
+        logger.info(f"Published vector store snapshot {name} with {len(vectors)} rows")
+        return path
+
+    @staticmethod
+    def remove_stale(store_dir: str = LOCAL_INDEX_STORE_DIR, keep: int = 2):
+        """Delete all but the newest snapshots; mapped files stay valid until unmapped."""
+        snapshots = sorted(d for d in os.listdir(store_dir) if d.startswith("snapshot-"))
+        for name in snapshots[:-keep]:
+            shutil.rmtree(os.path.join(store_dir, name), ignore_errors=True)
@@ -0,0 +1,611 @@
+"""
+In-process vector index kept in sync with the MongoDB documents collection
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from services.cache.result_cache import result_cache
+from services.db_handler.change_feed import ChangeFeed
+from services.db_handler.mongodb_handler import MongoDBHandler
+from services.db_handler.vector_codec import decode_vector
+from services.searcher.embedding_store import LOCAL_INDEX_STORE_DIR, EmbeddingStore, encode_ids
+
+logger = logging.getLogger(__name__)
+
+LOCAL_INDEX_ALGORITHM = os.getenv("LOCAL_INDEX_ALGORITHM", "flat")  # "flat" | "hnsw"
+LOCAL_INDEX_REFRESH_SECONDS = float(os.getenv("LOCAL_INDEX_REFRESH_SECONDS", "5"))
+LOCAL_INDEX_HNSW_M = int(os.getenv("LOCAL_INDEX_HNSW_M", "16"))
+LOCAL_INDEX_HNSW_EF = int(os.getenv("LOCAL_INDEX_HNSW_EF", "200"))
+LOCAL_INDEX_USE_STORE = os.getenv("LOCAL_INDEX_USE_STORE", "true").lower() == "true"
+LOCAL_INDEX_RESCORE_FACTOR = int(os.getenv("LOCAL_INDEX_RESCORE_FACTOR", "4"))
+
+
+class LinkedSources:
+    """
+    Source codes a document is linked to besides its primary source.
+
+    Deduplicated chunks list every source that contains them in ``sources``,
+    while the filter columns only hold the primary ``source``; a source
+    filter also matches the documents recorded here.
+    """
+
+    def __init__(self):
+        self._codes_of: Dict[Any, Tuple[int, ...]] = {}
+        self._ids_of: Dict[int, Set[Any]] = {}
+
+    def update(self, doc_id, codes: Iterable[int]):
+        for code in self._codes_of.pop(doc_id, ()):
+            ids = self._ids_of[code]
+            ids.discard(doc_id)
+            if not ids:
+                del self._ids_of[code]
+        codes = tuple(set(codes))
+        if codes:
+            self._codes_of[doc_id] = codes
+            for code in codes:
+                self._ids_of.setdefault(code, set()).add(doc_id)
+
+    def remove(self, doc_id):
+        self.update(doc_id, ())
+
+    def ids(self, codes: Iterable[int]) -> Set[Any]:
+        """Documents linked to any of codes."""
+        return {doc_id for code in codes for doc_id in self._ids_of.get(code, ())}
+
+
+def linked_source_codes(doc: Dict[str, Any], code) -> List[int]:
+    """Codes of the sources of doc other than its primary source; code maps a source to its code."""
+    primary = doc.get("source")
+    return [code("source", source) for source in doc.get("sources") or []
+            if isinstance(source, str) and source != primary]
+
+
+class LocalVectorIndex:
+    """
+    Normalized float32 embedding matrix with categorical filter columns.
+
+    Rows live in one contiguous array that grows by doubling, so a flat
+    search is a single matrix-vector product over the rows. Filter fields are
+    stored as integer codes, which turns a filter into a vectorized mask; a
+    source filter also matches the linked sources of deduplicated chunks. With
+    algorithm="hnsw" (requires hnswlib) an HNSW graph is kept next to the
+    matrix for sub-linear search on large corpora.
+
+    A background thread (see start) pulls inserts and updates from MongoDB
+    through a ChangeFeed and drops documents listed in the tombstones
+    collection. Rows are append-only: a document whose vector changes gets a
+    new row and the old one is masked out, and dead rows are dropped by
+    renumbering once they make up a quarter of the matrix. Searches capture
+    the arrays under a short state lock and score them outside it; HNSW
+    queries run under the state lock since the graph cannot be resized while
+    it is searched.
+
+    When opened on an EmbeddingStore snapshot the snapshot is the read-only
+    base segment and the in-memory matrix only holds rows changed since it was
+    written; updated and deleted base rows are masked out. The base is
+    searched on its quantized vectors and the best topk * rescore_factor
+    candidates are rescored with exact float32 vectors.
+    """
+
+    FILTER_FIELDS = ("topic", "team", "project", "source")
+
+    def __init__(self, db_handler: MongoDBHandler = None, dim: int = None,
+                 algorithm: str = LOCAL_INDEX_ALGORITHM,
+                 refresh_interval: float = LOCAL_INDEX_REFRESH_SECONDS,
+                 store: EmbeddingStore = None, rescore_factor: int = LOCAL_INDEX_RESCORE_FACTOR):
+        self.db_handler = db_handler or MongoDBHandler()
+        self.dim = dim or self.db_handler.config.embedding_dimension
+        self.refresh_interval = refresh_interval
+        # _lock serializes syncs; _state_lock guards the row arrays against searches
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._size = 0  # rows ever assigned since the last compaction, including dead ones
+        self._live = 0
+        self._vectors = np.zeros((1024, self.dim), dtype=np.float32)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._created_at = np.zeros(1024, dtype=np.float64)
+        self._codes = {field: np.zeros(1024, dtype=np.int32) for field in self.FILTER_FIELDS}
+        # Code 0 is reserved for missing values
+        self._vocab: Dict[str, Dict[Any, int]] = {field: {None: 0} for field in self.FILTER_FIELDS}
+        self._ids: List[Any] = []
+        self._row_of_id: Dict[Any, int] = {}
+        self._linked = LinkedSources()
+        self._linked_loaded = True
+        self._hnsw = self._create_hnsw() if algorithm == "hnsw" else None
+        self._labels = np.zeros(1024, dtype=np.int64)
+        self._row_of_label: Dict[int, int] = {}
+        self._next_label = 0
+        self.rescore_factor = max(1, rescore_factor)
+        self._base: Optional[EmbeddingStore] = None
+        self._base_alive = np.zeros(0, dtype=bool)
+        since = None
+        if store is not None:
+            since = self._open_base(store)
+        config = self.db_handler.config
+        self._feed = ChangeFeed(
+            self.db_handler.get_collection(config.collection_name),
+            query={"embedding": {"$exists": True}},
+            projection={"embedding": 1, "updated_at": 1, "created_at": 1, "sources": 1, "ingest_pending": 1,
+                        **{f: 1 for f in self.FILTER_FIELDS}},
+            tombstones=self.db_handler.tombstones,
+            tombstone_retention=config.tombstone_ttl_seconds,
+            since=since,
+        )
+
+    def _open_base(self, store: EmbeddingStore) -> Optional[datetime]:
+        """Use store as the base segment; returns the updated_at it covers."""
+        if store.dim != self.dim:
+            logger.warning(f"Ignoring vector store {store.path} with dimension {store.dim}, expected {self.dim}")
+            return None
+        # Share the store's codes so one filter mask applies to both segments
+        for field in self.FILTER_FIELDS:
+            self._vocab[field] = {None: 0, **store.vocab.get(field, {})}
+        # The store only has primary sources; the first sync reads the linked ones
+        self._linked_loaded = False
+        if self._hnsw is not None:
+            # The graph lives in memory, so copy the rows in rather than re-reading MongoDB
+            for row in range(len(store)):
+                self._insert_vector(store.doc_id(row), np.array(store.exact_vectors[row]),
+                                    float(store.created_at[row]),
+                                    {field: int(store.codes[field][row]) for field in self.FILTER_FIELDS})
+            return store.last_synced_at
+        self._base = store
+        self._base_alive = np.ones(len(store), dtype=bool)
+        logger.info(f"Local vector index mapped {len(store)} rows from {store.path}")
+        return store.last_synced_at
+
+    def _create_hnsw(self, max_elements: int = 1024):
+        try:
+            import hnswlib  # optional dependency, only needed for the hnsw algorithm
+        except ImportError:
+            logger.warning("hnswlib is not installed, the local index falls back to flat search")
+            return None
+        index = hnswlib.Index(space="ip", dim=self.dim)
+        index.init_index(max_elements=max_elements, M=LOCAL_INDEX_HNSW_M, ef_construction=LOCAL_INDEX_HNSW_EF)
+        index.set_ef(LOCAL_INDEX_HNSW_EF)
+        return index
+
+    def __len__(self):
+        return self._live + int(self._base_alive.sum())
+
+    # ---------- Sync ----------
+
+    def start(self):
+        """Keep the index in sync with MongoDB from a daemon thread, every refresh_interval seconds."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._sync_loop, name="local-vector-index-sync", daemon=True)
+            self._thread.start()
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                self.sync()
+            except Exception as e:
+                logger.warning(f"Local vector index sync failed: {e}")
+
+    def sync(self) -> int:
+        """
+        Pull changes from MongoDB made since the last sync.
+
+        Returns:
+            Number of documents added, updated or removed
+        """
+        with self._lock:
+            collection = self.db_handler.get_collection(self.db_handler.config.collection_name)
+            if not self._linked_loaded:
+                self._load_linked_sources(collection)
+            changed = 0
+            batch = []
+            for doc in self._feed.changes():
+                batch.append(doc)
+                if len(batch) >= 1000:
+                    changed += self._apply(batch)
+                    batch = []
+            changed += self._apply(batch)
+
+            deleted, reconcile = self._feed.deletions()
+            if reconcile or collection.estimated_document_count() < len(self):
+                changed += self._remove_deleted(collection)
+            elif deleted:
+                with self._state_lock:
+                    changed += sum(self._remove(doc_id) for doc_id in deleted)
+
+            if self._size - self._live > max(1024, self._size // 4):
+                self._compact()
+
+            if changed:
+                # Writes bump the cache generation before this index sees them, so a
+                # search in between cached results of the old index under the new one
+                result_cache.invalidate()
+                logger.info(f"Local vector index synced {changed} changes, {len(self)} documents")
+            return changed
+
+    def _load_linked_sources(self, collection):
+        """Record the linked sources of documents in the snapshot, which only stores primary sources."""
+        query = {"$expr": {"$gt": [
+            {"$size": {"$setDifference": [{"$ifNull": ["$sources", []]}, ["$source"]]}}, 0
+        ]}}
+        for doc in collection.find(query, {"source": 1, "sources": 1}).batch_size(1000):
+            with self._state_lock:
+                self._linked.update(doc["_id"], linked_source_codes(doc, self._code))
+        self._linked_loaded = True
+
+    def _apply(self, docs: List[Dict[str, Any]]) -> int:
+        with self._state_lock:
+            for doc in docs:
+                self._upsert_row(doc)
+        return len(docs)
+
+    def _remove_deleted(self, collection) -> int:
+        live_ids = {doc["_id"] for doc in collection.find({"embedding": {"$exists": True}}, {"_id": 1})}
+        with self._state_lock:
+            removed = [doc_id for doc_id in self._row_of_id if doc_id not in live_ids]
+            for doc_id in removed:
+                self._kill_row(self._row_of_id.pop(doc_id))
+                self._linked.remove(doc_id)
+            removed_count = len(removed)
+            if self._base is not None:
+                stale = self._base_alive & ~np.isin(self._base.ids, encode_ids(live_ids))
+                for row in np.flatnonzero(stale):
+                    self._linked.remove(self._base.doc_id(int(row)))
+                self._base_alive &= ~stale
+                removed_count += int(stale.sum())
+        return removed_count
+
+    def _remove(self, doc_id) -> int:
+        self._linked.remove(doc_id)
+        row = self._row_of_id.pop(doc_id, None)
+        if row is not None:
+            self._kill_row(row)
+            return 1
+        if self._base is not None:
+            base_row = self._base.row_of(doc_id)
+            if base_row is not None and self._base_alive[base_row]:
+                self._base_alive[base_row] = False
+                return 1
+        return 0
+
+    def _ensure_capacity(self, size: int):
+        capacity = len(self._vectors)
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2)
+        # New arrays rather than in-place resizes, so a running search keeps a consistent view
+        vectors = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        self._vectors = vectors
+        self._alive = np.concatenate([self._alive, np.zeros(new_capacity - capacity, dtype=bool)])
+        self._created_at = np.resize(self._created_at, new_capacity)
+        self._labels = np.resize(self._labels, new_capacity)
+        for field in self.FILTER_FIELDS:
+            self._codes[field] = np.resize(self._codes[field], new_capacity)
+
+    def _code(self, field: str, value) -> int:
+        vocab = self._vocab[field]
+        code = vocab.get(value)
+        if code is None:
+            code = len(vocab)
+            vocab[value] = code
+        return code
+
+    def _upsert_row(self, doc: Dict[str, Any]):
+        if doc.get("ingest_pending"):
+            # Chunks of an unfinished ingest are indexed once it sets ingest_pending to False
+            self._remove(doc["_id"])
+            return
+        vector = decode_vector(doc["embedding"])
+        if vector.shape != (self.dim,):
+            logger.warning(f"Skipping document {doc['_id']} with embedding shape {vector.shape}")
+            return
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+
+        created_at = doc.get("created_at")
+        codes = {}
+        for field in self.FILTER_FIELDS:
+            value = doc.get(field)
+            codes[field] = self._code(field, value if isinstance(value, str) else None)
+        self._insert_vector(doc["_id"], vector,
+                            created_at.timestamp() if isinstance(created_at, datetime) else 0.0, codes)
+        self._linked.update(doc["_id"], linked_source_codes(doc, self._code))
+
+        if self._base is not None:
+            # A changed base row moves to the in-memory segment
+            base_row = self._base.row_of(doc["_id"])
+            if base_row is not None:
+                self._base_alive[base_row] = False
+
+    def _insert_vector(self, doc_id, vector: np.ndarray, created_at: float, codes: Dict[str, int]):
+        old_row = self._row_of_id.get(doc_id)
+        if old_row is not None and np.array_equal(self._vectors[old_row], vector):
+            # Metadata-only updates, such as the team/project set after ingest, keep their row
+            self._created_at[old_row] = created_at
+            for field in self.FILTER_FIELDS:
+                self._codes[field][old_row] = codes[field]
+            return
+
+        label = self._next_label
+        if self._hnsw is not None:
+            # Add to the graph first, so a failure leaves the rows untouched.
+            # Labels of deleted rows stay allocated until a compaction rebuilds the graph.
+            max_elements = self._hnsw.get_max_elements()
+            if label >= max_elements:
+                self._hnsw.resize_index(max(label + 1, 2 * max_elements))
+            self._hnsw.add_items(vector[np.newaxis, :], np.array([label]))
+            self._next_label += 1
+        if old_row is not None:
+            self._kill_row(old_row)
+
+        self._ensure_capacity(self._size + 1)
+        row = self._size
+        self._vectors[row] = vector
+        self._created_at[row] = created_at
+        for field in self.FILTER_FIELDS:
+            self._codes[field][row] = codes[field]
+        self._ids.append(doc_id)
+        self._row_of_id[doc_id] = row
+        self._alive[row] = True
+        self._live += 1
+        if self._hnsw is not None:
+            self._labels[row] = label
+            self._row_of_label[label] = row
+        self._size += 1
+
+    def _kill_row(self, row: int):
+        if not self._alive[row]:
+            return
+        self._alive[row] = False
+        self._live -= 1
+        if self._hnsw is not None:
+            label = int(self._labels[row])
+            self._hnsw.mark_deleted(label)
+            del self._row_of_label[label]
+
+    def _compact(self):
+        """Drop dead rows and renumber the live ones; built aside and swapped in under the state lock."""
+        rows = np.flatnonzero(self._alive[:self._size])
+        live = rows.size
+        capacity = max(1024, 2 * live)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:live] = self._vectors[rows]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:live] = True
+        created_at = np.zeros(capacity, dtype=np.float64)
+        created_at[:live] = self._created_at[rows]
+        labels = np.zeros(capacity, dtype=np.int64)
+        codes = {}
+        for field in self.FILTER_FIELDS:
+            codes[field] = np.zeros(capacity, dtype=np.int32)
+            codes[field][:live] = self._codes[field][rows]
+        ids = [self._ids[row] for row in rows]
+        row_of_id = {doc_id: row for row, doc_id in enumerate(ids)}
+        hnsw, row_of_label = None, {}
+        if self._hnsw is not None:
+            # Deleted labels keep their graph slots, so rebuild the graph from the live rows
+            hnsw = self._create_hnsw(capacity)
+            if live:
+                hnsw.add_items(vectors[:live], np.arange(live))
+            labels[:live] = np.arange(live)
+            row_of_label = {row: row for row in range(live)}
+
+        with self._state_lock:
+            self._vectors, self._alive, self._created_at, self._labels = vectors, alive, created_at, labels
+            self._codes, self._ids, self._row_of_id, self._row_of_label = codes, ids, row_of_id, row_of_label
+            self._size = live
+            if hnsw is not None:
+                self._hnsw, self._next_label = hnsw, live
+        logger.info(f"Local vector index compacted to {live} rows")
+
+    # ---------- Search ----------
+
+    def _wanted_codes(self, field: str, value) -> List[int]:
+        values = value if isinstance(value, list) else [value]
+        return [self._vocab[field][v] for v in values if v in self._vocab[field]]
+
+    def _linked_ids(self, filters: Optional[Dict[str, Any]]) -> Set[Any]:
+        """Documents linked to a filtered source; called with the state lock held."""
+        if not filters or filters.get("source") is None:
+            return set()
+        return self._linked.ids(self._wanted_codes("source", filters["source"]))
+
+    def _filter_mask(self, filters: Optional[Dict[str, Any]], codes: Dict[str, np.ndarray],
+                     created_at: np.ndarray, size: int, linked_rows: np.ndarray = None) -> Optional[np.ndarray]:
+        """
+        Boolean mask over the first size rows of codes and created_at, or None when no filter applies.
+
+        linked_rows are rows whose linked sources match the source filter.
+        """
+        if not filters:
+            return None
+        mask = np.ones(size, dtype=bool)
+        for key, value in filters.items():
+            if key in self.FILTER_FIELDS:
+                field_mask = np.isin(codes[key][:size], self._wanted_codes(key, value))
+                if key == "source" and linked_rows is not None:
+                    field_mask[linked_rows] = True
+                mask &= field_mask
+            elif key == "date_range" and value:
+                if "start" in value:
+                    mask &= created_at[:size] >= _timestamp(value["start"])
+                if "end" in value:
+                    mask &= created_at[:size] <= _timestamp(value["end"])
+        return mask
+
+    def search(self, query_vector, filters: Optional[Dict[str, Any]] = None, topk: int = 10) -> List[Tuple[Any, float]]:
+        """
+        Find the topk documents closest to query_vector that match filters.
+
+        Returns:
+            List of (document _id, cosine score) sorted by descending score
+        """
+        if topk <= 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        with self._state_lock:
+            linked_ids = self._linked_ids(filters)
+        hits = self._search_memory(query, filters, topk)
+        if self._base is not None:
+            hits = sorted(hits + self._search_base(query, filters, topk, linked_ids),
+                          key=lambda hit: -hit[1])[:topk]
+        return hits
+
+    def _memory_rows(self, doc_ids: Iterable[Any], size: int) -> np.ndarray:
+        """In-memory rows of doc_ids below size; called with the state lock held."""
+        rows = [self._row_of_id[doc_id] for doc_id in doc_ids if doc_id in self._row_of_id]
+        return np.array([row for row in rows if row < size], dtype=np.int64)
+
+    def _search_memory(self, query: np.ndarray, filters: Optional[Dict[str, Any]], topk: int) -> List[Tuple[Any, float]]:
+        if self._hnsw is not None:
+            with self._state_lock:
+                return self._search_hnsw(query, filters, topk)
+
+        with self._state_lock:
+            # Rows below size are never rewritten, only masked out, until a compaction swaps the arrays
+            size, vectors, alive, ids = self._size, self._vectors, self._alive, self._ids
+            codes, created_at = dict(self._codes), self._created_at
+            linked_rows = self._memory_rows(self._linked_ids(filters), size)
+        if size == 0:
+            return []
+        mask = alive[:size].copy()
+        filter_mask = self._filter_mask(filters, codes, created_at, size, linked_rows)
+        if filter_mask is not None:
+            mask &= filter_mask
+
+        if mask.all():
+            rows = None
+            scores = vectors[:size] @ query
+        else:
+            rows = np.flatnonzero(mask)
+            if rows.size == 0:
+                return []
+            scores = vectors[rows] @ query
+
+        k = min(topk, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        result_rows = top if rows is None else rows[top]
+        return [(ids[row], float(score)) for row, score in zip(result_rows, scores[top])]
+
+    def _search_base(self, query: np.ndarray, filters: Optional[Dict[str, Any]], topk: int,
+                     linked_ids: Set[Any]) -> List[Tuple[Any, float]]:
+        base = self._base
+        mask = self._base_alive.copy()
+        linked_rows = np.array([row for row in map(base.row_of, linked_ids) if row is not None], dtype=np.int64)
+        filter_mask = self._filter_mask(filters, base.codes, base.created_at, len(base), linked_rows)
+        if filter_mask is not None:
+            mask &= filter_mask
+        if mask.all():
+            rows = None
+            scores = base.approximate_scores(query)
+        else:
+            rows = np.flatnonzero(mask)
+            if rows.size == 0:
+                return []
+            scores = base.approximate_scores(query, rows)
+
+        k = min(topk * self.rescore_factor, scores.size)
+        if k == 0:
+            # An empty snapshot takes the mask.all() branch with no scores
+            return []
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates if rows is None else rows[candidates]
+
+        # Quantization error only reorders near ties; rescoring a few extra rows fixes the order
+        candidates, exact = base.exact_scores(query, candidates)
+        top = np.argsort(-exact)[:topk]
+        return [(base.doc_id(int(candidates[i])), float(exact[i])) for i in top]
+
+    def _search_hnsw(self, query: np.ndarray, filters: Optional[Dict[str, Any]], topk: int) -> List[Tuple[Any, float]]:
+        """Called with the state lock held."""
+        size, row_of_label, ids = self._size, self._row_of_label, self._ids
+        linked_rows = self._memory_rows(self._linked_ids(filters), size)
+        mask = self._filter_mask(filters, self._codes, self._created_at, size, linked_rows)
+        if mask is not None:
+            mask &= self._alive[:size]
+            live = int(mask.sum())
+            row_filter = lambda label: label in row_of_label and mask[row_of_label[label]]
+        else:
+            live = self._live
+            row_filter = None
+        k = min(topk, live)
+        if k == 0:
+            return []
+        labels, distances = self._hnsw.knn_query(query[np.newaxis, :], k=k, filter=row_filter)
+        # Inner product space returns 1 - similarity as the distance
+        return [(ids[row_of_label[int(label)]], float(1.0 - distance))
+                for label, distance in zip(labels[0], distances[0])]
+
+    # ---------- Snapshot ----------
+
+    def save_store(self, store_dir: str = LOCAL_INDEX_STORE_DIR, quantization: str = None) -> str:
+        """
+        Write every live row, base and in-memory, as a new EmbeddingStore snapshot.
+
+        Returns:
+            Path of the new snapshot
+        """
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._size])
+            parts_vectors = [self._vectors[rows]]
+            parts_ids: List[Any] = [self._ids[row] for row in rows]
+            parts_created = [self._created_at[rows]]
+            parts_codes = {field: [self._codes[field][rows]] for field in self.FILTER_FIELDS}
+            if self._base is not None:
+                base_rows = np.flatnonzero(self._base_alive)
+                parts_vectors.insert(0, self._base.exact_vectors[base_rows])
+                parts_ids = [self._base.doc_id(int(row)) for row in base_rows] + parts_ids
+                parts_created.insert(0, self._base.created_at[base_rows])
+                for field in self.FILTER_FIELDS:
+                    parts_codes[field].insert(0, self._base.codes[field][base_rows])
+            kwargs = {"quantization": quantization} if quantization else {}
+            return EmbeddingStore.write(
+                store_dir,
+                vectors=np.concatenate(parts_vectors),
+                doc_ids=parts_ids,
+                created_at=np.concatenate(parts_created),
+                codes={field: np.concatenate(parts) for field, parts in parts_codes.items()},
+                vocab=self._vocab,
+                last_synced_at=self._feed.last_synced_at,
+                **kwargs
+            )
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(str(value)).timestamp()
+
+
+_local_index: Optional[LocalVectorIndex] = None
+_local_index_lock = threading.Lock()
+
+
+def get_local_vector_index(db_handler: MongoDBHandler = None) -> LocalVectorIndex:
+    """
+    Return the process-wide local index.
+
+    On first use it maps the latest EmbeddingStore snapshot, if there is one,
+    and only pulls changes made after it from MongoDB; later changes are
+    pulled by the index's sync thread.
+    """
+    global _local_index
+    if _local_index is None:
+        with _local_index_lock:
+            if _local_index is None:
+                store = EmbeddingStore.open_current() if LOCAL_INDEX_USE_STORE else None
+                index = LocalVectorIndex(db_handler, store=store)
+                index.sync()
+                index.start()
+                _local_index = index
+    return _local_index
@@ -1,13 +1,130 @@
 from services.models.embedding_model import EmbeddingModel
+from services.models.model_registry import get_embedding_model
 from services.db_handler.mongodb_handler import MongoDBHandler
+from services.cache.query_embedding_cache import QueryEmbeddingCache, query_embedding_cache
+from services.cache.result_cache import ResultCache, result_cache as shared_result_cache
+from services.cache.search_cursors import (
+    SEARCH_CURSOR_WINDOW, SearchCursorStore, decode_cursor, paginate, search_cursor_store
+)
+from services.searcher.search_backend import SearchBackend, create_search_backend
+from services.metrics.stage_metrics import stage, submit_in_context
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import os
+import threading
+from typing import Iterator, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Largest number of queries accepted in one /api/query/batch request
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "64"))
+# Searches of a batch run at the same time; each hybrid search also uses the handler's search threads
+QUERY_BATCH_WORKERS = int(os.getenv("QUERY_BATCH_WORKERS", "8"))
+
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    global _batch_executor
+    if _batch_executor is None:
+        with _batch_executor_lock:
+            if _batch_executor is None:
+                _batch_executor = ThreadPoolExecutor(max_workers=QUERY_BATCH_WORKERS, thread_name_prefix="query-batch")
+    return _batch_executor
+
+
+def int_param(params: dict, name: str, default: int) -> int:
+    """
+    Read a positive integer request parameter.
+
+    Raises:
+        ValueError: naming the parameter, so routes can answer 400
+    """
+    value = params.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Query parameter '{name}' must be an integer")
+    if value < 1:
+        raise ValueError(f"Query parameter '{name}' must be at least 1")
+    return value
+
+
+def parse_query_batch(body) -> list:
+    """
+    Validate a /api/query/batch body.
+
+    Returns:
+        One dict of query_text, query_filters, do_hybrid_search and topk per query, in input order
+
+    Raises:
+        ValueError: if the body is not {"queries": [{"q": ..., ...}, ...]} within QUERY_BATCH_MAX_SIZE
+    """
+    queries = body.get("queries") if isinstance(body, dict) else None
+    if not isinstance(queries, list) or not queries:
+        raise ValueError("Body must contain a non-empty 'queries' list")
+    if len(queries) > QUERY_BATCH_MAX_SIZE:
+        raise ValueError(f"At most {QUERY_BATCH_MAX_SIZE} queries are allowed per batch")
+
+    parsed = []
+    for i, query_json in enumerate(queries):
+        if not isinstance(query_json, dict) or not query_json.get('q'):
+            raise ValueError(f"Query parameter 'q' is required (query {i})")
+        parsed.append({
+            "query_text": query_json['q'],
+            "query_filters": query_json.get('filters', {}),
+            "do_hybrid_search": query_json.get('hybrid', True),
+            "topk": int_param(query_json, 'topk', 5),
+        })
+    return parsed
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def stream_media_type(stream_requested, accept: str = None):
+    """
+    Streaming format of a /api/query request, or None for a single JSON response.
+
+    Streaming is enabled by "stream": true in the body or by accepting one of
+    the streaming media types; Server-Sent Events are used when accepted,
+    newline-delimited JSON otherwise.
+    """
+    accept = accept or ""
+    if SSE_MEDIA_TYPE in accept:
+        return SSE_MEDIA_TYPE
+    if stream_requested or NDJSON_MEDIA_TYPE in accept:
+        return NDJSON_MEDIA_TYPE
+    return None
+
+
+def format_stream_event(phase: str, results: list, media_type: str, dumps) -> str:
+    """One streamed /api/query message, with the same data as the non-streaming response."""
+    body = dumps({
+        "status": "success",
+        "event": phase,
+        "data": {
+            "results": results,
+            "total": len(results)
+        }
+    })
+    if media_type == SSE_MEDIA_TYPE:
+        return f"event: {phase}\ndata: {body}\n\n"
+    return body + "\n"
+
+
 class QueryService:
-    def __init__(self, mongodb_handler: MongoDBHandler = None):
-        self.embedding_model = EmbeddingModel()
+    def __init__(self, mongodb_handler: MongoDBHandler = None, embedding_model: EmbeddingModel = None,
+                 embedding_cache: QueryEmbeddingCache = None, result_cache: ResultCache = None,
+                 search_backend: SearchBackend = None, cursor_store: SearchCursorStore = None):
+        self.embedding_model = embedding_model or get_embedding_model()
+        self.embedding_cache = embedding_cache or query_embedding_cache
+        self.result_cache = result_cache or shared_result_cache
         self.db_handler = mongodb_handler or MongoDBHandler()
+        self.search_backend = search_backend or create_search_backend(self.db_handler)
+        self.cursor_store = cursor_store or search_cursor_store
 
     def query(self, query_text: str, query_filters: dict = None, do_hybrid_search: bool = True, topk: int = 5) -> list:
         """
@@ -23,35 +140,207 @@ class QueryService:
             List of search results formatted for the frontend
         """
         try:
-            # Generate query embedding
-            query_embedding = self.embedding_model.encode(query_text, convert_to_tensor=False)
-            
-            # Perform search using the MongoDB handler
-            if do_hybrid_search:
-                results = self.db_handler.vector_search(
-                    query_vector=query_embedding,
-                    query_text=query_text,
-                    filters=query_filters,
-                    topk=topk,
-                    alpha=0.5
-                )
-            else:
-                results = self.db_handler.vector_search(
-                    query_vector=query_embedding,
-                    filters=query_filters,
-                    topk=topk
-                )
-            
-            # Format results for frontend
-            formatted_results = self._format_results(results)
+            # Read the generation before searching so a concurrent write leaves
+            # these results under an already stale key
+            cache_key = self._cache_key(self.result_cache.get_generation(), query_text, query_filters,
+                                        do_hybrid_search, topk)
+            if cache_key is not None:
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+            # Generate query embedding, reusing it for repeated queries
+            with stage("query", "embed"):
+                query_embedding = self.embed_query(query_text)
             
-            logger.info(f"Query '{query_text}' returned {len(formatted_results)} results")
-            return formatted_results
+            return self._search_and_format(query_embedding, query_text, query_filters, do_hybrid_search, topk,
+                                           cache_key)
             
         except Exception as e:
             logger.error(f"Query failed: {e}")
             return []
 
+    def query_page(self, query_text: str = None, query_filters: dict = None, do_hybrid_search: bool = True,
+                   page_size: int = 5, cursor: str = None) -> dict:
+        """
+        One page of a query's results.
+
+        The first page (no cursor) searches once for a window of up to
+        SEARCH_CURSOR_WINDOW results and stores it; later pages are sliced
+        from the stored window without encoding or searching again. Result
+        ids are ranks in the whole window.
+
+        Args:
+            query_text, query_filters, do_hybrid_search: As for query; ignored when cursor is given
+            page_size: Results per page
+            cursor: next_cursor of the previous page
+
+        Returns:
+            Dict of the page's results and the next_cursor, None on the last page
+
+        Raises:
+            ValueError: if cursor is malformed
+            CursorExpiredError: if the window of cursor is no longer stored
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        if cursor:
+            window_id, offset = decode_cursor(cursor)
+            return paginate(self.cursor_store.load(window_id), window_id, offset, page_size)
+
+        window_size = max(page_size, min(SEARCH_CURSOR_WINDOW, self.db_handler.config.max_limit))
+        results = self.query(query_text, query_filters=query_filters, do_hybrid_search=do_hybrid_search,
+                             topk=window_size)
+        window_id = self.cursor_store.save(results) if len(results) > page_size else None
+        return paginate(results, window_id, 0, page_size)
+
+    def query_stream(self, query_text: str, query_filters: dict = None, do_hybrid_search: bool = True,
+                     topk: int = 5) -> Iterator[Tuple[str, list]]:
+        """
+        query, sending the vector hits of a hybrid query before text retrieval and fusion finish.
+
+        Yields:
+            ("partial", formatted vector results) for uncached hybrid queries,
+            then ("final", the formatted results query returns)
+        """
+        try:
+            cache_key = self._cache_key(self.result_cache.get_generation(), query_text, query_filters,
+                                        do_hybrid_search, topk)
+            if cache_key is not None:
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    yield "final", cached
+                    return
+
+            with stage("query", "embed"):
+                query_embedding = self.embed_query(query_text)
+
+            events = self.search_backend.search_stream(
+                query_vector=query_embedding,
+                query_text=query_text if do_hybrid_search else None,
+                filters=query_filters,
+                topk=topk,
+                alpha=0.5
+            )
+            for phase, results in events:
+                with stage("query", "format"):
+                    formatted_results = self._format_results(results)
+                if phase == "final":
+                    if cache_key is not None:
+                        self.result_cache.set(cache_key, formatted_results)
+                    logger.info(f"Query '{query_text}' returned {len(formatted_results)} results")
+                yield phase, formatted_results
+
+        except Exception as e:
+            logger.error(f"Query failed: {e}")
+            yield "final", []
+
+    def query_batch(self, queries: list) -> list:
+        """
+        Run several queries with one model forward pass and concurrent searches.
+
+        Args:
+            queries: Dicts of query_text and optionally query_filters, do_hybrid_search and topk
+                (as returned by parse_query_batch)
+
+        Returns:
+            The formatted results of each query, in input order
+        """
+        generation = self.result_cache.get_generation()
+        results = [None] * len(queries)
+        cache_keys = [None] * len(queries)
+        pending = []
+        for i, q in enumerate(queries):
+            try:
+                cache_keys[i] = self._cache_key(generation, q["query_text"], q.get("query_filters"),
+                                                q.get("do_hybrid_search", True), q.get("topk", 5))
+                if cache_keys[i] is not None:
+                    results[i] = self.result_cache.get(cache_keys[i])
+            except Exception as e:
+                logger.warning(f"Result cache lookup failed: {e}")
+            if results[i] is None:
+                pending.append(i)
+        if not pending:
+            return results
+
+        try:
+            with stage("query", "embed"):
+                embeddings = self.embed_queries([queries[i]["query_text"] for i in pending])
+        except Exception as e:
+            logger.error(f"Batch query encoding failed: {e}")
+            for i in pending:
+                results[i] = []
+            return results
+
+        futures = {
+            i: submit_in_context(
+                _get_batch_executor(), self._search_and_format, embedding, queries[i]["query_text"],
+                queries[i].get("query_filters"), queries[i].get("do_hybrid_search", True),
+                queries[i].get("topk", 5), cache_keys[i]
+            )
+            for i, embedding in zip(pending, embeddings)
+        }
+        for i, future in futures.items():
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                logger.error(f"Query failed: {e}")
+                results[i] = []
+
+        logger.info(f"Batch of {len(queries)} queries, {len(pending)} searched")
+        return results
+
+    def _cache_key(self, generation: int, query_text: str, query_filters, do_hybrid_search, topk):
+        """Result cache key of a query, or None while the cache is unavailable."""
+        if generation < 0:
+            return None
+        return self.result_cache.make_key(
+            generation, query_text, query_filters, do_hybrid_search, topk, self.embedding_model.model_name
+        )
+
+    def _search_and_format(self, query_embedding, query_text: str, query_filters, do_hybrid_search: bool,
+                           topk: int, cache_key=None) -> list:
+        # Perform search using the configured search backend
+        if do_hybrid_search:
+            results = self.search_backend.search(
+                query_vector=query_embedding,
+                query_text=query_text,
+                filters=query_filters,
+                topk=topk,
+                alpha=0.5
+            )
+        else:
+            results = self.search_backend.search(
+                query_vector=query_embedding,
+                filters=query_filters,
+                topk=topk
+            )
+        
+        # Format results for frontend
+        with stage("query", "format"):
+            formatted_results = self._format_results(results)
+        if cache_key is not None:
+            self.result_cache.set(cache_key, formatted_results)
+        
+        logger.info(f"Query '{query_text}' returned {len(formatted_results)} results")
+        return formatted_results
+
+    def embed_query(self, query_text: str):
+        """Encode a query through the shared query embedding cache."""
+        return self.embedding_cache.get_or_compute(
+            self.embedding_model.model_name,
+            query_text,
+            lambda text: self.embedding_model.encode(text, convert_to_tensor=False)
+        )
+
+    def embed_queries(self, query_texts: list) -> list:
+        """Encode queries through the query embedding cache, in a single model call for the misses."""
+        return self.embedding_cache.get_or_compute_many(
+            self.embedding_model.model_name,
+            query_texts,
+            lambda texts: self.embedding_model.encode(texts, convert_to_tensor=False)
+        )
+
     def _format_results(self, results: list) -> list:
         """Format database results for frontend consumption."""
         formatted = []
@@ -0,0 +1,121 @@
+"""
+Search backends used by QueryService
+"""
+import logging
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from services.db_handler.mongodb_handler import MongoDBHandler
+from services.metrics.stage_metrics import stage
+from services.searcher.local_vector_index import LocalVectorIndex, get_local_vector_index
+
+logger = logging.getLogger(__name__)
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "atlas")  # "atlas" | "local"
+
+
+class SearchBackend:
+    """Retrieves raw documents for a query; QueryService formats them."""
+
+    def search(
+        self,
+        query_vector,
+        query_text: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        topk: int = 10,
+        alpha: float = 0.5
+    ) -> List[Dict[str, Any]]:
+        """
+        Args:
+            query_vector: The query embedding vector
+            query_text: Text for hybrid search, None for vector only
+            filters: Filters on topic, team, project, source and date_range
+            topk: Number of results to return
+            alpha: Weight for hybrid search (0.0 = pure vector, 1.0 = pure text)
+        """
+        raise NotImplementedError
+
+    def search_stream(self, query_vector, query_text=None, filters=None, topk=10,
+                      alpha=0.5) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        search, reporting early results when the backend has them.
+
+        Yields:
+            Optionally ("partial", vector-only results) while a hybrid query is
+            still being fused, then ("final", the results search returns)
+        """
+        yield "final", self.search(query_vector, query_text, filters, topk, alpha)
+
+
+class AtlasSearchBackend(SearchBackend):
+    """MongoDB Atlas $vectorSearch / $search."""
+
+    def __init__(self, db_handler: MongoDBHandler = None):
+        self.db_handler = db_handler or MongoDBHandler()
+
+    def search(self, query_vector, query_text=None, filters=None, topk=10, alpha=0.5):
+        return self.db_handler.vector_search(
+            query_vector=query_vector,
+            query_text=query_text,
+            filters=filters,
+            topk=topk,
+            alpha=alpha
+        )
+
+    def search_stream(self, query_vector, query_text=None, filters=None, topk=10, alpha=0.5):
+        return self.db_handler.iter_vector_search(
+            query_vector=query_vector,
+            query_text=query_text,
+            filters=filters,
+            topk=topk,
+            alpha=alpha
+        )
+
+
+class LocalSearchBackend(SearchBackend):
+    """
+    Vector and keyword search against in-process indexes, for plain MongoDB or offline boxes.
+
+    MongoDB is only used to keep the indexes in sync and to fetch the fields of
+    the top hits. Hybrid queries fuse with the local BM25 index.
+    """
+
+    def __init__(self, db_handler: MongoDBHandler = None, index: LocalVectorIndex = None):
+        self.db_handler = db_handler or MongoDBHandler()
+        self.index = index or get_local_vector_index(self.db_handler)
+
+    def search(self, query_vector, query_text=None, filters=None, topk=10, alpha=0.5):
+        results = []
+        for _, results in self.search_stream(query_vector, query_text, filters, topk, alpha):
+            pass
+        return results
+
+    def search_stream(self, query_vector, query_text=None, filters=None, topk=10, alpha=0.5):
+        topk = min(topk, self.db_handler.config.max_limit)
+        with stage("query", "vector_search"):
+            hits = self.index.search(query_vector, filters=filters, topk=topk)
+            scores = dict(hits)
+            results = self.db_handler.get_documents_by_ids([doc_id for doc_id, _ in hits])
+            for doc in results:
+                doc["score"] = scores[doc["_id"]]
+
+        if query_text and alpha > 0:
+            yield "partial", results
+            results = self._hybrid(results, query_text, filters, topk, alpha)
+        yield "final", results
+
+    def _hybrid(self, vector_results, query_text, filters, topk, alpha):
+        try:
+            text_results = self.db_handler._local_text_search(query_text, filters, topk * 2)
+        except Exception as e:
+            logger.warning(f"Local text search failed, using vector results: {e}")
+            return vector_results
+        return self.db_handler._combine_search_results(
+            vector_results, text_results, alpha, strategy=self.db_handler.config.fusion_strategy
+        )[:topk]
+
+
+def create_search_backend(db_handler: MongoDBHandler = None, name: str = SEARCH_BACKEND) -> SearchBackend:
+    if name == "local":
+        return LocalSearchBackend(db_handler)
+    return AtlasSearchBackend(db_handler)
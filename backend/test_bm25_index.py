@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the BM25 index postings and compaction (no MongoDB needed)
+"""
+
+import os
+import random
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+
+from services.db_handler.config import mongodb_config
+from services.searcher.bm25_index import BM25Index, decode_varints, encode_varints
+
+
+class OfflineHandler:
+    """Just enough of MongoDBHandler to construct an index that is never synced."""
+    config = mongodb_config
+    tombstones = None
+
+    def get_collection(self, name):
+        return None
+
+
+def build_index(docs):
+    index = BM25Index(OfflineHandler())
+    add_docs(index, docs)
+    return index
+
+
+def add_docs(index, docs):
+    pending = {}
+    for doc in docs:
+        index._upsert_row(doc, pending)
+    index._flush(pending)
+
+
+def random_docs(rng: random.Random, count: int, start: int = 0):
+    words = [f"w{i}" for i in range(200)]
+    return [
+        {"_id": start + i, "text": " ".join(rng.choice(words) for _ in range(rng.randint(3, 30))),
+         "topic": rng.choice(["a", "b"])}
+        for i in range(count)
+    ]
+
+
+def posting_rows(index, term):
+    row_bytes, _, _ = index._postings[term]
+    return np.cumsum(decode_varints(row_bytes))
+
+
+def test_varints_round_trip():
+    values = [0, 1, 127, 128, 255, 300, 16383, 16384, 2 ** 31, 2 ** 40]
+    assert decode_varints(encode_varints(values)).tolist() == values
+    assert len(encode_varints([127])) == 1
+    assert len(encode_varints([128])) == 2
+    assert decode_varints(b"").size == 0
+
+
+def test_postings_are_delta_encoded_across_flushes():
+    index = build_index([{"_id": i, "text": "shared" if i % 3 == 0 else "other"} for i in range(10)])
+    add_docs(index, [{"_id": 10 + i, "text": "shared"} for i in range(5)])
+    assert posting_rows(index, "shared").tolist() == [0, 3, 6, 9, 10, 11, 12, 13, 14]
+    assert index._postings["shared"][2] == 14
+
+
+def test_compaction_renumbers_rows_and_keeps_scores():
+    rng = random.Random(3)
+    index = build_index(random_docs(rng, 2000))
+    for doc_id in range(0, 2000, 4):
+        index._kill_row(index._row_of_id.pop(doc_id))
+    # Updating the text gives a document a new row and kills the old one
+    add_docs(index, [{"_id": 1, "text": "w1 w2 w3 replaced", "topic": "a"}])
+    before = index.search("w1 w2 w3", topk=50)
+    filtered_before = index.search("w5", filters={"topic": "a"}, topk=20)
+
+    index._compact()
+    assert index._size == len(index) == 1500
+    assert all(posting_rows(index, term).max() < index._size for term in index._postings)
+    assert index.search("w1 w2 w3", topk=50) == before
+    assert index.search("w5", filters={"topic": "a"}, topk=20) == filtered_before
+    assert index.search("replaced", topk=1)[0][0] == 1
+
+    # Rows appended after a compaction continue from the new size
+    add_docs(index, [{"_id": 5000, "text": "fresh w1", "topic": "b"}])
+    assert index._row_of_id[5000] == 1500
+    assert index.search("fresh", topk=1)[0][0] == 5000
+
+
+def test_compaction_drops_terms_of_dead_rows_only():
+    index = build_index([{"_id": 0, "text": "gone"}, {"_id": 1, "text": "kept"}])
+    index._kill_row(index._row_of_id.pop(0))
+    index._compact()
+    assert "gone" not in index._postings
+    assert posting_rows(index, "kept").tolist() == [0]
+    assert index.search("gone") == []
+
+
+def main():
+    tests = [
+        test_varints_round_trip,
+        test_postings_are_delta_encoded_across_flushes,
+        test_compaction_renumbers_rows_and_keeps_scores,
+        test_compaction_drops_terms_of_dead_rows_only,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+    print(f"📊 Test Results: {passed}/{len(tests)} passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming chunking (no MongoDB or model needed)
+"""
+
+import os
+import random
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from services.indexer.chunker import TextChunker
+
+
+def random_text(rng: random.Random, words: int = 3000) -> str:
+    """Words with sentence ends, runs of whitespace and newlines, like extracted documents."""
+    parts = []
+    for i in range(words):
+        word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(1, 12)))
+        if rng.random() < 0.08:
+            word += rng.choice(".!?")
+        parts.append(word)
+        parts.append(rng.choice([" ", " ", " ", "  ", "\n", " \n\n "]))
+    return "".join(parts)
+
+
+def random_cjk_text(rng: random.Random, runs: int = 40) -> str:
+    """Spaceless CJK runs, some longer than a chunk, mixed with ordinary words."""
+    parts = []
+    for _ in range(runs):
+        parts.append("".join(chr(rng.randint(0x4E00, 0x9FFF)) for _ in range(rng.randint(1, 2500))))
+        parts.append(random_text(rng, words=rng.randint(0, 30)))
+    return " ".join(parts)
+
+
+def random_blocks(rng: random.Random, text: str):
+    blocks = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 400)
+        blocks.append(text[position:position + size])
+        position += size
+    return blocks
+
+
+def chunk_texts(chunker: TextChunker, text: str):
+    return [c["text"] if isinstance(c, dict) else c for c in chunker.chunk(text)]
+
+
+def test_chunk_stream_matches_whole_text():
+    """chunk_stream(blocks) yields the same chunks as chunk("".join(blocks)), whatever the block sizes."""
+    rng = random.Random(7)
+    for mode in ("char", "sentence", "content"):
+        for _ in range(20):
+            text = random_text(rng)
+            chunker = TextChunker(mode=mode, window_size=rng.choice([600, 2000, 8000]))
+            streamed = list(chunker.chunk_stream(random_blocks(rng, text)))
+            assert streamed == chunk_texts(chunker, text), f"mode={mode}"
+
+
+def test_chunk_stream_keeps_words_apart_at_block_edges():
+    text = " ".join(f"w{i}." for i in range(2000))
+    blocks = [text[i:i + 137] for i in range(0, len(text), 137)]
+    chunks = list(TextChunker(mode="char", window_size=1000).chunk_stream(blocks))
+    assert not any(".w" in chunk for chunk in chunks)
+
+
+def test_content_chunks_split_spaceless_text():
+    chunker = TextChunker(mode="content")
+    chunks = chunk_texts(chunker, "漢字" * 14000)
+    assert len(chunks) == 35
+    assert all(len(chunk) <= chunker.chunk_size for chunk in chunks)
+    assert "".join(chunks) == "漢字" * 14000
+
+
+def test_chunk_stream_bounds_spaceless_text():
+    rng = random.Random(11)
+    for mode in ("char", "content"):
+        for _ in range(10):
+            text = random_cjk_text(rng)
+            chunker = TextChunker(mode=mode, window_size=rng.choice([2000, 8000]))
+            streamed = list(chunker.chunk_stream(random_blocks(rng, text)))
+            assert max(len(chunk) for chunk in streamed) <= chunker.chunk_size, f"mode={mode}"
+            if mode == "content":
+                assert streamed == chunk_texts(chunker, text)
+            else:
+                # The character splitter realigns a run cut at a window edge,
+                # so only check that the chunks still come from the text and reach its end
+                cleaned = chunker.clean_text(text)
+                assert all(chunk in cleaned for chunk in streamed)
+                assert cleaned.endswith(streamed[-1])
+
+
+def test_chunk_stream_empty():
+    assert list(TextChunker().chunk_stream([])) == []
+    assert list(TextChunker().chunk_stream(["", "   ", "\n"])) == []
+
+
+def main():
+    tests = [
+        test_chunk_stream_matches_whole_text,
+        test_chunk_stream_keeps_words_apart_at_block_edges,
+        test_content_chunks_split_spaceless_text,
+        test_chunk_stream_bounds_spaceless_text,
+        test_chunk_stream_empty,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+    print(f"📊 Test Results: {passed}/{len(tests)} passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled keyword matcher used by the classifiers
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from services.classifiers.keyword_matcher import KeywordMatcher, get_keyword_matcher
+
+TABLE = {
+    "ads": ["ad", "ad campaign"],
+    "ml": ["machine learning", "Machine"],
+    "data": ["data", "big data"],
+}
+
+
+def test_matches_whole_words_only():
+    matcher = KeywordMatcher(TABLE)
+    assert matcher.find("Download the database") == {}
+    assert matcher.find("c++ ad-hoc") == {"ads": {"ad"}}
+
+
+def test_case_and_whitespace_insensitive():
+    matcher = KeywordMatcher(TABLE)
+    assert matcher.find("The AD   Campaign report") == {"ads": {"ad", "ad campaign"}}
+    assert matcher.find("machine\nlearning") == {"ml": {"machine", "machine learning"}}
+
+
+def test_nested_keywords_all_count():
+    matcher = KeywordMatcher(TABLE)
+    assert matcher.find("big data and machine parts") == {"data": {"big data", "data"}, "ml": {"machine"}}
+    assert matcher.find("machine learning") == {"ml": {"machine", "machine learning"}}
+
+
+def test_overlapping_keywords_of_different_labels():
+    table = {"platform": ["data pipeline"], "analytics": ["data"], "infra": ["pipeline", "pipeline ops"]}
+    expected = {"platform": {"data pipeline"}, "analytics": {"data"}, "infra": {"pipeline", "pipeline ops"}}
+    # The result does not depend on the order of labels or keywords
+    for ordered in (table, dict(reversed(list(table.items())))):
+        matcher = KeywordMatcher({label: list(reversed(keywords)) for label, keywords in ordered.items()})
+        assert matcher.find("Our data pipeline ops team") == expected
+        assert matcher.count("Our data pipeline ops team") == {"platform": 1, "analytics": 1, "infra": 2}
+    assert KeywordMatcher(table).find("database pipelines") == {}
+
+
+def test_count_distinct_keywords_per_label():
+    matcher = KeywordMatcher(TABLE)
+    assert matcher.count("ad, ad. data") == {"ads": 1, "data": 1}
+    assert matcher.count("an ad campaign, then another ad") == {"ads": 2}
+
+
+def test_shared_keyword_and_empty_input():
+    matcher = KeywordMatcher({"a": ["shared"], "b": ["Shared", "own"]})
+    assert matcher.find("a shared thing") == {"a": {"shared"}, "b": {"shared"}}
+    assert matcher.find("") == {}
+    assert KeywordMatcher({}).find("anything") == {}
+    assert KeywordMatcher({"a": ["", "  "]}).find("anything") == {}
+
+
+def test_matchers_are_compiled_once():
+    assert get_keyword_matcher({"a": ["x"], "b": ["y"]}) is get_keyword_matcher({"b": ["y"], "a": ["x"]})
+    assert get_keyword_matcher({"a": ["x"]}) is not get_keyword_matcher({"a": ["z"]})
+
+
+def main():
+    tests = [
+        test_matches_whole_words_only,
+        test_case_and_whitespace_insensitive,
+        test_nested_keywords_all_count,
+        test_overlapping_keywords_of_different_labels,
+        test_count_distinct_keywords_per_label,
+        test_shared_keyword_and_empty_input,
+        test_matchers_are_compiled_once,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+    print(f"📊 Test Results: {passed}/{len(tests)} passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
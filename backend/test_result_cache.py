@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the search result cache (no MongoDB or Redis needed)
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from services.cache.result_cache import DictCacheBackend, ResultCache
+
+
+class FailingBackend(DictCacheBackend):
+    def bump_generation(self):
+        raise ConnectionError("generation store unavailable")
+
+
+def test_keys_normalize_the_query():
+    cache = ResultCache(DictCacheBackend())
+    key = cache.make_key(0, "Test  Search", {"topic": "a"}, False, 10)
+    assert key == cache.make_key(0, "test search", {"topic": "a"}, False, 10)
+    assert key != cache.make_key(0, "test search", {"topic": "b"}, False, 10)
+    assert key != cache.make_key(0, "test search", {"topic": "a"}, True, 10)
+    assert key != cache.make_key(0, "test search", {"topic": "a"}, False, 20)
+    assert key != cache.make_key(0, "test search", {"topic": "a"}, False, 10, model_name="other")
+
+
+def test_invalidate_changes_every_key():
+    cache = ResultCache(DictCacheBackend())
+    key = cache.make_key(cache.get_generation(), "query", None, False, 10)
+    cache.set(key, ["result"])
+    assert cache.get(key) == ["result"]
+
+    cache.invalidate()
+    new_key = cache.make_key(cache.get_generation(), "query", None, False, 10)
+    assert new_key != key
+    assert cache.get(new_key) is None
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_failed_invalidation_clears_entries():
+    backend = FailingBackend()
+    cache = ResultCache(backend)
+    key = cache.make_key(cache.get_generation(), "query", None, False, 10)
+    cache.set(key, ["stale"])
+    cache.invalidate()
+    assert cache.get(key) is None
+
+
+def main():
+    tests = [
+        test_keys_normalize_the_query,
+        test_invalidate_changes_every_key,
+        test_failed_invalidation_clears_entries,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+    print(f"📊 Test Results: {passed}/{len(tests)} passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for pagination cursors (no MongoDB or Redis needed)
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from services.cache.result_cache import DictCacheBackend
+from services.cache.search_cursors import (
+    CursorExpiredError, SearchCursorStore, decode_cursor, encode_cursor, paginate
+)
+
+
+def test_cursor_round_trip():
+    for window_id, offset in [("abc", 0), ("a:b-c_d", 20), ("x" * 22, 12345)]:
+        cursor = encode_cursor(window_id, offset)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == (window_id, offset)
+
+
+def test_invalid_cursors_raise_value_error():
+    for cursor in ["", "not base64!", "YWJj", encode_cursor("", 10), encode_cursor("abc", -1)]:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            continue
+        raise AssertionError(f"cursor {cursor!r} was accepted")
+
+
+def test_paginate_walks_the_window():
+    results = list(range(25))
+    seen = []
+    page = paginate(results, "w", 0, 10)
+    while True:
+        seen.extend(page["results"])
+        if page["next_cursor"] is None:
+            break
+        window_id, offset = decode_cursor(page["next_cursor"])
+        assert window_id == "w"
+        page = paginate(results, window_id, offset, 10)
+    assert seen == results
+
+
+def test_paginate_single_page():
+    assert paginate([1, 2, 3], "w", 0, 10) == {"results": [1, 2, 3], "next_cursor": None}
+    assert paginate([1, 2, 3], "w", 0, 3)["next_cursor"] is None
+    # Without a stored window there is no next page to point to
+    assert paginate(list(range(20)), None, 0, 10)["next_cursor"] is None
+
+
+def test_store_save_and_load():
+    store = SearchCursorStore(DictCacheBackend())
+    window_id = store.save([{"id": 1}, {"id": 2}])
+    assert window_id
+    assert store.load(window_id) == [{"id": 1}, {"id": 2}]
+    assert store.save([]) != window_id
+
+
+def test_store_expired_window():
+    backend = DictCacheBackend()
+    store = SearchCursorStore(backend)
+    window_id = store.save([1])
+    backend.clear()
+    try:
+        store.load(window_id)
+    except CursorExpiredError:
+        return
+    raise AssertionError("evicted window was loaded")
+
+
+def main():
+    tests = [
+        test_cursor_round_trip,
+        test_invalid_cursors_raise_value_error,
+        test_paginate_walks_the_window,
+        test_paginate_single_page,
+        test_store_save_and_load,
+        test_store_expired_window,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+    print(f"📊 Test Results: {passed}/{len(tests)} passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for embedding storage formats (no MongoDB needed)
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+from bson import BSON
+from bson.binary import Binary
+
+from services.db_handler.vector_codec import (
+    PACKED_BIT_DTYPE, VECTOR_SUBTYPE, decode_vector, encode_vector, vector_format
+)
+
+
+def sample_vector(seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=384).astype(np.float32)
+
+
+def cosine(a, b) -> float:
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def round_trip(value):
+    """Encode through BSON as MongoDB would store it."""
+    return BSON.decode(BSON.encode({"embedding": value}))["embedding"]
+
+
+def test_array_round_trip():
+    vector = sample_vector()
+    stored = round_trip(encode_vector(vector, "array"))
+    assert isinstance(stored, list)
+    assert vector_format(stored) == "array"
+    assert np.allclose(decode_vector(stored), vector)
+
+
+def test_float32_round_trip_is_exact():
+    vector = sample_vector()
+    stored = round_trip(encode_vector(vector, "float32"))
+    assert isinstance(stored, Binary) and stored.subtype == VECTOR_SUBTYPE
+    assert len(stored) == 2 + 4 * vector.size
+    assert vector_format(stored) == "float32"
+    assert np.array_equal(decode_vector(stored), vector)
+
+
+def test_int8_keeps_cosine_similarity():
+    vector, other = sample_vector(1), sample_vector(2)
+    stored = round_trip(encode_vector(vector, "int8"))
+    assert len(stored) == 2 + vector.size
+    assert vector_format(stored) == "int8"
+    decoded = decode_vector(stored)
+    assert np.abs(decoded).max() == 127
+    assert cosine(decoded, vector) > 0.999
+    assert abs(cosine(decoded, other) - cosine(vector, other)) < 0.01
+
+
+def test_packed_bit_vectors_drop_padding():
+    bits = np.array([1, 0, 1, 1, 0, 0, 1, 0, 1, 1], dtype=np.uint8)
+    value = Binary(bytes((PACKED_BIT_DTYPE, 6)) + np.packbits(bits).tobytes(), VECTOR_SUBTYPE)
+    assert decode_vector(value).tolist() == bits.astype(np.float32).tolist()
+    assert vector_format(value) == "binary"
+
+
+def test_missing_and_unknown():
+    assert decode_vector(None) is None
+    assert vector_format(None) is None
+    for bad_format in ("float16", ""):
+        try:
+            encode_vector(sample_vector(), bad_format)
+        except ValueError:
+            continue
+        raise AssertionError(f"format {bad_format!r} was accepted")
+
+
+def main():
+    tests = [
+        test_array_round_trip,
+        test_float32_round_trip_is_exact,
+        test_int8_keeps_cosine_similarity,
+        test_packed_bit_vectors_drop_padding,
+        test_missing_and_unknown,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+    print(f"📊 Test Results: {passed}/{len(tests)} passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)